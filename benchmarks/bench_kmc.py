@@ -0,0 +1,268 @@
+"""
+Benchmarks de rendimiento de KMC_BKL.
+
+Mide eventos por segundo, tiempo por evento y memoria pico (tracemalloc) de
+KMC_BKL.step()/run() para varios tamaños de red, condiciones iniciales y
+regímenes físicos, y guarda los resultados como JSON en results/benchmarks/.
+
+Uso:
+    python benchmarks/bench_kmc.py run --label base
+    python benchmarks/bench_kmc.py run --sizes 8 32 --seconds 0.5 --label rapido
+    python benchmarks/bench_kmc.py compare results/benchmarks/base.json results/benchmarks/nuevo.json
+    python benchmarks/bench_kmc.py batch --size 15 --replicas 256
+
+compare marca como regresión todo caso cuyo rendimiento (eventos/s) cae, o
+cuya memoria pico crece, más que --threshold (fracción, 0.15 por defecto), y
+termina con código 1 si encuentra alguna.
+
+batch compara los eventos por segundo agregados de BatchKMC con los de
+iterar KMC_BKL.step() en los modos "full" e "incremental" sobre la misma red.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from params import KMCParams
+from lattice import LatticeSOS
+from bkl import KMC_BKL
+from batch import BatchKMC
+from snapshots import RESULTS_DIR
+
+BENCH_DIR = os.path.join(RESULTS_DIR, "benchmarks")
+
+# Regímenes: del dominado por migración al dominado por adsorción
+REGIMES = {
+    # Barreras altas de desorción/incorporación lenta: casi todo es difusión
+    "migration": KMCParams(T=302.15, K0_plus=1.0, K_inc_plus=1e-3, E_pb_over_kT=2.5,
+                           phi_over_kT=8.0, delta=0.3, V=1.0, C_eq=1e6),
+    # Parámetros del notebook de beta-hematina
+    "notebook": KMCParams(T=302.15, K0_plus=0.25, K_inc_plus=0.25, E_pb_over_kT=1.5,
+                          phi_over_kT=3.5, delta=0.63, V=0.708, C_eq=50),
+    # Sobresaturación en el techo: la adsorción domina
+    "adsorption": KMCParams(T=302.15, K0_plus=1.0, K_inc_plus=1e-3, E_pb_over_kT=1.5,
+                            phi_over_kT=0.5, delta=0.3, V=1.0, C_eq=1e-3),
+}
+
+# Condiciones iniciales: (init_mode, n_seeds)
+STARTS = {
+    "flat": ("flat", 0),
+    "random_surface": ("random_surface", 0),
+    "seeded": ("flat", 8),
+}
+
+MODES = {
+    "full": {"incremental": False},
+    "incremental": {"incremental": True},
+    "tree": {"incremental": True, "solver": "tree"},
+}
+
+DEFAULT_SIZES = [8, 16, 32, 64, 128, 256]
+
+
+# =============================
+# Medición
+# =============================
+def _make_engine(L: int, start: str, regime: str, mode: str, seed: int) -> KMC_BKL:
+    init_mode, n_seeds = STARTS[start]
+    lat = LatticeSOS(size=L, seed=seed)
+    lat.initialize(init_mode, max_roughness=2)
+    # Reserva proporcional al área para que ningún caso se agote durante la medición
+    return KMC_BKL(lat, REGIMES[regime], N_bulk0=200 * L * L, rng_seed=seed,
+                   n_seeds=n_seeds, history_mode="off", **MODES[mode])
+
+
+def bench_case(L: int, start: str, regime: str, mode: str, seconds: float = 1.0,
+               max_events: int = 200_000, warmup: int = 200, seed: int = 0) -> dict:
+    """
+    Mide un caso: step() en bucle durante `seconds` (o max_events) tras
+    `warmup` eventos, y la memoria pico de run() con el mismo número de
+    eventos en un motor nuevo (tracemalloc ralentiza, por eso va aparte).
+    """
+    kmc = _make_engine(L, start, regime, mode, seed)
+    for _ in range(warmup):
+        if not kmc.step():
+            break
+    counts0 = dict(kmc.counts)
+
+    n = 0
+    t0 = time.perf_counter()
+    deadline = t0 + seconds
+    while n < max_events:
+        if not kmc.step():
+            break
+        n += 1
+        if (n & 63) == 0 and time.perf_counter() >= deadline:
+            break
+    elapsed = time.perf_counter() - t0
+
+    done = {e: kmc.counts[e] - counts0[e] for e in kmc.counts}
+    fractions = {e: (c / n if n else 0.0) for e, c in done.items()}
+
+    fresh = _make_engine(L, start, regime, mode, seed)
+    tracemalloc.start()
+    fresh.run(t_end=np.inf, max_events=min(n, 5_000) or 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "key": f"L={L}/{start}/{regime}/{mode}",
+        "L": L, "start": start, "regime": regime, "mode": mode,
+        "n_events": n, "seconds": elapsed,
+        "events_per_s": n / elapsed if elapsed > 0 else 0.0,
+        "us_per_event": 1e6 * elapsed / n if n else float("nan"),
+        "peak_mem_kib": peak / 1024.0,
+        "event_fractions": fractions,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return out.stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(sizes=DEFAULT_SIZES, starts=tuple(STARTS), regimes=tuple(REGIMES),
+              modes=("full", "incremental"), seconds: float = 1.0, verbose: bool = True) -> dict:
+    cases = []
+    for L in sizes:
+        for start in starts:
+            for regime in regimes:
+                for mode in modes:
+                    c = bench_case(L, start, regime, mode, seconds=seconds)
+                    cases.append(c)
+                    if verbose:
+                        print(f"{c['key']:<45} {c['events_per_s']:>12.0f} ev/s "
+                              f"{c['us_per_event']:>10.1f} us/ev {c['peak_mem_kib']:>10.0f} KiB")
+    return {
+        "meta": {"commit": _git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "python": platform.python_version(), "numpy": np.__version__,
+                 "platform": platform.platform(), "seconds_per_case": seconds},
+        "cases": cases,
+    }
+
+
+def bench_batch(L: int = 15, n_replicas: int = 256, regime: str = "notebook",
+                seconds: float = 1.0, seed: int = 0) -> dict:
+    """
+    Eventos por segundo agregados de BatchKMC (R réplicas de L×L) frente a
+    KMC_BKL.step() en serie con bins por reconstrucción ("full") e
+    incrementales, con la misma red, régimen y reserva.
+    """
+    p = REGIMES[regime]
+    N0 = 200 * L * L
+    res = {"L": L, "n_replicas": n_replicas, "regime": regime}
+    for mode in ("full", "incremental"):
+        kmc = _make_engine(L, "flat", regime, mode, seed)
+        n = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds and kmc.step():
+            n += 1
+        res[f"{mode}_events_per_s"] = n / (time.perf_counter() - t0)
+
+    b = BatchKMC(p, L, n_replicas=n_replicas, N_bulk0=N0, rng_seed=seed)
+    b.step()  # construye los bins fuera de la medición
+    n = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        n += int(b.step().sum())
+    res["batch_events_per_s"] = n / (time.perf_counter() - t0)
+    for mode in ("full", "incremental"):
+        res[f"speedup_vs_{mode}"] = res["batch_events_per_s"] / res[f"{mode}_events_per_s"]
+    return res
+
+
+# =============================
+# Comparación entre dos corridas
+# =============================
+def compare(old: dict, new: dict, threshold: float = 0.15) -> list:
+    """
+    Compara dos resultados de run_suite por clave de caso. Devuelve una fila por
+    caso común con la razón de rendimiento y de memoria, y si es regresión.
+    """
+    old_cases = {c["key"]: c for c in old["cases"]}
+    rows = []
+    for c in new["cases"]:
+        o = old_cases.get(c["key"])
+        if o is None:
+            continue
+        speed = c["events_per_s"] / o["events_per_s"] if o["events_per_s"] > 0 else float("inf")
+        mem = c["peak_mem_kib"] / o["peak_mem_kib"] if o["peak_mem_kib"] > 0 else 1.0
+        rows.append({"key": c["key"], "speed_ratio": speed, "mem_ratio": mem,
+                     "regression": speed < 1.0 - threshold or mem > 1.0 + threshold})
+    return rows
+
+
+def _resolve(path: str) -> str:
+    if os.path.exists(path) or os.path.isabs(path):
+        return path
+    return os.path.join(BENCH_DIR, path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de KMC_BKL")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="ejecuta la batería y guarda un JSON")
+    p_run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    p_run.add_argument("--starts", nargs="+", default=list(STARTS), choices=list(STARTS))
+    p_run.add_argument("--regimes", nargs="+", default=list(REGIMES), choices=list(REGIMES))
+    p_run.add_argument("--modes", nargs="+", default=["full", "incremental"], choices=list(MODES))
+    p_run.add_argument("--seconds", type=float, default=1.0, help="tiempo de medición por caso")
+    p_run.add_argument("--label", default=None, help="nombre del JSON (por defecto, el commit)")
+
+    p_cmp = sub.add_parser("compare", help="compara dos JSON y marca regresiones")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.15)
+
+    p_batch = sub.add_parser("batch", help="BatchKMC frente a KMC_BKL.step()")
+    p_batch.add_argument("--size", type=int, default=15)
+    p_batch.add_argument("--replicas", type=int, default=256)
+    p_batch.add_argument("--regime", default="notebook", choices=list(REGIMES))
+    p_batch.add_argument("--seconds", type=float, default=1.0)
+
+    args = parser.parse_args(argv)
+    if args.cmd == "batch":
+        r = bench_batch(args.size, args.replicas, args.regime, args.seconds)
+        print(f"L={r['L']} R={r['n_replicas']} {r['regime']}")
+        for mode in ("full", "incremental"):
+            print(f"  KMC_BKL {mode:<12} {r[f'{mode}_events_per_s']:>12.0f} ev/s")
+        print(f"  BatchKMC             {r['batch_events_per_s']:>12.0f} ev/s "
+              f"(x{r['speedup_vs_full']:.1f} frente a full, x{r['speedup_vs_incremental']:.1f} frente a incremental)")
+        return 0
+    if args.cmd == "run":
+        res = run_suite(args.sizes, args.starts, args.regimes, args.modes, args.seconds)
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        path = os.path.join(BENCH_DIR, f"{args.label or res['meta']['commit']}.json")
+        with open(path, "w") as f:
+            json.dump(res, f, indent=1)
+        print(f"Resultados guardados en {path}")
+        return 0
+
+    with open(_resolve(args.old)) as f:
+        old = json.load(f)
+    with open(_resolve(args.new)) as f:
+        new = json.load(f)
+    rows = compare(old, new, args.threshold)
+    for r in rows:
+        flag = "REGRESIÓN" if r["regression"] else ""
+        print(f"{r['key']:<45} velocidad x{r['speed_ratio']:.2f}  memoria x{r['mem_ratio']:.2f}  {flag}")
+    n_bad = sum(r["regression"] for r in rows)
+    print(f"{len(rows)} casos comparados ({old['meta']['commit']} -> {new['meta']['commit']}), {n_bad} regresiones")
+    return 1 if n_bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
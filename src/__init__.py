@@ -2,9 +2,56 @@ from params import KMCParams
 from lattice import LatticeSOS
 from bkl import KMC_BKL
 from utils import _safe_exp, _finite_or_zero
+from rates import RateTable
+from bins import IndexedSiteSet, ClassBins
+from sumtree import SumTree
+from history import EventLog
+from snapshots import SnapshotStore
+from ensemble import run_ensemble, param_grid, EnsembleResult
+from batch import BatchKMC
+from fitting import ConversionFitter, load_conversion_data
+from profiling import StepProfiler
+from observables import SurfaceObservables
+from leaping import TauLeaper
+from parallel import ParallelKMC
+from acceleration import MigrationScaler
+from render import render_voxels, render_frames
+from trajectory import Trajectory
+from stopping import (StoppingCriterion, ConversionPlateau, TargetConversion, BulkExhausted,
+                      WallClock, SurfaceSteadyState)
+from rng import UniformBuffer
+from streaming import RunRecord
 
 __all__ = ['KMCParams',
            'LatticeSOS',
            'KMC_BKL',
+           'RateTable',
+           'IndexedSiteSet',
+           'ClassBins',
+           'SumTree',
+           'EventLog',
+           'SnapshotStore',
+           'run_ensemble',
+           'param_grid',
+           'EnsembleResult',
+           'BatchKMC',
+           'ConversionFitter',
+           'load_conversion_data',
+           'StepProfiler',
+           'SurfaceObservables',
+           'TauLeaper',
+           'ParallelKMC',
+           'MigrationScaler',
+           'render_voxels',
+           'render_frames',
+           'Trajectory',
+           'StoppingCriterion',
+           'ConversionPlateau',
+           'TargetConversion',
+           'BulkExhausted',
+           'WallClock',
+           'SurfaceSteadyState',
+           'UniformBuffer',
+           'RunRecord',
            '_safe_exp',
            '_finite_or_zero']
\ No newline at end of file
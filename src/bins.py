@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict
+
+# =============================
+# Contenedores de sitios por clase (índices planos int32)
+# =============================
+class IndexedSiteSet:
+    """
+    Conjunto de sitios identificados por su índice plano (i * Ly + j).
+    - members[:n] guarda los sitios en orden arbitrario.
+    - pos[idx] es la posición de idx dentro de members (compartido con los
+      demás conjuntos de un mismo ClassBins, ya que un sitio pertenece a lo
+      sumo a una clase por tipo de evento).
+    Inserción, borrado (swap-remove) y muestreo uniforme son O(1); el arreglo
+    solo se reasigna al duplicar su capacidad.
+    """
+    __slots__ = ("members", "pos", "n")
+
+    def __init__(self, pos: np.ndarray, capacity: int = 16):
+        self.members = np.empty(max(1, int(capacity)), dtype=np.int32)
+        self.pos = pos
+        self.n = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, k: int) -> int:
+        if k < 0:
+            k += self.n
+        if not 0 <= k < self.n:
+            raise IndexError("IndexedSiteSet index out of range")
+        return int(self.members[k])
+
+    def __iter__(self):
+        return iter(self.members[:self.n].tolist())
+
+    def __contains__(self, idx: int) -> bool:
+        p = self.pos[idx]
+        return 0 <= p < self.n and self.members[p] == idx
+
+    def add(self, idx: int):
+        if self.n == len(self.members):
+            grown = np.empty(2 * len(self.members), dtype=np.int32)
+            grown[:self.n] = self.members[:self.n]
+            self.members = grown
+        self.members[self.n] = idx
+        self.pos[idx] = self.n
+        self.n += 1
+
+    def remove(self, idx: int):
+        p = self.pos[idx]
+        self.n -= 1
+        last = self.members[self.n]
+        self.members[p] = last
+        self.pos[last] = p
+        self.pos[idx] = -1
+
+    def draw(self, rng: np.random.Generator) -> int:
+        return int(self.members[rng.integers(0, self.n)])
+
+    def to_array(self) -> np.ndarray:
+        return self.members[:self.n]
+
+    def fill(self, idxs: np.ndarray):
+        """Reemplaza el contenido por idxs (en ese orden)."""
+        n = len(idxs)
+        if n > len(self.members):
+            self.members = np.empty(max(n, 2 * len(self.members)), dtype=np.int32)
+        self.members[:n] = idxs
+        self.pos[idxs] = np.arange(n, dtype=np.int32)
+        self.n = n
+
+
+class ClassBins:
+    """
+    Bins de un tipo de evento: clase de cada sitio (-1 = no participa),
+    un IndexedSiteSet por clase y el conteo por clase.
+    """
+    def __init__(self, n_classes: int, n_sites: int):
+        self.cls = np.full(n_sites, -1, dtype=np.int8)
+        self.pos = np.full(n_sites, -1, dtype=np.int32)
+        self.sets = [IndexedSiteSet(self.pos) for _ in range(n_classes)]
+        self.counts = np.zeros(n_classes, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.sets)
+
+    def assign(self, idx: int, c: int):
+        old = self.cls[idx]
+        if old == c:
+            return
+        if old >= 0:
+            self.sets[old].remove(idx)
+            self.counts[old] -= 1
+        if c >= 0:
+            self.sets[c].add(idx)
+            self.counts[c] += 1
+        self.cls[idx] = c
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Clases y miembros de cada conjunto en su orden actual (para checkpoints)."""
+        members = [s.to_array() for s in self.sets]
+        return {"cls": self.cls.copy(), "counts": self.counts.copy(),
+                "members": np.concatenate(members) if members else np.empty(0, dtype=np.int32)}
+
+    def set_state(self, cls: np.ndarray, counts: np.ndarray, members: np.ndarray):
+        """Restaura exactamente el orden de los conjuntos guardado con get_state()."""
+        self.cls[:] = cls
+        self.pos.fill(-1)
+        ends = np.cumsum(counts)
+        for c, s in enumerate(self.sets):
+            s.fill(np.asarray(members[ends[c] - counts[c]:ends[c]], dtype=np.int32))
+        self.counts[:] = counts
+
+    def rebuild(self, cls_flat: np.ndarray):
+        """Reconstruye todos los conjuntos a partir de un arreglo plano de clases."""
+        self.cls[:] = cls_flat
+        self.pos.fill(-1)
+        for c, s in enumerate(self.sets):
+            s.fill(np.flatnonzero(self.cls == c).astype(np.int32))
+            self.counts[c] = len(s)
@@ -1,18 +1,46 @@
+import os
+import json
+import time
+import warnings
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 from params import KMCParams
 from lattice import LatticeSOS
-from utils import _safe_exp, _finite_or_zero
+from utils import _finite_or_zero
+from bins import ClassBins
+from sumtree import SumTree
+from history import EventLog, EVENT_CODES
+from snapshots import SnapshotStore, nearest_snapshot, RESULTS_DIR
+from profiling import StepProfiler
+from jit import HAS_NUMBA, run_kernel
+from observables import SurfaceObservables, ObservableTrace
+from leaping import TauLeaper
+from acceleration import MigrationScaler
+from render import render_voxels
+from trajectory import Trajectory
+from stopping import StoppingCriterion, StoppingRules
+from rng import UniformBuffer
+from streaming import RunRecord, print_progress
+from rates import (EVENT_TYPES, N_CLASSES, RateTable, supersaturation, rate_adsorption,
+                   rate_desorption, rate_migration, rate_incorporation)
 
 # =============================
 # Adaptive BKL kMC with incorporation (robusto)
 # =============================
 class KMC_BKL:
+    VALIDATION_MODES = ("every", "interval", "random", "local")
+
     def __init__(self, lattice: LatticeSOS, params: KMCParams,
                  N_bulk0: int, rng_seed: Optional[int] = None,
                  time_scale: float = 1.0, n_seeds: int = 0, 
-                 debug: bool = False):
+                 debug: bool = False, incremental: bool = False,
+                 solver: str = "nfold", history_mode: str = "full",
+                 history_capacity: int = 4096, history_every: int = 1,
+                 profile: bool = False, validate: str = "every",
+                 validate_every: int = 1000, validate_prob: float = 1e-3,
+                 rng_block: int = 4096):
         self.lat = lattice
         self.p = params
         
@@ -21,8 +49,30 @@ class KMC_BKL:
             raise ValueError("⛔ [DEBUG ERROR] Se requiere una semilla fija (rng_seed) para garantizar determinismo en modo debug.")
 
         self.rng = np.random.default_rng(rng_seed)
+        # Uniformes del bucle de eventos por bloques de rng_block (0 = una
+        # llamada a self.rng por número, flujo de versiones anteriores)
+        self.uniforms = UniformBuffer(self.rng, rng_block)
         self.debug = debug
 
+        # Validación en modo debug (ver _maybe_validate):
+        # - "every": auditoría completa antes de cada evento (comportamiento original).
+        # - "interval": auditoría completa cada validate_every eventos.
+        # - "random": auditoría completa con probabilidad validate_prob por evento,
+        #   sorteada con un flujo propio para no alterar la trayectoria.
+        # - "local": auditoría completa al inicio y, tras cada evento, solo la
+        #   vecindad tocada contra un cálculo desde cero, más tasas y conteos.
+        if validate not in self.VALIDATION_MODES:
+            raise ValueError(f"validate debe ser uno de {self.VALIDATION_MODES}")
+        self.validate = validate
+        self.validate_every = max(1, int(validate_every))
+        self.validate_prob = float(validate_prob)
+        self._val_rng = None
+        if debug and validate == "random":
+            ss = rng_seed if isinstance(rng_seed, np.random.SeedSequence) else np.random.SeedSequence(rng_seed)
+            self._val_rng = np.random.default_rng(ss.spawn(1)[0])
+        self.n_validations = 0
+        self._last_moved: Tuple[int, ...] = ()
+
         # Reservas
         self.N0 = int(N_bulk0)   # total inicial para escalar adsorción y conversión
         self.N_bulk = int(N_bulk0)
@@ -31,14 +81,73 @@ class KMC_BKL:
         # Estado temporal
         self.time_scale = float(time_scale)
         self.t = 0.0
+        self.n_events = 0        # eventos aplicados por step() desde el inicio
 
         # Bookkeeping
-        self.history = []  # (t, evt, site)
+        # (t, evt, site) en columnas; ver EventLog para los modos ring/decimate/off
+        self.history = EventLog(self.lat.shape, mode=history_mode,
+                                capacity=history_capacity, every=history_every)
         self.counts = {"adsorption":0, "desorption":0, "migration":0, "incorporation":0}
 
+        # Tasas por clase; solo la fila de adsorción se refresca al cambiar N_bulk
+        self.rates = RateTable(*(N_CLASSES[e] for e in EVENT_TYPES))
+        self._rate_rows = {"adsorption": self.rates.ads, "desorption": self.rates.des,
+                           "migration": self.rates.mig, "incorporation": self.rates.inc}
+
+        # Bins por tipo de evento (ClassBins: clase por sitio, conjuntos de
+        # índices planos y conteo por clase). En modo incremental se construyen
+        # de forma perezosa en el primer step() y luego solo se reclasifica la
+        # vecindad del evento, así el coste por evento no depende del tamaño de
+        # la red. En modo completo se reconstruyen en cada paso.
+        self.incremental = bool(incremental)
+        self._bins_dirty = True
+        n_sites = self.lat.heights.size
+        self._bins: Dict[str, ClassBins] = {e: ClassBins(N_CLASSES[e], n_sites) for e in EVENT_TYPES}
+        # Región activa opcional (máscara plana de sitios): fuera de ella ningún
+        # sitio participa en eventos. La usa la descomposición espacial de parallel.py.
+        self.active_mask: Optional[np.ndarray] = None
+
+        # Selector de eventos: "nfold" (barrido lineal por tipo y clase) o
+        # "tree" (árbol de sumas con una hoja por (tipo, clase); selección y
+        # actualización en O(log N), preparado para tasas por sitio).
+        if solver not in ("nfold", "tree"):
+            raise ValueError("solver debe ser 'nfold' o 'tree'")
+        self.solver = solver
+        self._leaf_types = [(e, i) for e in EVENT_TYPES for i in range(N_CLASSES[e])]
+        self._leaf_vals = np.zeros(len(self._leaf_types), dtype=np.float64)
+        self._tree = SumTree(len(self._leaf_types)) if solver == "tree" else None
+        # Hojas cuyo conteo cambió desde el último _sync_tree (las marca
+        # _reclassify_site); _tree_full pide recalcularlas todas tras una
+        # reconstrucción de bins o un cambio de tasas.
+        self._leaf_start = {}
+        for k, (e, i) in enumerate(self._leaf_types):
+            self._leaf_start.setdefault(e, k)
+        self._tree_dirty = set()
+        self._tree_full = True
+        self._tree_rates = (-1, -1)
+
+        # Perfilado opcional por fases de step() y primitivas de la red
+        # (None = desactivado; ver StepProfiler). run() deja su resumen en run_report.
+        self.prof: Optional[StepProfiler] = None
+        self.run_report: Dict[str, object] = {}
+
+        # Observables de superficie O(1) por evento (activados por
+        # enable_observables() o run(observable_times=...))
+        self.obs: Optional[SurfaceObservables] = None
+        self._obs_trace: Optional[ObservableTrace] = None
+        self.observable_trace: Dict[str, np.ndarray] = {}
+
+        # Escalado adaptativo de la migración rápida (enable_migration_scaling)
+        self.accel: Optional[MigrationScaler] = None
+
+        # Keyframes para reconstruir el estado a cualquier t (enable_trajectory)
+        self.traj: Optional[Trajectory] = None
+        if profile:
+            self.enable_profiling()
+
         # Semillas iniciales
         for _ in range(max(0, int(n_seeds))):
-            x, y = self.rng.integers(0, lattice.size, size=2)
+            x, y = self.rng.integers(0, lattice.shape, size=2)
             self.lat.inc_height((x,y), 1)
             self.N_inc += 1
             self.N_bulk = max(0, self.N_bulk - 1)
@@ -47,9 +156,7 @@ class KMC_BKL:
     @property
     # Calcula la sobresaturación
     def supersaturation(self) -> float:
-        C = self.N_bulk / max(self.p.V, 1e-12)
-        S = np.log((C + 1e-15) / max(self.p.C_eq, 1e-15))
-        return float(np.clip(S, self.p.S_floor, self.p.S_ceil))
+        return supersaturation(self.p, self.N_bulk)
 
     @property
     # Calcula el porcentaje de conversión
@@ -59,74 +166,122 @@ class KMC_BKL:
 
 
     # ---- Rate functions (con safe_exp y clamps) ----
+    # Evaluación directa; step() usa la tabla cacheada self.rates.
     def r_a(self, i: int) -> float:
-        if self.N_bulk <= 0:
-            return 0.0
-        S = self.supersaturation
-        # evitar dividir por S~0: usar signo para no cambiar la física cualitativa
-        eps = 1e-12 if S >= 0 else -1e-12
-        arg = S + i * (self.p.delta / max(S, eps))
-        base = self.p.K0_plus * _safe_exp(arg)
-        # factor de reserva finita (empuja a meseta)
-        base *= (self.N_bulk / max(self.N0, 1))
-        return _finite_or_zero(base)
+        return rate_adsorption(self.p, i, self.N_bulk, self.N0, self.supersaturation)
 
     def r_d(self, i: int) -> float:
-        arg = self.p.phi_over_kT - i * self.p.E_pb_over_kT
-        val = self.p.K0_plus * _safe_exp(arg)
-        return _finite_or_zero(val)
+        return rate_desorption(self.p, i)
 
     def r_m(self, i: int) -> float:
-        arg = self.p.phi_over_kT + 0.5*self.p.E_pb_over_kT - i*self.p.E_pb_over_kT
-        val = self.p.K0_plus * _safe_exp(arg)
-        return _finite_or_zero(val)
+        return rate_migration(self.p, i)
 
     def r_inc(self, i: int) -> float:
-        arg = i * self.p.E_pb_over_kT
-        val = self.p.K_inc_plus * _safe_exp(arg)
-        return _finite_or_zero(val)
+        return rate_incorporation(self.p, i)
 
     # ---- Classify sites ----
+    # Las clases se obtienen de los conteos vectorizados de LatticeSOS
+    # (unas pocas operaciones de arreglo sobre toda la red); -1 = el sitio no
+    # participa en ese tipo de evento.
+    def _class_arrays(self) -> Dict[str, np.ndarray]:
+        h = self.lat.heights
+        occupied = h > 0
+        a = np.minimum(self.lat.adsorption_bonds_all(), 4)
+        d = np.where(occupied, np.minimum(self.lat.desorption_bonds_all(), 4), -1).astype(np.int8)
+        mobile = occupied & (self.lat.migration_target_count_all() > 0)
+        m = np.where(mobile, np.minimum(d, 3), -1).astype(np.int8)
+        if self.active_mask is not None:
+            off = ~self.active_mask.reshape(h.shape)
+            a = np.where(off, -1, a).astype(np.int8)
+            d[off] = -1
+            m[off] = -1
+        return {"adsorption": a, "desorption": d, "migration": m, "incorporation": d}
+
+    @staticmethod
+    def _bins_from_classes(cls: np.ndarray, n: int) -> Dict[int, List[Tuple[int,int]]]:
+        return {i: [tuple(x) for x in np.argwhere(cls == i)] for i in range(n)}
+
     def _classify_adsorption_sites(self) -> Dict[int, List[Tuple[int,int]]]:
-        bins = {0: [], 1: [], 2: [], 3: [], 4: []}
-        for s in self.lat.get_sites():
-            i = self.lat.adsorption_bonds(s)
-            bins[min(max(i,0),4)].append(s)
-        return bins
+        a = np.minimum(self.lat.adsorption_bonds_all(), 4)
+        return self._bins_from_classes(a, N_CLASSES["adsorption"])
 
     def _classify_desorption_sites(self) -> Dict[int, List[Tuple[int,int]]]:
-        bins = {0: [], 1: [], 2: [], 3: [], 4: []}
-        for s in self.lat.get_sites():
-            if self.lat.get_height(s) > 0:
-                i = self.lat.desorption_bonds(s)
-                bins[min(max(i,0),4)].append(s)
-        return bins
+        h = self.lat.heights
+        d = np.where(h > 0, np.minimum(self.lat.desorption_bonds_all(), 4), -1)
+        return self._bins_from_classes(d, N_CLASSES["desorption"])
 
     def _classify_migration_sites(self) -> Dict[int, List[Tuple[int,int]]]:
-        bins = {0: [], 1: [], 2: [], 3: []}
-        for s in self.lat.get_sites():
-            if self.lat.get_height(s) > 0:
-                targets = self.lat.migration_targets(s)
-                if not targets:
-                    continue
-                i = self.lat.desorption_bonds(s)
-                bins[min(max(i,0),3)].append(s)
-        return bins
+        return self._bins_from_classes(self._class_arrays()["migration"], N_CLASSES["migration"])
 
     def _classify_incorporation_sites(self) -> Dict[int, List[Tuple[int,int]]]:
-        bins = {0: [], 1: [], 2: [], 3: [], 4: []}
-        for s in self.lat.get_sites():
-            if self.lat.get_height(s) > 0:
-                i = self.lat.desorption_bonds(s)
-                bins[min(max(i,0),4)].append(s)
-        return bins
+        return self._classify_desorption_sites()
+
+    # ---- Incremental bins ----
+    def refresh_bins(self):
+        """
+        Marca los bins incrementales como obsoletos. Debe llamarse si se modifica
+        `lat.heights` desde fuera del motor; el siguiente step() los reconstruye.
+        """
+        self._bins_dirty = True
+        if self.obs is not None:
+            self.obs.recompute()
+
+    def _rebuild_bins(self):
+        classes = self._class_arrays()
+        for etype in EVENT_TYPES:
+            self._bins[etype].rebuild(classes[etype].ravel())
+        self._bins_dirty = False
+        self._tree_full = True
+
+    def _site_classes(self, idx: int) -> Tuple[int, int, int]:
+        """Clases (adsorción, desorción/incorporación, migración) de un sitio; -1 si no aplica."""
+        if self.active_mask is not None and not self.active_mask[idx]:
+            return -1, -1, -1
+        hf = self.lat.flat
+        h = hf.item(idx)
+        a = d = 0
+        mobile = False
+        for k in self.lat.nbr_list[idx]:
+            hk = hf.item(k)
+            if hk > h: a += 1
+            if hk >= h: d += 1
+            if hk <= h: mobile = True
+        if h <= 0:
+            return a, -1, -1
+        return a, d, (min(d, 3) if mobile else -1)
+
+    def _reclassify_site(self, idx: int):
+        a, d, m = self._site_classes(idx)
+        if self._tree is not None:
+            self._mark_leaves(idx, a, d, m)
+        self._bins["adsorption"].assign(idx, a)
+        self._bins["desorption"].assign(idx, d)
+        self._bins["migration"].assign(idx, m)
+        self._bins["incorporation"].assign(idx, d)
+
+    def _reclassify_around(self, *idxs: int):
+        # Un cambio de altura en s solo afecta a s y a sus 4 vecinos
+        touched = set(idxs)
+        for i in idxs:
+            touched.update(self.lat.nbr_list[i])
+        for i in touched:
+            self._reclassify_site(i)
+
+    def set_active_region(self, mask: Optional[np.ndarray]):
+        """
+        Restringe los eventos a los sitios con mask True (arreglo booleano de
+        forma lat.shape o plano); None vuelve a toda la red. Los sitios fuera
+        de la región siguen contando como vecinos y pueden recibir migraciones.
+        """
+        self.active_mask = None if mask is None else np.asarray(mask, dtype=bool).reshape(-1)
+        self.refresh_bins()
 
     # ---- Event type selection ----
     def _choose_event_type(self, Wa, Wd, Wm, Wi) -> str:
         Wtot = Wa + Wd + Wm + Wi
         if not np.isfinite(Wtot) or Wtot <= 0.0:
             return "none"
-        r = self.rng.random() * Wtot
+        r = self.uniforms.random() * Wtot
         if r < Wa: return "adsorption"
         r -= Wa
         if r < Wd: return "desorption"
@@ -134,23 +289,139 @@ class KMC_BKL:
         if r < Wm: return "migration"
         return "incorporation"
 
-    def _choose_class(self, weights: Dict[int, float]) -> int:
-        total = sum(weights.values())
-        if not np.isfinite(total) or total <= 0.0:
-            return max(weights, key=weights.get)
-        r = self.rng.random() * total
+    def _choose_class(self, counts: np.ndarray, row: np.ndarray) -> int:
+        # Barrido acumulado de conteo * tasa sobre las clases con sitios, sin
+        # construir un contenedor por evento; -1 si ninguna clase tiene sitios
+        total = 0.0
+        best, best_w = -1, -np.inf
+        for i in range(len(counts)):
+            c = counts.item(i)
+            if c > 0:
+                w = c * row.item(i)
+                total += w
+                if w > best_w:
+                    best, best_w = i, w
+        if best < 0 or not np.isfinite(total) or total <= 0.0:
+            return best
+        r = self.uniforms.random() * total
         cum = 0.0
-        for i in sorted(weights.keys()):
-            w = weights[i]
-            cum += w
-            if r <= cum:
-                return i
-        return max(weights, key=weights.get)
-
-    def _choose_site_uniform(self, sites: List[Tuple[int,int]]) -> Tuple[int,int]:
-        idx = self.rng.integers(0, len(sites))
+        for i in range(len(counts)):
+            c = counts.item(i)
+            if c > 0:
+                cum += c * row.item(i)
+                if r <= cum:
+                    return i
+        return best
+
+    def _choose_site_uniform(self, sites):
+        # Acepta listas de tuplas o un IndexedSiteSet (devuelve el índice plano)
+        idx = self.uniforms.integers(len(sites))
         return sites[idx]
 
+    # ---- Rate tree solver ----
+    def _mark_leaves(self, idx: int, a: int, d: int, m: int):
+        # Hojas de la clase vieja y la nueva de cada tipo cuyo conteo cambia
+        dirty = self._tree_dirty
+        for etype, c in (("adsorption", a), ("desorption", d), ("migration", m), ("incorporation", d)):
+            old = self._bins[etype].cls.item(idx)
+            if old != c:
+                k = self._leaf_start[etype]
+                if old >= 0: dirty.add(k + old)
+                if c >= 0: dirty.add(k + c)
+
+    def _sync_tree(self):
+        # Propensión de cada hoja = conteo de la clase * tasa. Tras un evento
+        # incremental solo se recalculan las hojas marcadas por
+        # _reclassify_site, más la fila de adsorción si cambió N_bulk.
+        rt = self.rates
+        if rt.revision != self._tree_rates[0]:
+            self._tree_full = True
+        elif rt.ads_revision != self._tree_rates[1]:
+            k = self._leaf_start["adsorption"]
+            self._tree_dirty.update(range(k, k + len(rt.ads)))
+        self._tree_rates = (rt.revision, rt.ads_revision)
+        leaves = self._tree.leaves
+        if self._tree_full:
+            vals = self._leaf_vals
+            k = 0
+            for etype in EVENT_TYPES:
+                counts = self._bins[etype].counts
+                np.multiply(counts, self._rate_rows[etype], out=vals[k:k + len(counts)])
+                k += len(counts)
+            vals[~np.isfinite(vals)] = 0.0
+            for i in np.flatnonzero(vals != leaves):
+                self._tree.update(int(i), vals[i])
+            self._tree_full = False
+        else:
+            for i in sorted(self._tree_dirty):
+                etype, c = self._leaf_types[i]
+                v = self._bins[etype].counts[c] * self._rate_rows[etype][c]
+                if not np.isfinite(v):
+                    v = 0.0
+                if v != leaves[i]:
+                    self._tree.update(i, v)
+        self._tree_dirty.clear()
+
+    def _choose_from_tree(self) -> Tuple[str, int]:
+        u = self.uniforms.random() * self._tree.total
+        return self._leaf_types[self._tree.find(u)]
+
+    # ---- Validación amortizada (debug) ----
+    def _maybe_validate(self):
+        mode = self.validate
+        if mode == "every":
+            due = True
+        elif mode == "interval":
+            due = self.n_events % self.validate_every == 0
+        elif mode == "random":
+            due = self.n_events == 0 or self._val_rng.random() < self.validate_prob
+        else:  # "local": auditoría completa solo al inicio; luego _validate_local
+            due = self.n_events == 0
+        if due:
+            self._validate_integrity("Pre-Step")
+
+    def _validate_local(self, moved: Tuple[int, ...]):
+        """
+        Compara las clases de los sitios tocados por el último evento (y sus
+        vecinos) con un cálculo desde cero mediante los métodos escalares de
+        LatticeSOS, y verifica tasas y completitud de bins a partir de los
+        conteos. Coste independiente del tamaño de la red (salvo un conteo
+        vectorizado de sitios ocupados).
+        """
+        self.n_validations += 1
+        for etype, row in self._rate_rows.items():
+            if not np.all(np.isfinite(row)) or np.any(row < 0):
+                raise AssertionError(f"⛔ [RATE ERROR] Tasa inválida en la tabla de {etype}: {row}")
+
+        n_sites = self.lat.n_sites
+        occupied = int(np.count_nonzero(self.lat.heights))
+        if self._bins["adsorption"].counts.sum() != n_sites:
+            raise AssertionError(f"⛔ [BIN ERROR] Bins de adsorción incompletos (t={self.t:.4e})")
+        for etype in ("desorption", "incorporation"):
+            if self._bins[etype].counts.sum() != occupied:
+                raise AssertionError(f"⛔ [BIN ERROR] Pérdida de sitios en {etype}: "
+                                     f"{self._bins[etype].counts.sum()} != {occupied} ocupados")
+
+        touched = set(moved)
+        for i in moved:
+            touched.update(self.lat.nbr_list[i])
+        for idx in touched:
+            site = self.lat.site(idx)
+            occ = self.lat.get_height(site) > 0
+            d = min(self.lat.desorption_bonds(site), 4) if occ else -1
+            want = {
+                "adsorption": min(self.lat.adsorption_bonds(site), 4),
+                "desorption": d,
+                "incorporation": d,
+                "migration": min(d, 3) if occ and self.lat.migration_targets(site) else -1,
+            }
+            for etype, c in want.items():
+                bins = self._bins[etype]
+                got = int(bins.cls[idx])
+                if got != c or (c >= 0 and idx not in bins.sets[c]):
+                    raise AssertionError(f"⛔ [BIN ERROR] Sitio {site} en {etype}: clase {got}, "
+                                         f"esperada {c} (t={self.t:.4e})")
+
     # Método interno de validación exhaustiva
     def _validate_integrity(self, context_msg: str = ""):
         # [PRUEBA 3]: Sanidad de Tasas (Rate Sanity) exhaustive check
@@ -163,7 +434,7 @@ class KMC_BKL:
 
         if not np.isfinite(self.r_a(0)): raise AssertionError(f"Tasa r_a infinita o NaN. {context_msg}")
         
-        total_pixels = self.lat.size[0] * self.lat.size[1]
+        total_pixels = self.lat.n_sites
         
         A_bins = self._classify_adsorption_sites()
         count_A = sum(len(lst) for lst in A_bins.values())
@@ -172,36 +443,59 @@ class KMC_BKL:
         # [PRUEBA 2]: Consistencia de Contenedores (Binning Integrity)
         D_bins = self._classify_desorption_sites()
         count_D = sum(len(lst) for lst in D_bins.values())
-        empty_sites = len([s for s in self.lat.get_sites() if self.lat.get_height(s) == 0])
+        empty_sites = int(np.count_nonzero(self.lat.heights == 0))
         
         if count_D + empty_sites != total_pixels:
              raise AssertionError(f"⛔ [BIN ERROR] Pérdida de sitios en desorción: {count_D} ocupados + {empty_sites} vacíos != {total_pixels}")
 
+        # Bins incrementales frente a la clasificación completa
+        if self.incremental and not self._bins_dirty:
+            for etype, cls in self._class_arrays().items():
+                bad = np.flatnonzero(self._bins[etype].cls != cls.ravel())
+                if bad.size:
+                    raise AssertionError(f"⛔ [BIN ERROR] Bins de {etype} desincronizados en "
+                                         f"{bad.size} sitios, p. ej. {self.lat.site(int(bad[0]))}")
+
+        self.n_validations += 1
+
         print(f"✅ [DEBUG {self.t:.4f}] Integridad verificada: {context_msg}")
 
     # ---- One kMC step (con defensas) ----
-    def step(self) -> bool:
+    # Con t_max, un evento que caería después de t_max no se ejecuta: el reloj
+    # pasa a t_max (exacto por la falta de memoria del proceso de Poisson).
+    def step(self, t_max: Optional[float] = None) -> bool:
+        prof = self.prof
         if self.debug:
-            self._validate_integrity("Pre-Step")
+            self._maybe_validate()
+        if prof is not None: prof.start()
 
-        A_bins = self._classify_adsorption_sites()
-        D_bins = self._classify_desorption_sites()
-        M_bins = self._classify_migration_sites()
-        I_bins = self._classify_incorporation_sites()
-
-        Wa = sum(len(A_bins[i]) * self.r_a(i) for i in A_bins)
-        Wd = sum(len(D_bins[i]) * self.r_d(i) for i in D_bins if len(D_bins[i]) > 0)
-        Wm = sum(len(M_bins[i]) * self.r_m(i) for i in M_bins if len(M_bins[i]) > 0)
-        Wi = sum(len(I_bins[i]) * self.r_inc(i) for i in I_bins if len(I_bins[i]) > 0)
+        rt = self.rates.refresh(self.p, self.N_bulk, self.N0)
+        if prof is not None: prof.lap("rates")
+        if not self.incremental or self._bins_dirty:
+            self._rebuild_bins()
+            if prof is not None: prof.lap("classify")
+            if self.debug and self.validate == "local" and not self.incremental:
+                # Sin bins incrementales se comprueba la vecindad del evento
+                # anterior tras la reconstrucción
+                self._validate_local(self._last_moved)
+        # Totales a partir de los conteos por clase: coste O(nº de clases)
+        Wa = float(np.dot(self._bins["adsorption"].counts, rt.ads))
+        Wd = float(np.dot(self._bins["desorption"].counts, rt.des))
+        Wm = float(np.dot(self._bins["migration"].counts, rt.mig))
+        Wi = float(np.dot(self._bins["incorporation"].counts, rt.inc))
 
         # Sanitizar pesos
         Wa = _finite_or_zero(Wa); Wd = _finite_or_zero(Wd)
         Wm = _finite_or_zero(Wm); Wi = _finite_or_zero(Wi)
         Wtot = Wa + Wd + Wm + Wi
+        if self._tree is not None:
+            self._sync_tree()
+            Wtot = self._tree.total
+        if prof is not None: prof.lap("totals")
         
         # [PRUEBA 5]: Balance Detallado Instantáneo (Thermo Check)
         if self.debug:
-            S = self.supersaturation
+            S = rt.S
             if abs(S) < 0.05 and (Wa > 1e-20 or Wd > 1e-20):
                 log_wa = np.log10(Wa + 1e-100)
                 log_wd = np.log10(Wd + 1e-100)
@@ -217,103 +511,483 @@ class KMC_BKL:
             return False
 
         # tiempo
-        z = max(self.rng.random(), 1e-15)
+        z = max(self.uniforms.random(), 1e-15)
         dt = -np.log(z) / Wtot * self.time_scale
         if not np.isfinite(dt) or dt < 0:
             return False
+        if t_max is not None and self.t + dt > t_max:
+            self.t = t_max
+            return True
+        if self._obs_trace is not None:
+            self._sample_observables(self.t + dt)
         self.t += dt
+        if prof is not None: prof.lap("time")
 
         # evento
-        etype = self._choose_event_type(Wa, Wd, Wm, Wi)
-        
-        if self.debug and etype == "none":
-             print("⚠️ Evento seleccionado 'none' a pesar de Wtot > 0")
+        if self._tree is not None:
+            etype, i_sel = self._choose_from_tree()
+            bins = self._bins[etype]
+            if bins.counts[i_sel] == 0: return True
+            if prof is not None: prof.lap("choose_class")
+        else:
+            etype = self._choose_event_type(Wa, Wd, Wm, Wi)
 
-        if etype == "none":
-            return False
+            if self.debug and etype == "none":
+                 print("⚠️ Evento seleccionado 'none' a pesar de Wtot > 0")
+
+            if etype == "none":
+                return False
+            if prof is not None: prof.lap("choose_type")
 
-        site = None
+            bins = self._bins[etype]
+            i_sel = self._choose_class(bins.counts, self._rate_rows[etype])
+            if i_sel < 0: return True
+            if prof is not None: prof.lap("choose_class")
+        idx = self._choose_site_uniform(bins.sets[i_sel])
+        site = self.lat.site(idx)
+        if prof is not None: prof.lap("choose_site")
+
+        # Sitios cuya altura cambió (se reclasifican con sus vecinos)
+        moved: Tuple[int, ...] = ()
+        obs = self.obs
         if etype == "adsorption":
-            weights = {i: (len(A_bins[i]) * self.r_a(i)) for i in A_bins if len(A_bins[i]) > 0}
-            if not weights: return True
-            i_sel = self._choose_class(weights); site = self._choose_site_uniform(A_bins[i_sel])
+            if obs is not None: obs.apply(idx, 1)
             self.lat.inc_height(site, 1)
             self.N_bulk = max(0, self.N_bulk - 1)
+            moved = (idx,)
 
         elif etype == "desorption":
-            weights = {i: (len(D_bins[i]) * self.r_d(i)) for i in D_bins if len(D_bins[i]) > 0}
-            if not weights: return True
-            i_sel = self._choose_class(weights); site = self._choose_site_uniform(D_bins[i_sel])
             if self.lat.get_height(site) > 0:
+                if obs is not None: obs.apply(idx, -1)
                 self.lat.dec_height(site, 1)
                 self.N_bulk += 1
+                moved = (idx,)
 
         elif etype == "migration":
-            weights = {i: (len(M_bins[i]) * self.r_m(i)) for i in M_bins if len(M_bins[i]) > 0}
-            if not weights: return True
-            i_sel = self._choose_class(weights); site = self._choose_site_uniform(M_bins[i_sel])
             targets = self.lat.migration_targets(site)
             if targets:
-                tgt = targets[self.rng.integers(0, len(targets))]
+                tgt = targets[self.uniforms.integers(len(targets))]
                 if self.lat.get_height(site) > 0 and self.lat.get_height(tgt) <= self.lat.get_height(site):
+                    tgt_idx = self.lat.index(tgt)
+                    if obs is not None: obs.apply(idx, -1)
                     self.lat.dec_height(site, 1)
+                    if obs is not None: obs.apply(tgt_idx, 1)
                     self.lat.inc_height(tgt, 1)
+                    moved = (idx, tgt_idx)
 
         elif etype == "incorporation":
-            weights = {i: (len(I_bins[i]) * self.r_inc(i)) for i in I_bins if len(I_bins[i]) > 0}
-            if not weights: return True
-            i_sel = self._choose_class(weights); site = self._choose_site_uniform(I_bins[i_sel])
             self.N_inc += 1
+        if prof is not None: prof.lap("lattice_update")
+
+        if self.incremental and moved:
+            self._reclassify_around(*moved)
+            if prof is not None: prof.lap("reclassify")
+        if self.debug and self.validate == "local":
+            if self.incremental:
+                self._validate_local(moved)
+            else:
+                self._last_moved = moved
 
         self.counts[etype] += 1
-        self.history.append((self.t, etype, site))
+        self.n_events += 1
+        self.history.append(self.t, EVENT_CODES[etype], idx, moved[1] if len(moved) == 2 else -1)
+        if self.accel is not None:
+            self.accel.observe(etype, moved)
+        if self.traj is not None:
+            self.traj.maybe_keyframe(self)
+        if prof is not None:
+            prof.lap("history")
+            prof.tick()
         return True
 
+    # ---- Observables de superficie ----
+    def enable_observables(self) -> SurfaceObservables:
+        if self.obs is None:
+            self.obs = SurfaceObservables(self.lat)
+        return self.obs
+
+    def _sample_observables(self, t_next: float):
+        # Registra el estado actual (previo al evento en t_next) en todos los
+        # puntos de la malla anteriores a t_next
+        tr = self._obs_trace
+        while not tr.done and tr.t[tr.k] < t_next:
+            tr.record(self.obs, self.conversion_percent, self._bins["desorption"].counts)
+
+    # ---- Trayectoria reconstruible ----
+    def enable_trajectory(self, keyframe_every: int = 10_000) -> Trajectory:
+        """
+        Guarda un keyframe de alturas cada keyframe_every eventos; junto con la
+        historia completa permite reconstruir el estado a cualquier t con
+        self.traj.state_at(t) sin repetir la simulación (ver Trajectory).
+        """
+        if self.history.mode != "full":
+            raise ValueError("La trayectoria requiere history_mode='full'")
+        if self.traj is None:
+            self.traj = Trajectory(self.lat.shape, keyframe_every, history=self.history)
+            self.traj.add_keyframe(self.t, len(self.history), self.lat.heights, self.N_bulk, self.N_inc)
+        return self.traj
+
+    # ---- Aceleración de la migración ----
+    def enable_migration_scaling(self, **kwargs) -> MigrationScaler:
+        """
+        Activa el escalado adaptativo de las tasas de migración cuando la
+        dinámica queda atrapada en ciclos de migración (ver MigrationScaler).
+        Las trayectorias dejan de ser las del modelo exacto: run_report
+        recoge la escala usada y la separación de tasas que controla el error.
+        """
+        if self.accel is None:
+            self.accel = MigrationScaler(self, **kwargs)
+        return self.accel
+
+    def disable_migration_scaling(self):
+        if self.accel is not None:
+            self.rates.set_migration_scale(1.0)
+            self.accel = None
+
+    # ---- Perfilado ----
+    def enable_profiling(self, window: int = 10_000) -> StepProfiler:
+        """Activa el perfilado por fases e instrumenta las primitivas de la red."""
+        if self.prof is None:
+            self.prof = StepProfiler(window)
+            self.prof.instrument(self.lat)
+        return self.prof
+
+    def disable_profiling(self):
+        if self.prof is not None:
+            self.prof.uninstrument(self.lat)
+            self.prof = None
+
     # ---- Run con cierre limpio y snapshots garantizados ----
-    def run(self, t_end: float, snapshot_times: Optional[List[float]] = None, max_events: int = 2_000_000):
-        snaps: List[Tuple[float, np.ndarray, float]] = []
+    # Si se pasa snapshot_store, los snapshots se escriben en disco (memmap) y
+    # run() devuelve el propio almacén en lugar de una lista en memoria.
+    # Con checkpoint_path se guarda un checkpoint cada checkpoint_every eventos
+    # y/o cada checkpoint_seconds segundos de reloj, y otro al terminar.
+    # backend="numba" ejecuta el bucle de eventos compilado de jit.py (mismo
+    # formato de snapshots, trayectorias estadísticamente equivalentes); sin
+    # Numba, o con debug/checkpoints/perfilado, se usa el motor de Python.
+    # leap_eps activa el τ-leaping aproximado de TauLeaper (muchos eventos por
+    # salto, cambio relativo de tasas acotado por leap_eps); los parámetros y
+    # magnitudes de error usados quedan en run_report["leap"].
+    # stop_criteria (ver stopping.py) se evalúan cada stop_check_every eventos;
+    # el primero que dispara termina la corrida y da run_report["stop_reason"].
+    # on_snapshot/on_progress/on_stop reciben los RunRecord de iter_run()
+    # (on_progress cada progress_every eventos; en debug, print_progress cada 100).
+    def run(self, t_end: float, snapshot_times: Optional[List[float]] = None, max_events: int = 2_000_000,
+            snapshot_store: Optional[SnapshotStore] = None, checkpoint_path: Optional[str] = None,
+            checkpoint_every: Optional[int] = None, checkpoint_seconds: Optional[float] = None,
+            backend: str = "python", observable_times: Optional[np.ndarray] = None,
+            leap_eps: Optional[float] = None, leap_min_events: int = 20,
+            stop_criteria: Optional[List[StoppingCriterion]] = None, stop_check_every: int = 100,
+            on_snapshot: Optional[Callable[[RunRecord], None]] = None,
+            on_progress: Optional[Callable[[RunRecord], None]] = None,
+            progress_every: Optional[int] = None,
+            on_stop: Optional[Callable[[RunRecord], None]] = None):
+        if backend not in ("python", "numba"):
+            raise ValueError("backend debe ser 'python' o 'numba'")
+        if backend == "numba":
+            if not HAS_NUMBA:
+                warnings.warn("Numba no está instalado; run(backend='numba') usa el motor de Python.",
+                              RuntimeWarning, stacklevel=2)
+            elif (self.debug or checkpoint_path is not None or self.prof is not None
+                  or observable_times is not None or leap_eps is not None or self.accel is not None
+                  or self.traj is not None or stop_criteria or on_snapshot is not None
+                  or on_progress is not None or on_stop is not None):
+                warnings.warn("debug, checkpoints, perfilado, observables, τ-leaping, escalado "
+                              "de migración, trayectorias, criterios de parada y callbacks "
+                              "requieren el motor de Python.",
+                              RuntimeWarning, stacklevel=2)
+            else:
+                return run_kernel(self, t_end, snapshot_times, max_events, snapshot_store)
+        if on_progress is None and self.debug:
+            on_progress = print_progress
+            progress_every = progress_every or 100
+        if on_progress is None:
+            progress_every = None
+        elif progress_every is None:
+            progress_every = 1000
 
-        if snapshot_times is None:
-            times_list: List[float] = []
-        elif isinstance(snapshot_times, np.ndarray):
-            times_list = snapshot_times.tolist()
+        if snapshot_store is not None:
+            snapshot_store.reserve(len(snapshot_store) + len(self._pending_times(snapshot_times)),
+                                   self.lat.shape)
+            snaps = snapshot_store
         else:
-            times_list = list(snapshot_times)
-        times_list = sorted(times_list)
+            snaps = []
+
+        for rec in self.iter_run(t_end, snapshot_times, max_events=max_events,
+                                 checkpoint_path=checkpoint_path, checkpoint_every=checkpoint_every,
+                                 checkpoint_seconds=checkpoint_seconds,
+                                 observable_times=observable_times, leap_eps=leap_eps,
+                                 leap_min_events=leap_min_events, stop_criteria=stop_criteria,
+                                 stop_check_every=stop_check_every, progress_every=progress_every):
+            if rec.kind == "snapshot":
+                self._record_snapshot(snaps, rec.t)
+                if on_snapshot is not None:
+                    on_snapshot(rec)
+            elif rec.kind == "progress":
+                on_progress(rec)
+            elif on_stop is not None:
+                on_stop(rec)
+
+        if snapshot_store is not None:
+            snapshot_store.flush()
+        return snaps
+
+    def _pending_times(self, times) -> List[float]:
+        if times is None:
+            return []
+        times_list = sorted(times.tolist() if isinstance(times, np.ndarray) else list(times))
+        if self.n_events > 0:
+            # Continuación (p. ej. tras load_checkpoint): los instantes ya
+            # superados se registraron en el tramo anterior
+            times_list = [ts for ts in times_list if ts > self.t]
+        return times_list
+
+    # ---- Run en streaming ----
+    def iter_run(self, t_end: float, snapshot_times: Optional[List[float]] = None,
+                 grid_times: Optional[np.ndarray] = None, max_events: int = 2_000_000,
+                 checkpoint_path: Optional[str] = None, checkpoint_every: Optional[int] = None,
+                 checkpoint_seconds: Optional[float] = None,
+                 observable_times: Optional[np.ndarray] = None,
+                 leap_eps: Optional[float] = None, leap_min_events: int = 20,
+                 stop_criteria: Optional[List[StoppingCriterion]] = None, stop_check_every: int = 100,
+                 progress_every: Optional[int] = None,
+                 with_heights: bool = True) -> Iterator[RunRecord]:
+        """
+        Versión generadora de run() (motor de Python): emite RunRecord a medida
+        que avanza, sin acumular snapshots en memoria:
+        - "snapshot" en cada instante de snapshot_times (semántica de run());
+        - "grid" en cada instante de grid_times con el estado vigente
+          (semántica de conversion_on_grid);
+        - "progress" cada progress_every eventos (None = nunca);
+        - "stop" al terminar, ya con run_report completo.
+        with_heights=False omite la vista de alturas en los registros.
+        Cerrar el generador antes del registro "stop" (close() o break) también
+        cierra la corrida: run_report con stop_reason "closed", observable_trace
+        con los puntos alcanzados y checkpoint final; el motor queda listo para
+        otra corrida.
+        """
+        times_list = self._pending_times(snapshot_times)
+        grid = [] if grid_times is None else np.asarray(grid_times, dtype=np.float64).tolist()
+        k_grid = 0
+
+        # Observables sobre una malla densa: se muestrean dentro de step()
+        if observable_times is not None:
+            self.enable_observables()
+            self._obs_trace = ObservableTrace(observable_times, N_CLASSES["desorption"])
+
+        leaper = TauLeaper(self, leap_eps, leap_min_events) if leap_eps is not None else None
+        stopper = StoppingRules(stop_criteria) if stop_criteria else None
+        if stopper is not None:
+            stopper.reset(self)
+        last_stop_check = 0
+        last_progress = 0
+
+        def record(kind: str, t: float, stop_reason: Optional[str] = None) -> RunRecord:
+            return RunRecord(kind, t, self.conversion_percent, self.N_bulk, n_events,
+                             dict(self.counts), self.lat.heights if with_heights else None,
+                             stop_reason)
 
         next_snap_idx = 0
         n_events = 0
+        wall0 = time.perf_counter()
+        last_ckpt_events, last_ckpt_wall = 0, wall0
+        last_wall_check = 0
+        stop_reason = "t_end"
         try:
-            while self.t < t_end and n_events < max_events:
-                if self.debug and n_events % 100 == 0:
-                     print(f"⏱️ t={self.t:.4e} | Events={n_events} | Conv={self.conversion_percent:.1f}%")
-
-                progressed = self.step()
-                if not progressed:
-                    if self.debug: print("⏹️ Simulación detenida: step() devolvió False.")
-                    break
-                n_events += 1
-                
-                while next_snap_idx < len(times_list) and self.t >= times_list[next_snap_idx]:
-                    snaps.append((times_list[next_snap_idx],
-                                  self.lat.heights.copy(),
-                                  self.conversion_percent))
-                    next_snap_idx += 1
-        except Exception as e:
-            print(f"⚠️ Simulación detenida por excepción: {e}. Guardando estado parcial...")
+            try:
+                while self.t < t_end and n_events < max_events:
+                    if k_grid < len(grid):
+                        c_prev, nb_prev, n_prev = self.conversion_percent, self.N_bulk, n_events
+
+                    if leaper is None:
+                        progressed = self.step()
+                        n_new = 1
+                    else:
+                        # El salto no cruza el siguiente snapshot ni t_end
+                        t_stop = times_list[next_snap_idx] if next_snap_idx < len(times_list) else t_end
+                        n_before = self.n_events
+                        progressed = leaper.leap(min(t_stop, t_end))
+                        n_new = self.n_events - n_before
+                    if not progressed:
+                        if self.debug: print("⏹️ Simulación detenida: step() devolvió False.")
+                        stop_reason = "stalled"
+                        break
+                    n_events += n_new
+
+                    while k_grid < len(grid) and grid[k_grid] < self.t:
+                        yield RunRecord("grid", grid[k_grid], c_prev, nb_prev, n_prev)
+                        k_grid += 1
+
+                    while next_snap_idx < len(times_list) and self.t >= times_list[next_snap_idx]:
+                        yield record("snapshot", times_list[next_snap_idx])
+                        next_snap_idx += 1
+
+                    if progress_every is not None and n_events - last_progress >= progress_every:
+                        last_progress = n_events
+                        yield record("progress", self.t)
 
+                    if stopper is not None and n_events - last_stop_check >= stop_check_every:
+                        last_stop_check = n_events
+                        fired = stopper.check(self)
+                        if fired is not None:
+                            if self.debug: print(f"⏹️ Criterio de parada: {fired}")
+                            stop_reason = fired
+                            break
+
+                    if checkpoint_path is not None:
+                        due = checkpoint_every is not None and n_events - last_ckpt_events >= checkpoint_every
+                        # Reloj cada 256 eventos o más (un salto de τ-leaping avanza muchos)
+                        if not due and checkpoint_seconds is not None and n_events - last_wall_check >= 256:
+                            last_wall_check = n_events
+                            due = time.perf_counter() - last_ckpt_wall >= checkpoint_seconds
+                        if due:
+                            self.save_checkpoint(checkpoint_path)
+                            last_ckpt_events, last_ckpt_wall = n_events, time.perf_counter()
+            except Exception as e:
+                print(f"⚠️ Simulación detenida por excepción: {e}. Guardando estado parcial...")
+                stop_reason = f"exception: {e}"
+            if stop_reason == "t_end" and self.t < t_end:
+                stop_reason = "max_events"
+        except GeneratorExit:
+            # El consumidor cerró el generador antes del registro "stop"
+            stop_reason = "closed"
+            raise
+        except BaseException:
+            stop_reason = "interrupted"
+            raise
+        finally:
+            # Cierre de la corrida también si se abandona a mitad: sin esto
+            # _obs_trace quedaría activo y lo muestrearía el siguiente step()
+            if self._obs_trace is not None:
+                # Tras un salto de τ-leaping (o sin bins incrementales) los conteos
+                # por clase están obsoletos y obs ya refleja el estado final
+                if self._bins_dirty or not self.incremental:
+                    self._rebuild_bins()
+                if stop_reason == "stalled":
+                    # Estado absorbente: se mantiene hasta el final de la malla
+                    self._sample_observables(np.inf)
+                else:
+                    # Puntos que coinciden con el instante final (fin de un salto)
+                    self._sample_observables(np.nextafter(self.t, np.inf))
+                self.observable_trace = self._obs_trace.as_dict()
+                self._obs_trace = None
+            wall = time.perf_counter() - wall0
+            self.run_report = {
+                "n_events": n_events, "wall_seconds": wall,
+                "events_per_s": n_events / wall if wall > 0 else 0.0,
+                "t": self.t, "stop_reason": stop_reason,
+                "counts": dict(self.counts), "backend": "python",
+            }
+            if self.prof is not None:
+                self.run_report["profile"] = self.prof.report()
+            if leaper is not None:
+                self.run_report["leap"] = leaper.report()
+            if self.accel is not None:
+                self.run_report["acceleration"] = self.accel.report()
+            if stopper is not None:
+                self.run_report["stopping"] = stopper.report()
+
+            if checkpoint_path is not None:
+                self.save_checkpoint(checkpoint_path)
+
+        if stop_reason == "stalled":
+            # Estado absorbente: vale para el resto de la malla
+            for tg in grid[k_grid:]:
+                yield RunRecord("grid", tg, self.conversion_percent, self.N_bulk, n_events)
         while next_snap_idx < len(times_list):
-            snaps.append((times_list[next_snap_idx],
-                          self.lat.heights.copy(),
-                          self.conversion_percent))
+            yield record("snapshot", times_list[next_snap_idx])
             next_snap_idx += 1
+        yield record("stop", self.t, stop_reason)
 
-        return snaps
+    def _record_snapshot(self, snaps, t_snap: float):
+        if isinstance(snaps, list):
+            snaps.append((t_snap, self.lat.heights.copy(), self.conversion_percent))
+        else:
+            # SnapshotStore: se copia directamente al archivo mapeado
+            snaps.append(t_snap, self.lat.heights, self.conversion_percent)
+
+    # ---- Checkpoints ----
+    # Un checkpoint es un .npz con el estado completo del motor: alturas,
+    # reservas, tiempo, contadores, historia, bins incrementales (con el orden
+    # de sus miembros, del que depende la elección de sitio) y el estado del
+    # generador aleatorio. Reanudar desde él reproduce bit a bit la corrida
+    # sin interrumpir. Las rutas relativas se resuelven bajo results/.
+    def save_checkpoint(self, path: str) -> str:
+        path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        hist = self.history.get_state()
+        meta = {
+            "size": np.atleast_1d(self.lat.size).tolist(), "lat_debug": bool(self.lat.debug),
+            "params": asdict(self.p), "N0": self.N0, "N_bulk": self.N_bulk, "N_inc": self.N_inc,
+            "t": self.t, "n_events": self.n_events, "time_scale": self.time_scale,
+            "counts": self.counts, "debug": self.debug, "incremental": self.incremental,
+            "solver": self.solver, "bins_dirty": self._bins_dirty,
+            "validate": [self.validate, self.validate_every, self.validate_prob],
+            "history": {"mode": self.history.mode, "capacity": len(self.history._t),
+                        "every": self.history.every, "n": hist["n"], "n_total": hist["n_total"]},
+            "rng": self.rng.bit_generator.state, "rng_buffer": self.uniforms.get_state(),
+            "acceleration": self.accel.get_state() if self.accel is not None else None,
+        }
+        arrays = {"heights": self.lat.heights, "hist_t": hist["t"],
+                  "hist_code": hist["code"], "hist_site": hist["site"], "hist_target": hist["target"]}
+        for etype in EVENT_TYPES:
+            for name, arr in self._bins[etype].get_state().items():
+                arrays[f"bins_{etype}_{name}"] = arr
+        if self._tree is not None:
+            arrays["tree"] = self._tree.tree
+        if self.accel is not None:
+            arrays["accel_partner"] = self.accel.partner
+        # Escritura atómica: un corte a mitad de escritura deja el checkpoint anterior
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load_checkpoint(cls, path: str, params: Optional[KMCParams] = None) -> "KMC_BKL":
+        """Reconstruye el motor (y su LatticeSOS) desde save_checkpoint()."""
+        path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            size = meta["size"][0] if len(meta["size"]) == 1 else meta["size"]
+            lat = LatticeSOS(size=size, debug=meta["lat_debug"])
+            lat.heights[...] = data["heights"]
+            if params is None:
+                params = KMCParams(**meta["params"])
+            h = meta["history"]
+            kmc = cls(lat, params, N_bulk0=meta["N0"], rng_seed=0, time_scale=meta["time_scale"],
+                      debug=meta["debug"], incremental=meta["incremental"], solver=meta["solver"],
+                      validate=meta["validate"][0], validate_every=meta["validate"][1],
+                      validate_prob=meta["validate"][2],
+                      history_mode=h["mode"], history_capacity=h["capacity"], history_every=h["every"])
+            kmc.N_bulk, kmc.N_inc, kmc.t = meta["N_bulk"], meta["N_inc"], meta["t"]
+            kmc.n_events = meta["n_events"]
+            kmc.counts = dict(meta["counts"])
+            kmc.history.set_state(data["hist_t"], data["hist_code"], data["hist_site"],
+                                  h["n"], h["n_total"],
+                                  data["hist_target"] if "hist_target" in data.files else None)
+            for etype in EVENT_TYPES:
+                kmc._bins[etype].set_state(data[f"bins_{etype}_cls"], data[f"bins_{etype}_counts"],
+                                           data[f"bins_{etype}_members"])
+            kmc._bins_dirty = meta["bins_dirty"]
+            if kmc._tree is not None:
+                kmc._tree.tree[:] = data["tree"]
+            state = meta["rng"]
+            kmc.rng = np.random.Generator(getattr(np.random, state["bit_generator"])())
+            kmc.rng.bit_generator.state = state
+            # Checkpoints sin "rng_buffer" son de antes del búfer: sin bloque
+            kmc.uniforms = UniformBuffer(kmc.rng)
+            kmc.uniforms.set_state(meta.get("rng_buffer", {"block": 0, "pos": 0, "fill_state": None}))
+            if meta.get("acceleration") is not None:
+                kmc.enable_migration_scaling(**meta["acceleration"]["config"]).set_state(
+                    meta["acceleration"], data["accel_partner"])
+        return kmc
 
     def plot_crystal_3d(self, mode: str = "surface", elev: int = 45, azim: int = 45,
                         cmap: str = "viridis", save_path: Optional[str] = None,
-                        title: Optional[str] = None, snapshots: Optional[List[Tuple[float, np.ndarray, float]]] = None,
-                        t_snapshot: Optional[float] = None):
+                        title: Optional[str] = None, snapshots=None,
+                        t_snapshot: Optional[float] = None, spatial_step: int = 1,
+                        height_step: int = 1, max_faces: Optional[int] = 200_000):
         """
         Visualiza el cristal 3D (superficie continua o cubos discretos).
 
@@ -323,8 +997,10 @@ class KMC_BKL:
             cmap: colormap para modo superficie
             save_path: ruta opcional para guardar la imagen
             title: título opcional
-            snapshots: lista opcional de snapshots generada por run()
+            snapshots: lista de snapshots generada por run() o un SnapshotStore
             t_snapshot: tiempo específico para extraer el cristal más cercano
+            spatial_step, height_step, max_faces: reducción de resolución y
+                presupuesto de caras del modo voxel (ver render.render_voxels)
         """
         import matplotlib.pyplot as plt
         from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
@@ -334,14 +1010,15 @@ class KMC_BKL:
         # Seleccionar snapshot a graficar
         # ============================
         if snapshots is not None and len(snapshots) > 0 and t_snapshot is not None:
-            # Busca el snapshot con tiempo más cercano
-            times = [abs(t - t_snapshot) for t, _, _ in snapshots]
-            idx = int(np.argmin(times))
+            # Busca el snapshot con tiempo más cercano (búsqueda binaria)
+            idx = nearest_snapshot(snapshots, t_snapshot)
             t_sel, heights, conv = snapshots[idx]
+            heights = np.asarray(heights)
             print(f"🧩 Snapshot seleccionado: t={t_sel:.3f} (conv={conv:.2f}%)")
         elif snapshots is not None and len(snapshots) > 0:
             # Toma el último snapshot si no se especifica tiempo
             t_sel, heights, conv = snapshots[-1]
+            heights = np.asarray(heights)
             print(f"🧩 Usando último snapshot disponible: t={t_sel:.3f} (conv={conv:.2f}%)")
         else:
             # Usa el estado actual del cristal
@@ -365,20 +1042,13 @@ class KMC_BKL:
             fig.colorbar(surf, shrink=0.5, aspect=10, label="Altura")
 
         elif mode == "voxel":
-            max_h = int(np.max(heights))
-            voxels = np.zeros((Lx, Ly, max_h + 1), dtype=bool)
-            for i in range(Lx):
-                for j in range(Ly):
-                    h = int(heights[i, j])
-                    if h > 0:
-                        voxels[i, j, :h] = True
-
+            # Solo las caras expuestas, en una única Poly3DCollection
             # Colores tipo cristal (azul translúcido)
-            colors = np.zeros(voxels.shape + (4,), dtype=float)
-            colors[..., :] = [0.2, 0.3, 0.8, 0.9]  # RGBA (azul translúcido)
-
-            ax.voxels(voxels, facecolors=colors, edgecolor='black', linewidth=0.2)
-            ax.set_box_aspect((Lx, Ly, max_h))  # asegura proporción cúbica
+            _, step = render_voxels(ax, heights, color=(0.2, 0.3, 0.8, 0.9),
+                                    spatial_step=spatial_step, height_step=height_step,
+                                    max_faces=max_faces, edgecolor='black', linewidth=0.2)
+            if step != spatial_step:
+                print(f"🔎 Presupuesto de caras: spatial_step={step}")
 
         else:
             raise ValueError("mode debe ser 'surface' o 'voxel'")
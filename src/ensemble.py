@@ -0,0 +1,154 @@
+import os
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Union
+from params import KMCParams
+from lattice import LatticeSOS
+from bkl import KMC_BKL
+
+# Ajustes del motor por defecto para réplicas: bins incrementales y sin historia
+DEFAULT_ENGINE_KWARGS = {"incremental": True, "history_mode": "off"}
+
+# =============================
+# Curvas de conversión sobre una malla de tiempos
+# =============================
+def conversion_on_grid(kmc: KMC_BKL, t_grid: np.ndarray, max_events: int = 2_000_000,
+                       abort: Optional[Callable[[int, float], bool]] = None) -> Dict[str, np.ndarray]:
+    """
+    Avanza kmc hasta t_grid[-1] y devuelve la conversión y N_bulk en cada
+    instante de la malla. El valor en t_grid[k] es el estado vigente en ese
+    instante, es decir, el anterior al primer evento con t > t_grid[k].
+
+    abort(k, conv) se llama al completar cada punto k; si devuelve True la
+    simulación se corta y el resto de la malla queda en NaN.
+    Si se agota max_events, los puntos no alcanzados también quedan en NaN;
+    si el sistema se detiene (W = 0) el estado final se extiende a toda la malla.
+    """
+    t_grid = np.asarray(t_grid, dtype=np.float64)
+    conv = np.full(len(t_grid), np.nan)
+    n_bulk = np.full(len(t_grid), np.nan)
+    k = 0
+    n0 = kmc.n_events
+    aborted = False
+    if len(t_grid):
+        # Registros "grid" de iter_run(): estado vigente en cada instante
+        stream = kmc.iter_run(t_grid[-1], grid_times=t_grid, max_events=max_events, with_heights=False)
+        for rec in stream:
+            if rec.kind != "grid":
+                continue
+            conv[k], n_bulk[k] = rec.conversion, rec.N_bulk
+            k += 1
+            if abort is not None and abort(k - 1, rec.conversion):
+                aborted = True
+                stream.close()
+                break
+    return {"conversion": conv, "N_bulk": n_bulk,
+            "n_events": kmc.n_events - n0, "t_final": kmc.t, "aborted": aborted}
+
+
+# =============================
+# Ensembles de réplicas
+# =============================
+@dataclass
+class EnsembleResult:
+    """
+    Resultados de run_ensemble. Los arreglos tienen forma (P, R, T):
+    conjunto de parámetros, réplica y punto de la malla de tiempos.
+    """
+    t_grid: np.ndarray
+    conversion: np.ndarray
+    N_bulk: np.ndarray
+    n_events: np.ndarray   # (P, R)
+    t_final: np.ndarray    # (P, R)
+    params: List[KMCParams]
+    master_seed: int
+
+    def mean(self) -> np.ndarray:
+        return np.nanmean(self.conversion, axis=1)
+
+    def std(self) -> np.ndarray:
+        return np.nanstd(self.conversion, axis=1)
+
+
+def param_grid(base: KMCParams, **axes: Sequence[float]) -> List[KMCParams]:
+    """Producto cartesiano de valores sobre base, p. ej. param_grid(p, delta=[0.5, 0.7])."""
+    names = list(axes)
+    return [replace(base, **dict(zip(names, values)))
+            for values in itertools.product(*(axes[n] for n in names))]
+
+
+def _run_replica(task: dict) -> dict:
+    # Debe ser una función de módulo para poder enviarse a otro proceso
+    lat_seed, kmc_seed = task["seed"].spawn(2)
+    lat = LatticeSOS(size=task["size"], seed=lat_seed)
+    lat.initialize(task["init_mode"], max_roughness=task["max_roughness"])
+    kmc = KMC_BKL(lat, task["params"], N_bulk0=task["N_bulk0"], rng_seed=kmc_seed,
+                  time_scale=task["time_scale"], n_seeds=task["n_seeds"], **task["engine_kwargs"])
+    return conversion_on_grid(kmc, task["t_grid"], task["max_events"])
+
+
+def run_ensemble(params: Union[KMCParams, Sequence[KMCParams]], size, N_bulk0: int,
+                 t_grid: Sequence[float], n_replicas: int, master_seed: int = 0,
+                 n_workers: Optional[int] = None, init_mode: str = "flat",
+                 max_roughness: int = 1, n_seeds: int = 0, time_scale: float = 1.0,
+                 max_events: int = 2_000_000, engine_kwargs: Optional[dict] = None,
+                 on_result: Optional[Callable[[int, int, dict], None]] = None) -> EnsembleResult:
+    """
+    Ejecuta n_replicas réplicas independientes de KMC_BKL para cada conjunto de
+    parámetros y recoge la conversión sobre t_grid.
+
+    Cada réplica recibe su propio flujo aleatorio (red y motor) derivado con
+    SeedSequence(master_seed).spawn, de modo que el resultado es idéntico bit a
+    bit para una master_seed dada, sin importar el número de procesos ni el
+    orden en que terminen. n_workers=None usa todos los núcleos; n_workers=1
+    ejecuta en el proceso actual.
+
+    on_result(ip, r, salida) se llama con la salida de conversion_on_grid de
+    cada réplica en cuanto está disponible (en el orden de las tareas), para
+    agregar resultados sin esperar al ensemble completo.
+    """
+    params_list = list(params) if isinstance(params, (list, tuple)) else [params]
+    t_grid = np.asarray(t_grid, dtype=np.float64)
+    kwargs = dict(DEFAULT_ENGINE_KWARGS)
+    kwargs.update(engine_kwargs or {})
+    seeds = np.random.SeedSequence(master_seed).spawn(len(params_list) * n_replicas)
+
+    tasks = []
+    for ip, p in enumerate(params_list):
+        for r in range(n_replicas):
+            tasks.append({
+                "params": p, "size": size, "N_bulk0": N_bulk0, "t_grid": t_grid,
+                "seed": seeds[ip * n_replicas + r], "init_mode": init_mode,
+                "max_roughness": max_roughness, "n_seeds": n_seeds,
+                "time_scale": time_scale, "max_events": max_events, "engine_kwargs": kwargs,
+            })
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    outputs = []
+
+    def collect(results):
+        for i, out in enumerate(results):
+            outputs.append(out)
+            if on_result is not None:
+                on_result(i // n_replicas, i % n_replicas, out)
+
+    if n_workers <= 1:
+        collect(map(_run_replica, tasks))
+    else:
+        chunk = max(1, len(tasks) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            collect(pool.map(_run_replica, tasks, chunksize=chunk))
+
+    P, R, T = len(params_list), n_replicas, len(t_grid)
+    result = EnsembleResult(
+        t_grid=t_grid,
+        conversion=np.array([o["conversion"] for o in outputs]).reshape(P, R, T),
+        N_bulk=np.array([o["N_bulk"] for o in outputs]).reshape(P, R, T),
+        n_events=np.array([o["n_events"] for o in outputs]).reshape(P, R),
+        t_final=np.array([o["t_final"] for o in outputs]).reshape(P, R),
+        params=params_list, master_seed=master_seed,
+    )
+    return result
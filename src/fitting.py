@@ -0,0 +1,231 @@
+import os
+import json
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, astuple, asdict, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+from params import KMCParams
+from lattice import LatticeSOS
+from bkl import KMC_BKL
+from ensemble import conversion_on_grid, DEFAULT_ENGINE_KWARGS
+from snapshots import RESULTS_DIR
+
+# =============================
+# Datos experimentales
+# =============================
+def load_conversion_data(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lee un archivo de texto con columnas: tiempo (h), conversión (%) y error (%),
+    como notebooks/beta-hematina.txt.
+    """
+    data = np.loadtxt(path, ndmin=2)
+    return data[:, 0].astype(np.float64), data[:, 1].astype(np.float64), data[:, 2].astype(np.float64)
+
+
+@dataclass
+class FitEvaluation:
+    """Resultado de simular un candidato y compararlo con los datos."""
+    key: str
+    params: KMCParams
+    chi2: float              # suma de residuos normalizados al cuadrado (inf si rejected o exhausted)
+    rejected: bool           # la media de las réplicas salió de las bandas de error y se abortó
+    n_points: int            # puntos experimentales alcanzados
+    n_events: int
+    curve: List[float] = field(default_factory=list)
+    exhausted: bool = False  # se agotó max_events antes del último punto (no alcanzado, no rechazado)
+
+
+def _evaluate_task(task: dict) -> dict:
+    # Función de módulo: se envía a los procesos del pool
+    t_grid, conv_exp, tol = task["t_grid"], task["conv_exp"], task["tol"]
+    curves, n_events = [], 0
+    rejected = exhausted = False
+    # Suma de las réplicas completas: el rechazo se decide sobre la media
+    # acumulada, la misma curva que entra en el chi2
+    acc = np.zeros(len(t_grid))
+    for r, seed in enumerate(np.random.SeedSequence(task["entropy"]).spawn(task["n_replicas"])):
+        lat_seed, kmc_seed = seed.spawn(2)
+        lat = LatticeSOS(size=task["size"], seed=lat_seed)
+        lat.initialize(task["init_mode"], max_roughness=task["max_roughness"])
+        kmc = KMC_BKL(lat, task["params"], N_bulk0=task["N_bulk0"], rng_seed=kmc_seed,
+                      n_seeds=task["n_seeds"], **DEFAULT_ENGINE_KWARGS)
+        # Rechazo temprano: en cuanto la media de las réplicas 0..r cae fuera
+        # de la banda de un punto se corta
+        out = conversion_on_grid(kmc, t_grid, task["max_events"],
+                                 abort=lambda k, c: abs((acc[k] + c) / (r + 1) - conv_exp[k]) > tol[k])
+        n_events += out["n_events"]
+        curves.append(out["conversion"])
+        if out["aborted"]:
+            rejected = True
+            break
+        if np.isnan(out["conversion"]).any():
+            exhausted = True
+            break
+        acc += out["conversion"]
+    curve = np.mean(curves, axis=0)
+    reached = int(np.count_nonzero(~np.isnan(curve)))
+    resid = (curve[:reached] - conv_exp[:reached]) / task["sigma"][:reached]
+    chi2 = float(np.inf) if rejected or exhausted else float(np.sum(resid ** 2))
+    return {"chi2": chi2, "rejected": rejected, "exhausted": exhausted, "n_points": reached,
+            "n_events": n_events, "curve": curve.tolist()}
+
+
+# =============================
+# Ajuste de parámetros contra curvas de conversión
+# =============================
+class ConversionFitter:
+    """
+    Compara curvas de conversión de KMC_BKL con datos experimentales
+    (tiempo en horas, conversión y error en %).
+
+    - El tiempo simulado se relaciona con el experimental mediante
+      sim_time_per_hour (en el notebook, t_sim / 2.5 = horas).
+    - Cada candidato se evalúa con n_replicas réplicas; la simulación se aborta
+      (rejected) en cuanto la media de las réplicas ya simuladas sale de la
+      banda |sim - exp| <= band * err + tol_abs. Si se agota max_events antes
+      del último punto, el candidato queda como no alcanzado (exhausted).
+      En ambos casos chi2 = inf.
+    - Las evaluaciones se memorizan por el hash de los parámetros y de la
+      configuración del ajuste (en memoria y, si se indica, en un JSON bajo
+      results/). La semilla de cada candidato se deriva del hash de sus
+      parámetros y de la configuración de simulación, así que el resultado no
+      depende del orden de evaluación y todos los datos usan los mismos números
+      aleatorios para un mismo candidato.
+    - evaluate() reparte los candidatos en un ProcessPoolExecutor.
+    """
+    def __init__(self, data, base_params: KMCParams, size, N_bulk0: int,
+                 sim_time_per_hour: float = 2.5, n_replicas: int = 1,
+                 n_seeds: int = 0, init_mode: str = "flat", max_roughness: int = 1,
+                 band: float = 3.0, tol_abs: float = 2.0, err_floor: float = 0.5,
+                 max_events: int = 2_000_000, master_seed: int = 0,
+                 n_workers: Optional[int] = None, cache_path: Optional[str] = None):
+        if isinstance(data, str):
+            data = load_conversion_data(data)
+        self.t_exp, self.conv_exp, self.err_exp = (np.asarray(a, dtype=np.float64) for a in data)
+        self.base = base_params
+        self.settings = {
+            "size": list(np.atleast_1d(size).tolist()), "N_bulk0": int(N_bulk0),
+            "sim_time_per_hour": float(sim_time_per_hour), "n_replicas": int(n_replicas),
+            "n_seeds": int(n_seeds), "init_mode": init_mode, "max_roughness": int(max_roughness),
+            "band": float(band), "tol_abs": float(tol_abs), "err_floor": float(err_floor),
+            "max_events": int(max_events), "master_seed": int(master_seed),
+        }
+        self.n_workers = n_workers
+        self.sigma = np.maximum(self.err_exp, err_floor)
+        self.tol = band * self.sigma + tol_abs
+        self.cache: Dict[str, FitEvaluation] = {}
+        self.cache_path = None
+        if cache_path is not None:
+            self.cache_path = cache_path if os.path.isabs(cache_path) else os.path.join(RESULTS_DIR, cache_path)
+            self._load_cache()
+
+    # ---- Memoización ----
+    _SCORE_SETTINGS = ("band", "tol_abs", "err_floor")
+
+    def sim_key(self, params: KMCParams) -> str:
+        """Hash de los parámetros y de la configuración de simulación (no de los datos)."""
+        sim = {k: v for k, v in self.settings.items() if k not in self._SCORE_SETTINGS}
+        payload = json.dumps([list(astuple(params)), sim, self.t_exp.tolist()])
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def key(self, params: KMCParams) -> str:
+        payload = json.dumps([self.sim_key(params), self.settings,
+                              self.conv_exp.tolist(), self.err_exp.tolist()])
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path) as f:
+            for key, rec in json.load(f).items():
+                rec["params"] = replace(self.base, **rec["params"])
+                rec["chi2"] = np.inf if rec["chi2"] is None else rec["chi2"]
+                rec["curve"] = [np.nan if c is None else c for c in rec["curve"]]
+                self.cache[key] = FitEvaluation(key=key, **rec)
+
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        out = {}
+        for key, ev in self.cache.items():
+            rec = asdict(ev)
+            rec.pop("key")
+            rec["chi2"] = ev.chi2 if np.isfinite(ev.chi2) else None
+            rec["curve"] = [c if np.isfinite(c) else None for c in ev.curve]
+            out[key] = rec
+        with open(self.cache_path, "w") as f:
+            json.dump(out, f)
+
+    # ---- Evaluación ----
+    def _task(self, params: KMCParams) -> dict:
+        s = self.settings
+        return {
+            "params": params, "size": s["size"] if len(s["size"]) > 1 else s["size"][0],
+            "N_bulk0": s["N_bulk0"], "n_replicas": s["n_replicas"], "n_seeds": s["n_seeds"],
+            "init_mode": s["init_mode"], "max_roughness": s["max_roughness"],
+            "max_events": s["max_events"], "entropy": [s["master_seed"], int(self.sim_key(params)[:16], 16)],
+            "t_grid": self.t_exp * s["sim_time_per_hour"], "conv_exp": self.conv_exp,
+            "sigma": self.sigma, "tol": self.tol,
+        }
+
+    def evaluate(self, candidates: Sequence[KMCParams]) -> List[FitEvaluation]:
+        """Evalúa candidatos en paralelo; los ya evaluados salen de la caché."""
+        keys = [self.key(p) for p in candidates]
+        pending = {}
+        for p, k in zip(candidates, keys):
+            if k not in self.cache and k not in pending:
+                pending[k] = p
+        if pending:
+            tasks = [self._task(p) for p in pending.values()]
+            n_workers = self.n_workers if self.n_workers is not None else (os.cpu_count() or 1)
+            if n_workers <= 1 or len(tasks) == 1:
+                outputs = [_evaluate_task(t) for t in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                    outputs = list(pool.map(_evaluate_task, tasks))
+            for (k, p), out in zip(pending.items(), outputs):
+                self.cache[k] = FitEvaluation(key=k, params=p, **out)
+            self._save_cache()
+        return [self.cache[k] for k in keys]
+
+    def score(self, params: KMCParams) -> FitEvaluation:
+        return self.evaluate([params])[0]
+
+    # ---- Búsqueda ----
+    def fit(self, bounds: Dict[str, Tuple[float, float]], n_samples: int = 32,
+            n_rounds: int = 4, shrink: float = 0.5, seed: int = 0,
+            log_scale: Sequence[str] = ()) -> Tuple[FitEvaluation, List[FitEvaluation]]:
+        """
+        Búsqueda aleatoria por rondas: la primera muestrea uniformemente en
+        bounds (en escala logarítmica para los nombres de log_scale) y cada
+        ronda siguiente muestrea alrededor del mejor candidato en una caja
+        reducida por shrink. Devuelve el mejor resultado y todas las evaluaciones.
+        """
+        rng = np.random.default_rng(seed)
+        names = list(bounds)
+        lo = np.array([bounds[n][0] for n in names], dtype=np.float64)
+        hi = np.array([bounds[n][1] for n in names], dtype=np.float64)
+        is_log = np.array([n in log_scale for n in names])
+        lo_t = np.where(is_log, np.log(lo, where=is_log, out=lo.copy()), lo)
+        hi_t = np.where(is_log, np.log(hi, where=is_log, out=hi.copy()), hi)
+
+        center, width = (lo_t + hi_t) / 2, hi_t - lo_t
+        history: List[FitEvaluation] = []
+        best: Optional[FitEvaluation] = None
+        for _ in range(max(1, n_rounds)):
+            x = center + (rng.random((n_samples, len(names))) - 0.5) * width
+            x = np.clip(x, lo_t, hi_t)
+            x = np.where(is_log, np.exp(x), x)
+            cands = [replace(self.base, **{n: float(v) for n, v in zip(names, row)}) for row in x]
+            evals = self.evaluate(cands)
+            history.extend(evals)
+            for ev in evals:
+                if (best is None or ev.chi2 < best.chi2
+                        or (not np.isfinite(best.chi2) and ev.n_points > best.n_points)):
+                    best = ev
+            b = np.array([getattr(best.params, n) for n in names], dtype=np.float64)
+            center = np.where(is_log, np.log(np.where(is_log, b, 1.0)), b)
+            width = width * shrink
+        return best, history
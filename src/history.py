@@ -0,0 +1,185 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from rates import EVENT_TYPES
+
+# Código uint8 de cada tipo de evento (posición en EVENT_TYPES)
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# =============================
+# Registro columnar de eventos
+# =============================
+class EventLog:
+    """
+    Historia de eventos en columnas preasignadas:
+    - times (float64), codes (uint8, índice en EVENT_TYPES), sites (int32,
+      índice plano i * Ly + j; -1 si no hay sitio), targets (int32, destino
+      de una migración efectiva; -1 en los demás eventos). Con sites y
+      targets la historia basta para reproducir las alturas (ver trajectory.py).
+
+    Modos:
+    - "full": guarda todos los eventos; la capacidad se duplica al llenarse.
+    - "ring": guarda solo los últimos `capacity` eventos (memoria acotada).
+    - "decimate": guarda uno de cada `every` eventos.
+    - "off": no guarda nada (solo cuenta).
+
+    Para compatibilidad, indexar o iterar devuelve tuplas (t, evento, (i, j)),
+    el mismo formato que la antigua lista `history`.
+    """
+    MODES = ("full", "ring", "decimate", "off")
+
+    def __init__(self, shape: Tuple[int, int], mode: str = "full",
+                 capacity: int = 4096, every: int = 1):
+        if mode not in self.MODES:
+            raise ValueError(f"mode debe ser uno de {self.MODES}")
+        if mode == "ring" and capacity <= 0:
+            raise ValueError("capacity debe ser positiva en modo 'ring'")
+        self.mode = mode
+        self.Ly = int(shape[1])
+        self.every = max(1, int(every))
+        cap = 0 if mode == "off" else max(1, int(capacity))
+        self._t = np.empty(cap, dtype=np.float64)
+        self._code = np.empty(cap, dtype=np.uint8)
+        self._site = np.empty(cap, dtype=np.int32)
+        self._target = np.empty(cap, dtype=np.int32)
+        self._n = 0          # eventos guardados (en "ring", posición de escritura total)
+        self.n_total = 0     # eventos ofrecidos a append()
+
+    # ---- Escritura ----
+    def append(self, t: float, code: int, site: int = -1, target: int = -1):
+        n_seen = self.n_total
+        self.n_total += 1
+        mode = self.mode
+        if mode == "off":
+            return
+        if mode == "decimate" and n_seen % self.every:
+            return
+        cap = len(self._t)
+        if mode == "ring":
+            k = self._n % cap
+        else:
+            k = self._n
+            if k == cap:
+                self._grow()
+        self._t[k] = t
+        self._code[k] = code
+        self._site[k] = site
+        self._target[k] = target
+        self._n += 1
+
+    def extend(self, times: np.ndarray, codes: np.ndarray, sites: np.ndarray,
+               targets: Optional[np.ndarray] = None):
+        """append() para un bloque de eventos (mismo resultado, sin bucle en Python)."""
+        m = len(times)
+        if targets is None:
+            targets = np.full(m, -1, dtype=np.int32)
+        n_seen = self.n_total
+        self.n_total += m
+        mode = self.mode
+        if mode == "off" or m == 0:
+            return
+        if mode == "decimate":
+            # Eventos cuyo índice global es múltiplo de `every`
+            keep = np.flatnonzero((n_seen + np.arange(m)) % self.every == 0)
+            times, codes, sites, targets = times[keep], codes[keep], sites[keep], targets[keep]
+            m = len(keep)
+        cap = len(self._t)
+        if mode == "ring":
+            if m > cap:
+                times, codes, sites, targets = times[-cap:], codes[-cap:], sites[-cap:], targets[-cap:]
+                self._n += m - cap
+                m = cap
+            k = (self._n + np.arange(m)) % cap
+        else:
+            while self._n + m > len(self._t):
+                self._grow()
+            k = slice(self._n, self._n + m)
+        self._t[k] = times
+        self._code[k] = codes
+        self._site[k] = sites
+        self._target[k] = targets
+        self._n += m
+
+    def _grow(self):
+        cap = 2 * len(self._t)
+        for name in ("_t", "_code", "_site", "_target"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def clear(self):
+        self._n = 0
+        self.n_total = 0
+
+    # ---- Checkpoints ----
+    def get_state(self) -> dict:
+        """Columnas en uso y contadores (en "ring", el búfer completo)."""
+        k = len(self._t) if self.mode == "ring" else self._n
+        return {"t": self._t[:k].copy(), "code": self._code[:k].copy(),
+                "site": self._site[:k].copy(), "target": self._target[:k].copy(),
+                "n": self._n, "n_total": self.n_total}
+
+    def set_state(self, t: np.ndarray, code: np.ndarray, site: np.ndarray,
+                  n: int, n_total: int, target: Optional[np.ndarray] = None):
+        if self.mode != "ring" and len(t) > len(self._t):
+            for name in ("_t", "_code", "_site", "_target"):
+                setattr(self, name, np.empty(len(t), dtype=getattr(self, name).dtype))
+        k = len(t)
+        self._t[:k], self._code[:k], self._site[:k] = t, code, site
+        self._target[:k] = -1 if target is None else target
+        self._n = int(n)
+        self.n_total = int(n_total)
+
+    # ---- Lectura ----
+    def __len__(self) -> int:
+        if self.mode == "ring":
+            return min(self._n, len(self._t))
+        return self._n
+
+    def _order(self):
+        # Índices físicos en orden cronológico
+        n = len(self)
+        if self.mode == "ring" and self._n > len(self._t):
+            start = self._n % len(self._t)
+            return np.r_[start:len(self._t), 0:start]
+        return slice(0, n)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._t[self._order()]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._code[self._order()]
+
+    @property
+    def sites(self) -> np.ndarray:
+        return self._site[self._order()]
+
+    @property
+    def targets(self) -> np.ndarray:
+        return self._target[self._order()]
+
+    def _tuple(self, k: int) -> Tuple[float, str, Optional[Tuple[int, int]]]:
+        site = int(self._site[k])
+        return (float(self._t[k]), EVENT_TYPES[self._code[k]],
+                divmod(site, self.Ly) if site >= 0 else None)
+
+    def __getitem__(self, k):
+        n = len(self)
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(n))]
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("EventLog index out of range")
+        if self.mode == "ring" and self._n > len(self._t):
+            k = (self._n + k) % len(self._t)
+        return self._tuple(k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def to_list(self) -> List[Tuple[float, str, Optional[Tuple[int, int]]]]:
+        return list(self)
@@ -0,0 +1,389 @@
+import math
+import time
+import numpy as np
+from typing import List, Optional
+from rates import EVENT_TYPES, N_CLASSES
+from utils import _MAX_EXP_ARG
+
+# Numba es opcional: sin él, el núcleo se ejecuta como Python puro (útil para
+# pruebas) y KMC_BKL.run(backend="numba") vuelve al motor de Python.
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+# Códigos de salida del núcleo
+STATUS_OK = 0         # se alcanzó t_stop, t_end o el máximo de eventos
+STATUS_NEED_RNG = 1   # quedan menos de UNIFORMS_PER_EVENT números aleatorios
+STATUS_STALLED = 2    # W = 0: no hay eventos posibles
+
+# Cada evento consume a lo sumo 4 uniformes: dt, (tipo, clase), sitio y destino
+UNIFORMS_PER_EVENT = 4
+_N_A, _N_D, _N_M = N_CLASSES["adsorption"], N_CLASSES["desorption"], N_CLASSES["migration"]
+
+# =============================
+# Núcleo del bucle de eventos (compilable con Numba)
+# =============================
+# Todo el estado vive en arreglos planos: alturas int32 (N,), tabla de vecinos
+# (N, 4) y, por familia de bins (adsorción, desorción/incorporación,
+# migración), la clase de cada sitio, su posición y los miembros de cada clase
+# (n_clases, N) con su conteo. La física es la de KMC_BKL.step(); las
+# trayectorias son estadísticamente equivalentes, no idénticas.
+
+def _assign(cls, pos, mem, cnt, idx, c):
+    old = cls[idx]
+    if old == c:
+        return
+    if old >= 0:
+        # Extracción por intercambio con el último miembro
+        k = pos[idx]
+        last = cnt[old] - 1
+        moved = mem[old, last]
+        mem[old, k] = moved
+        pos[moved] = k
+        cnt[old] = last
+    if c >= 0:
+        mem[c, cnt[c]] = idx
+        pos[idx] = cnt[c]
+        cnt[c] += 1
+    else:
+        pos[idx] = -1
+    cls[idx] = c
+
+
+def _reclassify(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d, cnt_d,
+                cls_m, pos_m, mem_m, cnt_m):
+    hi = h[idx]
+    a = 0
+    d = 0
+    mobile = False
+    for k in range(4):
+        hk = h[nbr[idx, k]]
+        if hk > hi:
+            a += 1
+        if hk >= hi:
+            d += 1
+        if hk <= hi:
+            mobile = True
+    _assign(cls_a, pos_a, mem_a, cnt_a, idx, a)
+    if hi <= 0:
+        _assign(cls_d, pos_d, mem_d, cnt_d, idx, -1)
+        _assign(cls_m, pos_m, mem_m, cnt_m, idx, -1)
+    else:
+        _assign(cls_d, pos_d, mem_d, cnt_d, idx, d)
+        _assign(cls_m, pos_m, mem_m, cnt_m, idx, min(d, 3) if mobile else -1)
+
+
+def _reclassify_around(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d, cnt_d,
+                       cls_m, pos_m, mem_m, cnt_m):
+    _reclassify(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d, cnt_d,
+                cls_m, pos_m, mem_m, cnt_m)
+    for k in range(4):
+        _reclassify(h, nbr, nbr[idx, k], cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d, cnt_d,
+                    cls_m, pos_m, mem_m, cnt_m)
+
+
+def _adsorption_rates(out, N_bulk, N0, K0, delta, V, C_eq, S_floor, S_ceil):
+    # Igual que rates.rate_adsorption para las 5 clases
+    if N_bulk <= 0:
+        for i in range(out.shape[0]):
+            out[i] = 0.0
+        return
+    C = N_bulk / max(V, 1e-12)
+    S = math.log((C + 1e-15) / max(C_eq, 1e-15))
+    S = min(max(S, S_floor), S_ceil)
+    eps = 1e-12 if S >= 0 else -1e-12
+    denom = max(S, eps)
+    for i in range(out.shape[0]):
+        arg = min(max(S + i * (delta / denom), -_MAX_EXP_ARG), _MAX_EXP_ARG)
+        r = K0 * math.exp(arg) * (N_bulk / max(N0, 1))
+        out[i] = r if math.isfinite(r) else 0.0
+
+
+def event_loop(h, nbr, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d, cnt_d,
+               cls_m, pos_m, mem_m, cnt_m, r_des, r_mig, r_inc, ads_params,
+               fstate, istate, counts, u, ev_t, ev_code, ev_site, ev_tgt, t_stop, t_end, max_n):
+    """
+    Ejecuta eventos hasta que t >= t_stop (tras el evento que cruza), t >= t_end,
+    max_n eventos o falta de uniformes. Modifica todos los arreglos en sitio.
+
+    fstate = [t, time_scale]; istate = [N_bulk, N_inc, N0, k_u] (k_u: próximo
+    uniforme de u); ads_params = [K0, delta, V, C_eq, S_floor, S_ceil].
+    Devuelve (estado, eventos ejecutados); el evento j queda en ev_*[j]
+    (ev_tgt: destino de la migración, -1 si no hubo).
+    """
+    t = fstate[0]
+    time_scale = fstate[1]
+    N_bulk = istate[0]
+    N_inc = istate[1]
+    N0 = istate[2]
+    k_u = istate[3]
+    r_ads = np.zeros(_N_A)
+    _adsorption_rates(r_ads, N_bulk, N0, ads_params[0], ads_params[1], ads_params[2],
+                      ads_params[3], ads_params[4], ads_params[5])
+    n = 0
+    status = STATUS_OK
+    while n < max_n and t < t_end:
+        if k_u + UNIFORMS_PER_EVENT > u.shape[0]:
+            status = STATUS_NEED_RNG
+            break
+        Wa = 0.0
+        for i in range(_N_A):
+            Wa += cnt_a[i] * r_ads[i]
+        Wd = 0.0
+        Wi = 0.0
+        for i in range(_N_D):
+            Wd += cnt_d[i] * r_des[i]
+            Wi += cnt_d[i] * r_inc[i]
+        Wm = 0.0
+        for i in range(_N_M):
+            Wm += cnt_m[i] * r_mig[i]
+        Wtot = Wa + Wd + Wm + Wi
+        if not (Wtot > 0.0) or not math.isfinite(Wtot):
+            status = STATUS_STALLED
+            break
+
+        z = max(u[k_u], 1e-15)
+        t += -math.log(z) / Wtot * time_scale
+
+        # Tipo y clase en un solo barrido sobre las 19 propensiones
+        r = u[k_u + 1] * Wtot
+        etype = -1
+        c = -1
+        for i in range(_N_A):
+            w = cnt_a[i] * r_ads[i]
+            if r < w:
+                etype = 0
+                c = i
+                break
+            r -= w
+        if etype < 0:
+            for i in range(_N_D):
+                w = cnt_d[i] * r_des[i]
+                if r < w:
+                    etype = 1
+                    c = i
+                    break
+                r -= w
+        if etype < 0:
+            for i in range(_N_M):
+                w = cnt_m[i] * r_mig[i]
+                if r < w:
+                    etype = 2
+                    c = i
+                    break
+                r -= w
+        if etype < 0:
+            for i in range(_N_D):
+                w = cnt_d[i] * r_inc[i]
+                if r < w:
+                    etype = 3
+                    c = i
+                    break
+                r -= w
+        if etype < 0:
+            # Redondeo: última clase con propensión positiva
+            for i in range(_N_D - 1, -1, -1):
+                if cnt_d[i] * r_inc[i] > 0:
+                    etype = 3
+                    c = i
+                    break
+        if etype < 0:
+            status = STATUS_STALLED
+            break
+
+        if etype == 0:
+            n_c = cnt_a[c]
+        elif etype == 2:
+            n_c = cnt_m[c]
+        else:
+            n_c = cnt_d[c]
+        j = min(int(u[k_u + 2] * n_c), n_c - 1)
+        if etype == 0:
+            idx = mem_a[c, j]
+        elif etype == 2:
+            idx = mem_m[c, j]
+        else:
+            idx = mem_d[c, j]
+
+        moved_to = -1
+        if etype == 0:
+            h[idx] += 1
+            N_bulk = max(0, N_bulk - 1)
+            _reclassify_around(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d, mem_d,
+                               cnt_d, cls_m, pos_m, mem_m, cnt_m)
+            _adsorption_rates(r_ads, N_bulk, N0, ads_params[0], ads_params[1], ads_params[2],
+                              ads_params[3], ads_params[4], ads_params[5])
+        elif etype == 1:
+            if h[idx] > 0:
+                h[idx] -= 1
+                N_bulk += 1
+                _reclassify_around(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d,
+                                   mem_d, cnt_d, cls_m, pos_m, mem_m, cnt_m)
+                _adsorption_rates(r_ads, N_bulk, N0, ads_params[0], ads_params[1],
+                                  ads_params[2], ads_params[3], ads_params[4], ads_params[5])
+        elif etype == 2:
+            hs = h[idx]
+            n_t = 0
+            for k in range(4):
+                if h[nbr[idx, k]] <= hs:
+                    n_t += 1
+            if n_t > 0 and hs > 0:
+                pick = min(int(u[k_u + 3] * n_t), n_t - 1)
+                tgt = -1
+                for k in range(4):
+                    if h[nbr[idx, k]] <= hs:
+                        if pick == 0:
+                            tgt = nbr[idx, k]
+                            break
+                        pick -= 1
+                h[idx] -= 1
+                h[tgt] += 1
+                moved_to = tgt
+                _reclassify_around(h, nbr, idx, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d,
+                                   mem_d, cnt_d, cls_m, pos_m, mem_m, cnt_m)
+                _reclassify_around(h, nbr, tgt, cls_a, pos_a, mem_a, cnt_a, cls_d, pos_d,
+                                   mem_d, cnt_d, cls_m, pos_m, mem_m, cnt_m)
+        else:
+            N_inc += 1
+
+        k_u += UNIFORMS_PER_EVENT
+        counts[etype] += 1
+        ev_t[n] = t
+        ev_code[n] = etype
+        ev_site[n] = idx
+        ev_tgt[n] = moved_to
+        n += 1
+        if t >= t_stop:
+            break
+
+    fstate[0] = t
+    istate[0] = N_bulk
+    istate[1] = N_inc
+    istate[3] = k_u
+    return status, n
+
+
+if HAS_NUMBA:
+    _assign = numba.njit(cache=True)(_assign)
+    _reclassify = numba.njit(cache=True)(_reclassify)
+    _reclassify_around = numba.njit(cache=True)(_reclassify_around)
+    _adsorption_rates = numba.njit(cache=True)(_adsorption_rates)
+    event_loop_jit = numba.njit(cache=True)(event_loop)
+else:
+    event_loop_jit = None
+
+
+# =============================
+# Conductor: prepara el estado de KMC_BKL y recoge snapshots
+# =============================
+def _family_arrays(cls: np.ndarray, n_classes: int):
+    N = cls.size
+    cls = np.ascontiguousarray(cls.ravel(), dtype=np.int8)
+    pos = np.full(N, -1, dtype=np.int32)
+    mem = np.zeros((n_classes, N), dtype=np.int32)
+    cnt = np.zeros(n_classes, dtype=np.int64)
+    for c in range(n_classes):
+        members = np.flatnonzero(cls == c).astype(np.int32)
+        mem[c, :len(members)] = members
+        pos[members] = np.arange(len(members), dtype=np.int32)
+        cnt[c] = len(members)
+    return cls, pos, mem, cnt
+
+
+def run_kernel(kmc, t_end: float, snapshot_times: Optional[List[float]] = None,
+               max_events: int = 2_000_000, snapshot_store=None, compiled: bool = True,
+               chunk: int = 65_536):
+    """
+    Equivalente a KMC_BKL.run() con el bucle de eventos en event_loop.
+    compiled=False ejecuta el mismo núcleo como Python puro.
+
+    Las alturas se modifican en sitio (lat.heights); N_bulk, N_inc, t,
+    contadores e historia se sincronizan con kmc tras cada bloque, y los bins
+    de kmc quedan marcados como obsoletos. Los números aleatorios salen de
+    kmc.rng por bloques.
+    """
+    kernel = event_loop_jit if compiled else event_loop
+    if kernel is None:
+        raise RuntimeError("Numba no está instalado")
+
+    times_list = sorted(np.asarray(snapshot_times, dtype=np.float64).tolist()) if snapshot_times is not None else []
+    if kmc.n_events > 0:
+        times_list = [ts for ts in times_list if ts > kmc.t]
+    if snapshot_store is not None:
+        snapshot_store.reserve(len(snapshot_store) + len(times_list), kmc.lat.shape)
+        snaps = snapshot_store
+    else:
+        snaps = []
+
+    lat = kmc.lat
+    h = lat.flat
+    nbr = np.ascontiguousarray(lat.nbr, dtype=np.int32)
+    classes = kmc._class_arrays()
+    fam_a = _family_arrays(classes["adsorption"], _N_A)
+    fam_d = _family_arrays(classes["desorption"], _N_D)
+    fam_m = _family_arrays(classes["migration"], _N_M)
+    rt = kmc.rates.refresh(kmc.p, kmc.N_bulk, kmc.N0)
+    r_des, r_mig, r_inc = rt.des.copy(), rt.mig.copy(), rt.inc.copy()
+    p = kmc.p
+    ads_params = np.array([p.K0_plus, p.delta, p.V, p.C_eq, p.S_floor, p.S_ceil], dtype=np.float64)
+
+    fstate = np.array([kmc.t, kmc.time_scale], dtype=np.float64)
+    istate = np.array([kmc.N_bulk, kmc.N_inc, kmc.N0, 0], dtype=np.int64)
+    counts = np.zeros(len(EVENT_TYPES), dtype=np.int64)
+    u = np.empty(0, dtype=np.float64)
+    ev_t = np.empty(chunk, dtype=np.float64)
+    ev_code = np.empty(chunk, dtype=np.uint8)
+    ev_site = np.empty(chunk, dtype=np.int32)
+    ev_tgt = np.empty(chunk, dtype=np.int32)
+
+    next_snap_idx = 0
+    n_events = 0
+    wall0 = time.perf_counter()
+    stop_reason = "t_end"
+    while n_events < max_events and fstate[0] < t_end:
+        t_stop = min(times_list[next_snap_idx], t_end) if next_snap_idx < len(times_list) else t_end
+        max_n = min(chunk, max_events - n_events)
+        status, n = kernel(h, nbr, *fam_a, *fam_d, *fam_m, r_des, r_mig, r_inc, ads_params,
+                           fstate, istate, counts, u, ev_t, ev_code, ev_site, ev_tgt,
+                           t_stop, t_end, max_n)
+        n_events += n
+        kmc.history.extend(ev_t[:n], ev_code[:n], ev_site[:n], ev_tgt[:n])
+        kmc.t, kmc.N_bulk, kmc.N_inc = float(fstate[0]), int(istate[0]), int(istate[1])
+
+        while next_snap_idx < len(times_list) and kmc.t >= times_list[next_snap_idx]:
+            kmc._record_snapshot(snaps, times_list[next_snap_idx])
+            next_snap_idx += 1
+
+        if status == STATUS_NEED_RNG:
+            # Se conservan los uniformes sin usar y se añade un bloque nuevo
+            u = np.concatenate([u[istate[3]:], kmc.rng.random(UNIFORMS_PER_EVENT * chunk)])
+            istate[3] = 0
+        elif status == STATUS_STALLED:
+            stop_reason = "stalled"
+            break
+    if stop_reason == "t_end" and kmc.t < t_end:
+        stop_reason = "max_events"
+
+    for e, c in zip(EVENT_TYPES, counts.tolist()):
+        kmc.counts[e] += c
+    kmc.n_events += n_events
+    kmc.refresh_bins()
+
+    wall = time.perf_counter() - wall0
+    kmc.run_report = {
+        "n_events": n_events, "wall_seconds": wall,
+        "events_per_s": n_events / wall if wall > 0 else 0.0,
+        "t": kmc.t, "stop_reason": stop_reason, "counts": dict(kmc.counts),
+        "backend": "numba" if compiled else "kernel-python",
+    }
+
+    while next_snap_idx < len(times_list):
+        kmc._record_snapshot(snaps, times_list[next_snap_idx])
+        next_snap_idx += 1
+    if snapshot_store is not None:
+        snapshot_store.flush()
+    return snaps
+
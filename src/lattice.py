@@ -1,26 +1,71 @@
 import numpy as np
 from typing import List, Tuple, Optional
 
+# Desplazamientos periódicos en el mismo orden que neighbors4:
+# (i-1, j), (i+1, j), (i, j-1), (i, j+1). Operan sobre los dos últimos ejes,
+# de modo que también sirven para pilas de redes (R, Lx, Ly).
+def neighbor_heights(h: np.ndarray) -> np.ndarray:
+    """Alturas de los 4 vecinos de cada sitio, forma (4,) + h.shape."""
+    return np.stack([
+        np.roll(h, 1, axis=-2), np.roll(h, -1, axis=-2),
+        np.roll(h, 1, axis=-1), np.roll(h, -1, axis=-1)
+    ])
+
+def adsorption_bonds_array(h: np.ndarray) -> np.ndarray:
+    nh = neighbor_heights(h)
+    return np.count_nonzero(nh >= (h + 1), axis=0).astype(np.int8)
+
+def desorption_bonds_array(h: np.ndarray) -> np.ndarray:
+    nh = neighbor_heights(h)
+    bonds = np.count_nonzero(nh >= h, axis=0).astype(np.int8)
+    bonds[h == 0] = 0
+    return bonds
+
+def migration_target_mask_array(h: np.ndarray) -> np.ndarray:
+    nh = neighbor_heights(h)
+    return ((nh <= h) & (h > 0)).astype(np.int8)
+
 class LatticeSOS:
     """
     Red simple Solid-On-Solid (SOS) con alturas de columna enteras.
     - heights[i, j] ∈ {0,1,2,...}
     - Conectividad de 4 vecinos (von Neumann) con condiciones de contorno periódicas.
     """
-    def __init__(self, size: List[int], seed: Optional[int] = None, debug: bool = False):
-        self.size = size # Tamaño de la red
+    def __init__(self, size, seed: Optional[int] = None, debug: bool = False):
+        self.size = size # Tamaño de la red (int para redes cuadradas o [Lx, Ly])
+        if np.ndim(size) == 0:
+            Lx = Ly = int(size)
+        else:
+            Lx, Ly = int(size[0]), int(size[1])
+        self.shape = (Lx, Ly)
+        self.n_sites = Lx * Ly
         # Generador de nums aleatorios con semilla
         self.rng = np.random.default_rng(seed)
         # Corazón de la red, inicialmente plana
-        self.heights = np.zeros((size[0], size[1]), dtype=np.int32)
+        self.heights = np.zeros((Lx, Ly), dtype=np.int32)
         self.debug = debug
 
+        # Tabla de vecinos precalculada sobre índices planos (i * Ly + j), en el
+        # orden de neighbors4. Respeta el periodo de cada eje por separado, de
+        # modo que sirve para tiras no cuadradas.
+        idx = np.arange(self.n_sites, dtype=np.int32).reshape(self.shape)
+        self.nbr = np.stack([
+            np.roll(idx, 1, axis=0), np.roll(idx, -1, axis=0),
+            np.roll(idx, 1, axis=1), np.roll(idx, -1, axis=1)
+        ], axis=-1).reshape(self.n_sites, 4)
+        # Copias en listas de Python para los accesos escalares del bucle de eventos
+        self.nbr_list: List[List[int]] = self.nbr.tolist()
+        self._sites: List[Tuple[int,int]] = [(i, j) for i in range(Lx) for j in range(Ly)]
+        self._nbr_sites: List[Tuple[Tuple[int,int], ...]] = [
+            tuple(self._sites[k] for k in row) for row in self.nbr_list
+        ]
+
     # Configuración del estado inicial de la superficie
     def initialize(self, init_mode: str = "flat", max_roughness: int = 1):
         if init_mode == "flat":
             self.heights.fill(0)
         elif init_mode == "random_surface":
-            self.heights = self.rng.integers(
+            self.heights[...] = self.rng.integers(
                 0, max(1, max_roughness+1),
                 size=self.heights.shape, dtype=np.int32
             )
@@ -28,18 +73,27 @@ class LatticeSOS:
             raise ValueError("Unknown init_mode")
 
     # Condiciones de contorno periódicas
-    # Revisar el índice para envolverlo dentro de los límites de la red
-    def wrap(self, idx: int) -> int:
-        n = self.size[0] if isinstance(idx, int) else self.size[1]
+    # Envuelve el índice dentro de los límites del eje indicado (0 = x, 1 = y)
+    def wrap(self, idx: int, axis: int = 0) -> int:
+        n = self.shape[axis]
         return (idx + n) % n
 
+    # Índice plano de un sitio y su inversa
+    def index(self, site: Tuple[int,int]) -> int:
+        return int(site[0]) * self.shape[1] + int(site[1])
+
+    def site(self, idx: int) -> Tuple[int,int]:
+        return divmod(int(idx), self.shape[1])
+
+    @property
+    def flat(self) -> np.ndarray:
+        """Vista plana (sin copia) de heights, indexable con los índices de nbr."""
+        return self.heights.reshape(-1)
+
     # Coordenadas de los cuatro vecinos (Von Neumman) de un sitio
-    def neighbors4(self, site: Tuple[int,int]) -> List[Tuple[int,int]]:
-        i, j = site
-        return [
-            (self.wrap(i-1), j), (self.wrap(i+1), j),
-            (i, self.wrap(j-1)), (i, self.wrap(j+1))
-        ]
+    # Se leen de la tabla precalculada; no se construyen tuplas nuevas.
+    def neighbors4(self, site: Tuple[int,int]) -> Tuple[Tuple[int,int], ...]:
+        return self._nbr_sites[int(site[0]) * self.shape[1] + int(site[1])]
 
     # Altura de la columna en el sitio especificado
     def get_height(self, site: Tuple[int,int]) -> int:
@@ -131,8 +185,35 @@ class LatticeSOS:
         """
         Devuelve una lista de todas las coordenadas (x, y) de los sitios en la red.
         Es útil para iterar sobre todos los sitios, por ejemplo, al calcular tasas
-        globales o al clasificar sitios.
+        globales o al clasificar sitios. La lista se construye una sola vez y se
+        comparte entre llamadas: no debe modificarse.
+        """
+
+        return self._sites
+
+    # ---- Versiones vectorizadas (toda la red en una sola pasada) ----
+    def adsorption_bonds_all(self) -> np.ndarray:
+        """
+        adsorption_bonds para todos los sitios a la vez. Devuelve un arreglo int8
+        con la forma de heights.
+        """
+        return adsorption_bonds_array(self.heights)
+
+    def desorption_bonds_all(self) -> np.ndarray:
+        """
+        desorption_bonds para todos los sitios a la vez (0 en columnas vacías).
+        Devuelve un arreglo int8 con la forma de heights.
+        """
+        return desorption_bonds_array(self.heights)
+
+    def migration_target_mask_all(self) -> np.ndarray:
+        """
+        Máscara int8 de forma (4,) + heights.shape: entrada [k, i, j] igual a 1
+        si el vecino k (en el orden de neighbors4) es destino válido de migración
+        desde (i, j), 0 si no.
         """
+        return migration_target_mask_array(self.heights)
 
-        idxs = np.argwhere(np.ones_like(self.heights, dtype=bool))
-        return [tuple(x) for x in idxs]
\ No newline at end of file
+    def migration_target_count_all(self) -> np.ndarray:
+        """Número de destinos de migración de cada sitio (int8, forma de heights)."""
+        return np.count_nonzero(self.migration_target_mask_all(), axis=0).astype(np.int8)
@@ -0,0 +1,202 @@
+import numpy as np
+from typing import Dict
+from rates import EVENT_TYPES
+from history import EVENT_CODES
+
+# =============================
+# τ-leaping aproximado para redes grandes
+# =============================
+class TauLeaper:
+    """
+    Modo aproximado de KMC_BKL: en cada salto de duración tau se ejecutan
+    muchos eventos a la vez.
+
+    1. Se clasifica toda la red (vectorizado) y se toman las mismas tasas por
+       clase que step() (r_a, r_d, r_m, r_inc de la RateTable).
+    2. tau se elige para acotar el cambio relativo de las tasas (control eps,
+       al estilo de Cao-Gillespie):
+       - superficie: eventos esperados que cambian alturas <= eps * N sitios,
+         así que cada clase cambia en una fracción ~eps;
+       - reserva: |deriva de N_bulk| * tau <= eps * N_bulk y su desviación
+         típica <= eps * N_bulk (la tasa de adsorción depende de N_bulk).
+       Si el salto tendría menos de min_events eventos esperados, se ejecuta
+       un paso exacto con step().
+    3. Número de eventos por (tipo, clase) ~ Poisson(propensión * tau),
+       acotado por el número de sitios de la clase (sin reemplazo) y, para la
+       adsorción, por N_bulk. La incorporación no cambia alturas: se admite
+       siempre y con reemplazo.
+    4. Conflictos: los eventos que cambian alturas reciben una prioridad
+       aleatoria y se aceptan solo si su huella (sitio, y destino en la
+       migración) no coincide ni es vecina de la de otro evento de mayor
+       prioridad. Los rechazados se descartan y se cuentan.
+    5. Las alturas se actualizan en bloque con np.add.at.
+
+    stats guarda los parámetros usados y las magnitudes de error (fracción de
+    eventos rechazados, tau, criterio limitante) para validar contra corridas
+    exactas.
+    """
+    def __init__(self, kmc, eps: float = 0.03, min_events: int = 20):
+        if not 0 < eps < 1:
+            raise ValueError("eps debe estar en (0, 1)")
+        self.kmc = kmc
+        self.eps = float(eps)
+        self.min_events = int(min_events)
+        self.stats: Dict[str, object] = {
+            "eps": self.eps, "min_events": self.min_events,
+            "n_leaps": 0, "n_exact_steps": 0, "leap_events": 0,
+            "rejected_events": 0, "tau_min": np.inf, "tau_max": 0.0, "tau_sum": 0.0,
+            "limited_by": {"surface": 0, "bulk": 0, "t_max": 0},
+        }
+
+    def report(self) -> Dict[str, object]:
+        s = dict(self.stats)
+        s["limited_by"] = dict(self.stats["limited_by"])
+        proposed = s["leap_events"] + s["rejected_events"]
+        s["rejected_fraction"] = s["rejected_events"] / proposed if proposed else 0.0
+        s["tau_mean"] = s["tau_sum"] / s["n_leaps"] if s["n_leaps"] else 0.0
+        if not s["n_leaps"]:
+            s["tau_min"] = 0.0
+        return s
+
+    # ---- Control del paso ----
+    def _choose_tau(self, W: Dict[str, float], n_sites: int, N_bulk: int, t_room: float):
+        eps = self.eps
+        W_surface = W["adsorption"] + W["desorption"] + W["migration"]
+        taus = {"surface": eps * n_sites / W_surface if W_surface > 0 else np.inf}
+        x = eps * max(N_bulk, 1)
+        drift = abs(W["adsorption"] - W["desorption"])
+        var = W["adsorption"] + W["desorption"]
+        tau_b = np.inf
+        if drift > 0:
+            tau_b = x / drift
+        if var > 0:
+            tau_b = min(tau_b, x * x / var)
+        taus["bulk"] = tau_b
+        taus["t_max"] = t_room
+        limit = min(taus, key=taus.get)
+        return taus[limit], limit
+
+    # ---- Un salto ----
+    def leap(self, t_max: float = np.inf) -> bool:
+        kmc = self.kmc
+        lat = kmc.lat
+        rng = kmc.rng
+        scale = kmc.time_scale
+
+        rt = kmc.rates.refresh(kmc.p, kmc.N_bulk, kmc.N0)
+        if kmc._bins_dirty or not kmc.incremental:
+            kmc._rebuild_bins()
+        bins = kmc._bins
+        rows = {"adsorption": rt.ads, "desorption": rt.des, "migration": rt.mig, "incorporation": rt.inc}
+        prop = {e: np.nan_to_num(bins[e].counts * rows[e], nan=0.0, posinf=0.0) for e in EVENT_TYPES}
+        W = {e: float(prop[e].sum()) for e in EVENT_TYPES}
+        Wtot = sum(W.values())
+        if not np.isfinite(Wtot) or Wtot <= 0.0:
+            return False
+
+        tau, limit = self._choose_tau(W, lat.n_sites, kmc.N_bulk, (t_max - kmc.t) / scale)
+        if Wtot * tau < self.min_events:
+            self.stats["n_exact_steps"] += 1
+            return kmc.step()
+
+        # Observables: el estado previo al salto vale hasta t + tau
+        if kmc._obs_trace is not None:
+            kmc._sample_observables(kmc.t + tau * scale)
+
+        # Número de eventos por clase y sitios candidatos
+        sites, codes = [], []
+        for e in EVENT_TYPES:
+            k = rng.poisson(prop[e] * tau)
+            for c in np.flatnonzero(k):
+                members = bins[e].sets[c].to_array()
+                if e == "incorporation":
+                    chosen = members[rng.integers(0, len(members), size=k[c])]
+                else:
+                    chosen = rng.choice(members, size=min(int(k[c]), len(members)), replace=False)
+                sites.append(chosen)
+                codes.append(np.full(len(chosen), EVENT_CODES[e], dtype=np.uint8))
+        if not sites:
+            self._advance(tau, limit, [], 0)
+            return True
+        sites = np.concatenate(sites).astype(np.int64)
+        codes = np.concatenate(codes)
+
+        c_ads, c_mig, c_inc = EVENT_CODES["adsorption"], EVENT_CODES["migration"], EVENT_CODES["incorporation"]
+        # La adsorción no puede consumir más soluto del disponible
+        is_ads = np.flatnonzero(codes == c_ads)
+        if len(is_ads) > kmc.N_bulk:
+            drop = rng.choice(is_ads, size=len(is_ads) - kmc.N_bulk, replace=False)
+            keep = np.ones(len(sites), dtype=bool)
+            keep[drop] = False
+            sites, codes = sites[keep], codes[keep]
+
+        # Destino de cada migración: uno al azar entre los vecinos válidos
+        nbr = lat.nbr
+        targets = np.full(len(sites), -1, dtype=np.int64)
+        is_mig = np.flatnonzero(codes == c_mig)
+        if len(is_mig):
+            hf = lat.flat
+            src = sites[is_mig]
+            valid = hf[nbr[src]] <= hf[src][:, None]
+            keys = np.where(valid, rng.random(valid.shape), -1.0)
+            targets[is_mig] = nbr[src, np.argmax(keys, axis=1)]
+
+        # Resolución de conflictos entre eventos que cambian alturas
+        moving = np.flatnonzero(codes != c_inc)
+        accepted = np.ones(len(sites), dtype=bool)
+        if len(moving) > 1:
+            prio = rng.random(len(moving))
+            fp = np.stack([sites[moving], np.where(targets[moving] >= 0, targets[moving],
+                                                   sites[moving])], axis=1)          # (M, 2)
+            owner = np.repeat(np.arange(len(moving)), 2)
+            fp_flat = fp.ravel()
+            # Cada evento reclama su huella y los vecinos de su huella
+            claim_sites = np.concatenate([fp_flat, nbr[fp_flat].ravel()])
+            claim_owner = np.concatenate([owner, np.repeat(owner, 4)])
+            claim = np.full(lat.n_sites, -1.0)
+            np.maximum.at(claim, claim_sites, prio[claim_owner])
+            lost = claim[fp_flat] != prio[owner]
+            ok = np.bincount(owner[lost], minlength=len(moving)) == 0
+            accepted[moving[~ok]] = False
+        n_rejected = int(np.count_nonzero(~accepted))
+        sites, codes, targets = sites[accepted], codes[accepted], targets[accepted]
+
+        # Aplicación en bloque
+        dh = np.zeros(lat.n_sites, dtype=np.int64)
+        n_by_code = np.bincount(codes, minlength=len(EVENT_TYPES))
+        np.add.at(dh, sites[codes == c_ads], 1)
+        np.add.at(dh, sites[codes == EVENT_CODES["desorption"]], -1)
+        mig = codes == c_mig
+        np.add.at(dh, sites[mig], -1)
+        np.add.at(dh, targets[mig], 1)
+        lat.flat[:] += dh.astype(lat.heights.dtype)
+        kmc.N_bulk = max(0, kmc.N_bulk - int(n_by_code[c_ads])) + int(n_by_code[EVENT_CODES["desorption"]])
+        kmc.N_inc += int(n_by_code[c_inc])
+        for e in EVENT_TYPES:
+            kmc.counts[e] += int(n_by_code[EVENT_CODES[e]])
+
+        self._advance(tau, limit, (sites, codes, targets), n_rejected)
+        return True
+
+    def _advance(self, tau: float, limit: str, events, n_rejected: int):
+        kmc = self.kmc
+        kmc.t += tau * kmc.time_scale
+        n = 0
+        if events:
+            sites, codes, targets = events
+            n = len(sites)
+            kmc.history.extend(np.full(n, kmc.t), codes, sites.astype(np.int32),
+                               targets.astype(np.int32))
+        kmc.n_events += n
+        if kmc.traj is not None:
+            kmc.traj.maybe_keyframe(kmc)
+        kmc.refresh_bins()
+
+        st = self.stats
+        st["n_leaps"] += 1
+        st["leap_events"] += n
+        st["rejected_events"] += n_rejected
+        st["tau_min"] = min(st["tau_min"], tau)
+        st["tau_max"] = max(st["tau_max"], tau)
+        st["tau_sum"] += tau
+        st["limited_by"][limit] += 1
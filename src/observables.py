@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict
+from lattice import LatticeSOS
+
+# =============================
+# Observables de superficie con actualización O(1) por evento
+# =============================
+class SurfaceObservables:
+    """
+    Sumas que describen la superficie, mantenidas de forma incremental:
+    - sum_h, sum_h2: suma de alturas y de alturas al cuadrado (altura media y
+      rugosidad RMS w = sqrt(<h²> - <h>²)).
+    - n_occupied: sitios con h > 0 (cobertura = n_occupied / N).
+    - n_up, n_down: escalones ascendentes/descendentes en los 2N enlaces
+      "hacia adelante" (i -> i+1 y j -> j+1) de la red periódica.
+
+    apply(idx, dh) debe llamarse justo ANTES de cambiar la altura del sitio
+    idx en dh: lee las alturas actuales, así que solo toca el sitio y sus 4
+    enlaces. recompute() recalcula todo desde cero (vectorizado).
+    """
+    def __init__(self, lattice: LatticeSOS):
+        self.lat = lattice
+        self.n_sites = lattice.n_sites
+        self.recompute()
+
+    def recompute(self):
+        h = self.lat.heights.astype(np.int64)
+        self.sum_h = int(h.sum())
+        self.sum_h2 = int((h * h).sum())
+        self.n_occupied = int(np.count_nonzero(h))
+        # Diferencias hacia adelante en ambos ejes (mismas que np.roll de lattice)
+        dx = np.roll(h, -1, axis=0) - h
+        dy = np.roll(h, -1, axis=1) - h
+        self.n_up = int(np.count_nonzero(dx > 0) + np.count_nonzero(dy > 0))
+        self.n_down = int(np.count_nonzero(dx < 0) + np.count_nonzero(dy < 0))
+
+    def _bond(self, diff_old: int, diff_new: int):
+        if diff_old > 0: self.n_up -= 1
+        elif diff_old < 0: self.n_down -= 1
+        if diff_new > 0: self.n_up += 1
+        elif diff_new < 0: self.n_down += 1
+
+    def apply(self, idx: int, dh: int):
+        hf = self.lat.flat
+        h = hf.item(idx)
+        hn = h + dh
+        self.sum_h += dh
+        self.sum_h2 += hn * hn - h * h
+        if h <= 0 < hn:
+            self.n_occupied += 1
+        elif hn <= 0 < h:
+            self.n_occupied -= 1
+        # nbr_list: (i-1, i+1, j-1, j+1); los enlaces hacia adelante del sitio
+        # van a i+1 y j+1, y los de sus vecinos i-1 y j-1 llegan a él
+        nb = self.lat.nbr_list[idx]
+        for k in (nb[1], nb[3]):
+            if k != idx:
+                hk = hf.item(k)
+                self._bond(hk - h, hk - hn)
+        for k in (nb[0], nb[2]):
+            if k != idx:
+                hk = hf.item(k)
+                self._bond(h - hk, hn - hk)
+
+    # ---- Magnitudes derivadas ----
+    @property
+    def mean_height(self) -> float:
+        return self.sum_h / self.n_sites
+
+    @property
+    def roughness(self) -> float:
+        m = self.sum_h / self.n_sites
+        return float(np.sqrt(max(self.sum_h2 / self.n_sites - m * m, 0.0)))
+
+    @property
+    def coverage(self) -> float:
+        return self.n_occupied / self.n_sites
+
+    @property
+    def step_density(self) -> float:
+        return (self.n_up + self.n_down) / (2 * self.n_sites)
+
+
+class ObservableTrace:
+    """
+    Muestreo de SurfaceObservables sobre una malla de tiempos densa.
+    El valor en t_grid[k] es el estado vigente en ese instante (el anterior al
+    primer evento con t > t_grid[k]); los puntos no alcanzados quedan en NaN.
+    """
+    FIELDS = ("mean_height", "roughness", "coverage", "step_density",
+              "n_up", "n_down", "conversion")
+
+    def __init__(self, t_grid: np.ndarray, n_coord_classes: int = 5):
+        self.t = np.asarray(t_grid, dtype=np.float64)
+        T = len(self.t)
+        self.data: Dict[str, np.ndarray] = {f: np.full(T, np.nan) for f in self.FIELDS}
+        # Sitios ocupados por clase de coordinación (vecinos laterales 0..4)
+        self.coordination = np.full((T, n_coord_classes), -1, dtype=np.int64)
+        self.k = 0
+
+    @property
+    def done(self) -> bool:
+        return self.k >= len(self.t)
+
+    def record(self, obs: SurfaceObservables, conversion: float, coord_counts: np.ndarray):
+        k = self.k
+        d = self.data
+        d["mean_height"][k] = obs.mean_height
+        d["roughness"][k] = obs.roughness
+        d["coverage"][k] = obs.coverage
+        d["step_density"][k] = obs.step_density
+        d["n_up"][k] = obs.n_up
+        d["n_down"][k] = obs.n_down
+        d["conversion"][k] = conversion
+        self.coordination[k] = coord_counts
+        self.k = k + 1
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        out = {"t": self.t, "coordination": self.coordination}
+        out.update(self.data)
+        return out
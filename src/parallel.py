@@ -0,0 +1,300 @@
+import time
+import multiprocessing as mp
+import numpy as np
+from typing import Dict, List, Optional
+from params import KMCParams
+from lattice import LatticeSOS
+from bkl import KMC_BKL
+from rates import EVENT_TYPES
+
+# =============================
+# kMC paralelo por descomposición espacial (subredes síncronas)
+# =============================
+def _domain_worker(conn, shm_name: str, shape, params: KMCParams, N0: int, seed,
+                   time_scale: float, masks: List[np.ndarray]):
+    """
+    Proceso de un dominio: un KMC_BKL incremental sobre la red completa en
+    memoria compartida, restringido en cada ventana a una de sus dos subredes.
+    Mensajes: ("window", sub, t0, t1, N_bulk, cuota) -> (estado, eventos,
+    conteos, dN_bulk, dN_inc); ("stop",) termina.
+    """
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    lat = LatticeSOS(shape)
+    lat.heights = np.ndarray(shape, dtype=np.int32, buffer=shm.buf)
+    kmc = KMC_BKL(lat, params, N_bulk0=N0, rng_seed=seed, time_scale=time_scale,
+                  incremental=True, history_mode="off")
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == "stop":
+                break
+            _, sub, t0, t1, N_bulk, quota = msg
+            # Los bordes pudieron cambiar en la ventana anterior: se reclasifica
+            kmc.set_active_region(masks[sub])
+            kmc.t, kmc.N_bulk = t0, N_bulk
+            n0, N_inc0 = kmc.n_events, kmc.N_inc
+            counts0 = dict(kmc.counts)
+            status = "ok"
+            while kmc.t < t1:
+                if N_bulk - kmc.N_bulk >= quota:
+                    status = "quota"
+                    break
+                if not kmc.step(t_max=t1):
+                    status = "stalled"
+                    break
+            conn.send((status, kmc.n_events - n0,
+                       {e: kmc.counts[e] - counts0[e] for e in EVENT_TYPES},
+                       kmc.N_bulk - N_bulk, kmc.N_inc - N_inc0))
+    finally:
+        # Las vistas sobre shm.buf deben liberarse antes de cerrarlo
+        lat.heights = np.zeros(shape, dtype=np.int32)
+        del kmc
+        shm.close()
+
+
+class ParallelKMC:
+    """
+    kMC de una sola red repartido entre procesos con el método de subredes
+    síncronas (Shim & Amar):
+
+    - La red periódica se divide en n_workers franjas de filas (dominios) y
+      cada franja en dos mitades (subredes 0 y 1). Las alturas viven en un
+      arreglo de multiprocessing.shared_memory que todos los procesos escriben.
+    - En cada ventana [t, t + window] todos los dominios evolucionan la misma
+      subred con un KMC_BKL restringido a ella (set_active_region) y
+      step(t_max=t + window). Dos subredes activas quedan separadas por al
+      menos media franja (>= 2 filas), así que ningún evento, migración al
+      borde ni reclasificación toca la zona de otro proceso: no hay conflictos
+      de frontera que corregir. Las dos subredes recorren el mismo intervalo
+      en orden aleatorio y después el reloj global avanza window.
+    - La reserva es global: al inicio de cada ventana todos los procesos
+      reciben el N_bulk reconciliado (del que dependen sobresaturación y
+      adsorción) y una cuota de N_bulk / n_workers moléculas; un dominio que
+      agota su cuota se detiene hasta la siguiente ventana, de modo que N_bulk
+      nunca se vuelve negativo. Al cerrar la ventana se suman los cambios.
+
+    El error frente a la corrida serie es O(window): con window=None se elige
+    para ~events_per_window eventos por dominio y ventana, se ajusta en cada
+    barrido y nunca supera 1 / (mayor tasa por sitio), como recomiendan Shim y
+    Amar. Cada ventana reconstruye los bins del proceso (O(N) vectorizado),
+    así que la aceleración se acerca a lineal cuando events_per_window es
+    grande frente a ese coste (redes de 256² o más).
+    """
+    def __init__(self, lattice: LatticeSOS, params: KMCParams, N_bulk0: int,
+                 n_workers: int = 2, window: Optional[float] = None,
+                 events_per_window: int = 2000, rng_seed: Optional[int] = None,
+                 time_scale: float = 1.0):
+        try:
+            from multiprocessing import shared_memory
+        except ImportError as e:  # Python < 3.8
+            raise ImportError("ParallelKMC requiere multiprocessing.shared_memory (Python >= 3.8)") from e
+        Lx, Ly = lattice.shape
+        self.n_workers = int(n_workers)
+        if self.n_workers < 1:
+            raise ValueError("n_workers debe ser >= 1")
+        if Lx < 4 * self.n_workers:
+            raise ValueError("Cada subred necesita al menos 2 filas: Lx >= 4 * n_workers")
+        self.lat = lattice
+        self.p = params
+        self.N0 = int(N_bulk0)
+        self.N_bulk = int(N_bulk0)
+        self.N_inc = 0
+        self.t = 0.0
+        self.n_events = 0
+        self.time_scale = float(time_scale)
+        self.counts = {e: 0 for e in EVENT_TYPES}
+        self.events_per_window = int(events_per_window)
+        self._auto_window = window is None
+        self.rng = np.random.default_rng(rng_seed)
+        self.run_report: Dict[str, object] = {}
+
+        self._conns, self._procs = [], []
+        self._shm = shared_memory.SharedMemory(create=True, size=lattice.heights.astype(np.int32).nbytes)
+        try:
+            self._start(lattice, params, window, rng_seed)
+        except BaseException:
+            # Sin esto el segmento compartido quedaría huérfano en /dev/shm
+            self._abort_start()
+            raise
+
+    def _start(self, lattice: LatticeSOS, params: KMCParams, window: Optional[float],
+               rng_seed: Optional[int]):
+        Lx = lattice.shape[0]
+        self.heights = np.ndarray(lattice.shape, dtype=np.int32, buffer=self._shm.buf)
+        self.heights[...] = lattice.heights
+
+        # Motor local sin procesos: solo estima la tasa total para elegir window
+        probe_lat = LatticeSOS(lattice.shape)
+        probe_lat.heights = self.heights
+        self._probe = KMC_BKL(probe_lat, params, N_bulk0=self.N0, time_scale=self.time_scale)
+        self.window = float(window) if window is not None else self._initial_window()
+
+        # Dominios: franjas de filas, cada una partida en dos subredes
+        self.domains = []
+        seeds = np.random.SeedSequence(rng_seed).spawn(self.n_workers)
+        for w, rows in enumerate(np.array_split(np.arange(Lx), self.n_workers)):
+            masks = []
+            for half in np.array_split(rows, 2):
+                m = np.zeros(lattice.shape, dtype=bool)
+                m[half, :] = True
+                masks.append(m)
+            self.domains.append((int(rows[0]), int(rows[-1]) + 1))
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_domain_worker, daemon=True,
+                              args=(child, self._shm.name, lattice.shape, params, self.N0,
+                                    seeds[w], self.time_scale, masks))
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self.worker_events = np.zeros(self.n_workers, dtype=np.int64)
+
+    def _abort_start(self):
+        for conn in self._conns:
+            conn.close()
+        for proc in self._procs:
+            proc.terminate()
+            proc.join(timeout=10)
+        self.heights = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    # ---- Estado global ----
+    @property
+    def conversion_percent(self) -> float:
+        denom = self.N_bulk + self.N_inc
+        return 100.0 * (self.N_inc / denom) if denom > 0 else 100.0
+
+    def _total_rate(self) -> float:
+        kmc = self._probe
+        kmc.N_bulk = self.N_bulk
+        rt = kmc.rates.refresh(self.p, self.N_bulk, self.N0)
+        cls = kmc._class_arrays()
+        rows = {"adsorption": rt.ads, "desorption": rt.des, "migration": rt.mig, "incorporation": rt.inc}
+        W = 0.0
+        for e in EVENT_TYPES:
+            c = cls[e].ravel()
+            W += float(np.dot(np.bincount(c[c >= 0], minlength=len(rows[e])), np.nan_to_num(rows[e])))
+        return W
+
+    def _max_site_rate(self) -> float:
+        # Cota de la tasa total de un sitio: la mayor tasa de cada tipo de evento
+        rt = self._probe.rates.refresh(self.p, self.N_bulk, self.N0)
+        return float(sum(np.nanmax(np.nan_to_num(row, posinf=0.0)) for row in (rt.ads, rt.des, rt.mig, rt.inc)))
+
+    def _initial_window(self) -> float:
+        # Cada subred de cada dominio cubre ~1/(2 n_workers) de la red
+        W = self._total_rate()
+        if W <= 0:
+            return 1.0 * self.time_scale
+        return self.events_per_window * 2 * self.n_workers / W * self.time_scale
+
+    def _quotas(self) -> np.ndarray:
+        q = np.full(self.n_workers, self.N_bulk // self.n_workers, dtype=np.int64)
+        q[:self.N_bulk % self.n_workers] += 1
+        return q
+
+    # ---- Una ventana de una subred en todos los dominios ----
+    def _window(self, sub: int, t0: float, t1: float):
+        for conn, q in zip(self._conns, self._quotas()):
+            conn.send(("window", sub, t0, t1, self.N_bulk, int(q)))
+        results = [conn.recv() for conn in self._conns]
+        for w, (status, n, counts, dN_bulk, dN_inc) in enumerate(results):
+            self.N_bulk += dN_bulk
+            self.N_inc += dN_inc
+            self.n_events += n
+            self.worker_events[w] += n
+            for e in EVENT_TYPES:
+                self.counts[e] += counts[e]
+        return results
+
+    # ---- Run ----
+    def run(self, t_end: float, snapshot_times: Optional[List[float]] = None,
+            max_sweeps: int = 1_000_000):
+        """
+        Avanza hasta t_end en barridos (una ventana por subred). Devuelve
+        snapshots (t, heights, conversión) como KMC_BKL.run(); las ventanas
+        terminan en cada instante de snapshot. Al final copia las alturas a
+        la LatticeSOS original.
+        """
+        times = [] if snapshot_times is None else np.asarray(snapshot_times, dtype=float).tolist()
+        times_list = sorted(ts for ts in times if ts > self.t)
+        snaps = []
+        next_snap_idx = 0
+        n0 = self.n_events
+        n_sweeps = n_windows = n_quota = n_stalled = 0
+        wall0 = time.perf_counter()
+        stop_reason = "t_end"
+        while self.t < t_end and n_sweeps < max_sweeps:
+            t_stop = times_list[next_snap_idx] if next_snap_idx < len(times_list) else t_end
+            if self._auto_window:
+                # Ningún sitio debería disparar más de ~1 evento por ventana
+                r_max = self._max_site_rate()
+                if r_max > 0:
+                    self.window = min(self.window, self.time_scale / r_max)
+            t1 = min(self.t + self.window, t_stop, t_end)
+            sweep_events = 0
+            for sub in self.rng.permutation(2):
+                results = self._window(int(sub), self.t, t1)
+                n_windows += 1
+                sweep_events += sum(r[1] for r in results)
+                n_quota += sum(r[0] == "quota" for r in results)
+                n_stalled += sum(r[0] == "stalled" for r in results)
+            n_sweeps += 1
+            if sweep_events == 0 and all(r[0] != "ok" for r in results):
+                stop_reason = "stalled"
+                break
+            # Ajuste de window hacia events_per_window eventos por dominio y ventana
+            if self._auto_window and sweep_events > 0 and t1 - self.t == self.window:
+                per_domain = sweep_events / (2 * self.n_workers)
+                self.window *= float(np.clip(self.events_per_window / per_domain, 0.5, 2.0))
+            self.t = t1
+            while next_snap_idx < len(times_list) and self.t >= times_list[next_snap_idx]:
+                snaps.append((times_list[next_snap_idx], self.heights.copy(), self.conversion_percent))
+                next_snap_idx += 1
+        if stop_reason == "t_end" and self.t < t_end:
+            stop_reason = "max_sweeps"
+        while next_snap_idx < len(times_list):
+            snaps.append((times_list[next_snap_idx], self.heights.copy(), self.conversion_percent))
+            next_snap_idx += 1
+        self.lat.heights[...] = self.heights
+
+        wall = time.perf_counter() - wall0
+        n = self.n_events - n0
+        self.run_report = {
+            "n_events": n, "wall_seconds": wall, "events_per_s": n / wall if wall > 0 else 0.0,
+            "t": self.t, "stop_reason": stop_reason, "counts": dict(self.counts),
+            "backend": "parallel", "n_workers": self.n_workers, "window": self.window,
+            "n_sweeps": n_sweeps, "n_windows": n_windows,
+            "events_per_window": n / (n_windows * self.n_workers) if n_windows else 0.0,
+            "quota_stops": n_quota, "stalled_windows": n_stalled,
+            "worker_events": self.worker_events.tolist(),
+        }
+        return snaps
+
+    # ---- Cierre ----
+    def close(self):
+        if self._shm is None:
+            return
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        self.lat.heights[...] = self.heights
+        self._probe.lat.heights = self.heights = np.array(self.heights)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "ParallelKMC":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -12,4 +12,15 @@ class KMCParams:
     V: float
     C_eq: float
     S_floor: float = -5.0
-    S_ceil: float = 8.0
\ No newline at end of file
+    S_ceil: float = 8.0
+
+    # Cada asignación de atributo incrementa la revisión; así las tablas de
+    # tasas cacheadas detectan que los parámetros han cambiado (p. ej. cuando
+    # un test modifica E_pb_over_kT después de construir el motor).
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_revision", getattr(self, "_revision", 0) + 1)
+
+    @property
+    def revision(self) -> int:
+        return getattr(self, "_revision", 0)
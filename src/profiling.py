@@ -0,0 +1,112 @@
+import time
+import functools
+from collections import deque
+from typing import Dict, Iterable
+
+# Primitivas de LatticeSOS que se instrumentan cuando el perfilado está activo
+LATTICE_PRIMITIVES = ("get_height", "inc_height", "dec_height", "index", "site",
+                      "neighbors4", "migration_targets", "adsorption_bonds_all",
+                      "desorption_bonds_all", "migration_target_count_all")
+
+# =============================
+# Perfilado por fases de step()
+# =============================
+class StepProfiler:
+    """
+    Acumula tiempo de reloj y número de llamadas por fase de KMC_BKL.step()
+    y por primitiva de LatticeSOS, y mide eventos/s en una ventana deslizante.
+
+    - start() marca el inicio de un paso; lap(fase) asigna a `fase` el tiempo
+      transcurrido desde la marca anterior. Así cada fase cuesta una sola
+      llamada a perf_counter.
+    - instrument(obj) envuelve métodos de una instancia (por defecto las
+      primitivas de LatticeSOS); su tiempo está incluido también en la fase
+      que las llama.
+    - tick() registra el fin de un evento para la ventana deslizante.
+
+    Cuando el perfilado está desactivado el motor guarda `None` y solo paga
+    una comparación por fase.
+    """
+    def __init__(self, window: int = 10_000):
+        self.window = max(2, int(window))
+        self.reset()
+
+    def reset(self):
+        self.phases: Dict[str, list] = {}     # fase -> [segundos, llamadas]
+        self.primitives: Dict[str, list] = {}
+        self.n_events = 0
+        self._stamps = deque(maxlen=self.window)
+        self._last = time.perf_counter()
+
+    # ---- Fases ----
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        acc = self.phases.get(phase)
+        if acc is None:
+            acc = self.phases[phase] = [0.0, 0]
+        acc[0] += now - self._last
+        acc[1] += 1
+        self._last = now
+
+    def tick(self):
+        self.n_events += 1
+        self._stamps.append(self._last)
+
+    # ---- Primitivas ----
+    def instrument(self, obj, names: Iterable[str] = LATTICE_PRIMITIVES):
+        """Sustituye obj.name por una versión cronometrada (solo en esta instancia)."""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is None or getattr(method, "_profiled", False):
+                continue
+            setattr(obj, name, self._timed(name, method))
+
+    def _timed(self, name: str, method):
+        acc = self.primitives.setdefault(name, [0.0, 0])
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            t0 = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                acc[0] += clock() - t0
+                acc[1] += 1
+        wrapper._profiled = True
+        return wrapper
+
+    @staticmethod
+    def uninstrument(obj, names: Iterable[str] = LATTICE_PRIMITIVES):
+        for name in names:
+            if getattr(getattr(obj, name, None), "_profiled", False):
+                delattr(obj, name)
+
+    # ---- Lectura ----
+    def events_per_second(self) -> float:
+        """Eventos/s sobre los últimos `window` eventos."""
+        if len(self._stamps) < 2:
+            return 0.0
+        span = self._stamps[-1] - self._stamps[0]
+        return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+    @staticmethod
+    def _table(acc: Dict[str, list], total: float) -> Dict[str, dict]:
+        return {name: {"seconds": s, "calls": n,
+                       "us_per_call": 1e6 * s / n if n else 0.0,
+                       "fraction": s / total if total > 0 else 0.0}
+                for name, (s, n) in sorted(acc.items(), key=lambda kv: -kv[1][0])}
+
+    def report(self) -> dict:
+        total = sum(s for s, _ in self.phases.values())
+        return {
+            "n_events": self.n_events,
+            "step_seconds": total,
+            "us_per_event": 1e6 * total / self.n_events if self.n_events else 0.0,
+            "window_events_per_s": self.events_per_second(),
+            "phases": self._table(self.phases, total),
+            "lattice": self._table(self.primitives, total),
+        }
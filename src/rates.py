@@ -0,0 +1,119 @@
+import numpy as np
+from typing import Optional
+from params import KMCParams
+from utils import _safe_exp, _finite_or_zero, _MAX_EXP_ARG
+
+# Tipos de evento (el índice es su código) y número de clases de coordinación de cada uno
+EVENT_TYPES = ("adsorption", "desorption", "migration", "incorporation")
+N_CLASSES = {"adsorption": 5, "desorption": 5, "migration": 4, "incorporation": 5}
+
+# =============================
+# Tasas de Arrhenius y tabla precalculada por clase
+# =============================
+def supersaturation(p: KMCParams, N_bulk: float) -> float:
+    C = N_bulk / max(p.V, 1e-12)
+    S = np.log((C + 1e-15) / max(p.C_eq, 1e-15))
+    return float(np.clip(S, p.S_floor, p.S_ceil))
+
+def rate_adsorption(p: KMCParams, i: int, N_bulk: float, N0: int, S: float) -> float:
+    if N_bulk <= 0:
+        return 0.0
+    # evitar dividir por S~0: usar signo para no cambiar la física cualitativa
+    eps = 1e-12 if S >= 0 else -1e-12
+    arg = S + i * (p.delta / max(S, eps))
+    base = p.K0_plus * _safe_exp(arg)
+    # factor de reserva finita (empuja a meseta)
+    base *= (N_bulk / max(N0, 1))
+    return _finite_or_zero(base)
+
+def adsorption_rates_array(p: KMCParams, N_bulk: np.ndarray, N0, n_classes: int = 5) -> np.ndarray:
+    """
+    rate_adsorption para varias reservas a la vez (una por réplica).
+    Devuelve un arreglo (R, n_classes) con los mismos valores que la versión escalar.
+    """
+    N_bulk = np.asarray(N_bulk, dtype=np.float64)
+    C = N_bulk / max(p.V, 1e-12)
+    S = np.clip(np.log((C + 1e-15) / max(p.C_eq, 1e-15)), p.S_floor, p.S_ceil)
+    denom = np.where(S >= 0, np.maximum(S, 1e-12), np.maximum(S, -1e-12))
+    i = np.arange(n_classes)
+    arg = S[:, None] + i[None, :] * (p.delta / denom)[:, None]
+    base = p.K0_plus * np.exp(np.clip(arg, -_MAX_EXP_ARG, _MAX_EXP_ARG))
+    base *= (N_bulk / np.maximum(N0, 1))[:, None]
+    base[~np.isfinite(base)] = 0.0
+    base[N_bulk <= 0] = 0.0
+    return base
+
+def rate_desorption(p: KMCParams, i: int) -> float:
+    arg = p.phi_over_kT - i * p.E_pb_over_kT
+    return _finite_or_zero(p.K0_plus * _safe_exp(arg))
+
+def rate_migration(p: KMCParams, i: int) -> float:
+    arg = p.phi_over_kT + 0.5*p.E_pb_over_kT - i*p.E_pb_over_kT
+    return _finite_or_zero(p.K0_plus * _safe_exp(arg))
+
+def rate_incorporation(p: KMCParams, i: int) -> float:
+    arg = i * p.E_pb_over_kT
+    return _finite_or_zero(p.K_inc_plus * _safe_exp(arg))
+
+
+class RateTable:
+    """
+    Tasas por clase de coordinación para cada tipo de evento.
+
+    - des, mig, inc solo dependen de KMCParams: se recalculan cuando cambian los
+      parámetros (se detecta con la revisión de KMCParams, que aumenta en cada
+      asignación de atributo). La tabla guarda una referencia al objeto de
+      parámetros: un KMCParams nuevo siempre invalida la caché, aunque reciba
+      la dirección de memoria de uno ya liberado.
+    - ads depende además de la reserva: solo se recalcula cuando cambia N_bulk.
+    - mig_scale multiplica uniformemente la fila de migración (aceleración de
+      acceleration.MigrationScaler); 1.0 = tasas físicas.
+    - revision aumenta cada vez que se recalculan des, mig e inc, y
+      ads_revision cada vez que se recalcula ads: quien guarde valores
+      derivados de las filas (el árbol de sumas de KMC_BKL) sabe cuáles
+      debe actualizar.
+    """
+    def __init__(self, n_ads: int = 5, n_des: int = 5, n_mig: int = 4, n_inc: int = 5):
+        self.ads = np.zeros(n_ads, dtype=np.float64)
+        self.des = np.zeros(n_des, dtype=np.float64)
+        self.mig = np.zeros(n_mig, dtype=np.float64)
+        self.inc = np.zeros(n_inc, dtype=np.float64)
+        self.S = 0.0
+        self.mig_scale = 1.0
+        self._p: Optional[KMCParams] = None
+        self._params_key = None
+        self._ads_key = None
+        self.revision = 0
+        self.ads_revision = 0
+
+    def invalidate(self):
+        self._params_key = None
+        self._ads_key = None
+
+    def set_migration_scale(self, scale: float):
+        if scale != self.mig_scale:
+            self.mig_scale = float(scale)
+            self._params_key = None
+
+    def refresh(self, p: KMCParams, N_bulk: float, N0: int) -> "RateTable":
+        params_key = (p.revision, self.mig_scale)
+        if p is not self._p or params_key != self._params_key:
+            for i in range(len(self.des)):
+                self.des[i] = rate_desorption(p, i)
+            for i in range(len(self.mig)):
+                self.mig[i] = rate_migration(p, i) * self.mig_scale
+            for i in range(len(self.inc)):
+                self.inc[i] = rate_incorporation(p, i)
+            self._p = p
+            self._params_key = params_key
+            self._ads_key = None
+            self.revision += 1
+
+        ads_key = (N_bulk, N0)
+        if ads_key != self._ads_key:
+            self.S = supersaturation(p, N_bulk)
+            for i in range(len(self.ads)):
+                self.ads[i] = rate_adsorption(p, i, N_bulk, N0, self.S)
+            self._ads_key = ads_key
+            self.ads_revision += 1
+        return self
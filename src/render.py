@@ -0,0 +1,200 @@
+import os
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from snapshots import RESULTS_DIR
+
+# Tono relativo por orientación de cara (cara superior, lateral x, lateral y):
+# un sombreado fijo que da relieve sin cálculo de iluminación
+FACE_SHADE = np.array([1.0, 0.75, 0.6])
+
+# =============================
+# Geometría de vóxeles a partir de alturas SOS
+# =============================
+def voxel_mask(heights: np.ndarray, h_max: Optional[int] = None) -> np.ndarray:
+    """Cubo booleano (Lx, Ly, h_max) con voxel[i, j, k] = k < heights[i, j] (una comparación)."""
+    heights = np.asarray(heights)
+    if h_max is None:
+        h_max = int(heights.max()) if heights.size else 0
+    return np.arange(h_max) < heights[..., None]
+
+
+def downsample_heights(heights: np.ndarray, spatial_step: int = 1,
+                       height_step: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reduce la resolución para renderizar:
+    - spatial_step: bloques de s x s columnas con la altura máxima del bloque
+      (conserva la silueta; el último bloque puede ser más estrecho).
+    - height_step: las alturas se expresan en capas de k unidades, redondeando
+      hacia arriba.
+    Devuelve (alturas en capas, bordes x, bordes y) en coordenadas de la red.
+    """
+    h = np.asarray(heights)
+    Lx, Ly = h.shape
+    s = max(1, int(spatial_step))
+    k = max(1, int(height_step))
+    xs, ys = np.arange(0, Lx, s), np.arange(0, Ly, s)
+    if s > 1:
+        h = np.maximum.reduceat(np.maximum.reduceat(h, xs, axis=0), ys, axis=1)
+    if k > 1:
+        h = -(-h // k)
+    return h.astype(np.int64), np.append(xs, Lx).astype(float), np.append(ys, Ly).astype(float)
+
+
+def _side_pairs(h: np.ndarray, axis: int) -> Tuple[np.ndarray, ...]:
+    # Paredes entre columnas vecinas a lo largo de axis, con suelo 0 fuera de
+    # la red (la vista no es periódica). Devuelve (plano, índice transversal,
+    # lo, hi) de cada pared con lo < hi.
+    if axis == 0:
+        hp = np.pad(h, ((1, 1), (0, 0)))
+        a, b = hp[:-1, :], hp[1:, :]
+    else:
+        hp = np.pad(h, ((0, 0), (1, 1)))
+        a, b = hp[:, :-1].T, hp[:, 1:].T
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    plane, cross = np.nonzero(lo < hi)
+    return plane, cross, lo[plane, cross], hi[plane, cross]
+
+
+def count_exposed_faces(heights: np.ndarray, merge: bool = True) -> int:
+    """Número de caras que produciría exposed_faces (sin construirlas)."""
+    h = np.asarray(heights).astype(np.int64)
+    n = int(np.count_nonzero(h > 0))
+    for axis in (0, 1):
+        _, _, lo, hi = _side_pairs(h, axis)
+        n += len(lo) if merge else int((hi - lo).sum())
+    return n
+
+
+def exposed_faces(heights: np.ndarray, x_edges: Optional[np.ndarray] = None,
+                  y_edges: Optional[np.ndarray] = None, z_unit: float = 1.0,
+                  merge: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Caras visibles del sólido de columnas: la cara superior de cada columna
+    ocupada y las paredes entre columnas de distinta altura (y hacia el
+    exterior de la red). Las caras inferiores y las interiores no se generan.
+
+    - merge=True: cada pared es un único rectángulo de min(h) a max(h).
+    - merge=False: una cara por vóxel expuesto, como ax.voxels.
+    Devuelve (verts (F, 4, 3), orientación (F,)) con 0 = arriba, 1 = pared
+    normal a x, 2 = pared normal a y.
+    """
+    h = np.asarray(heights).astype(np.int64)
+    Lx, Ly = h.shape
+    xe = np.arange(Lx + 1, dtype=float) if x_edges is None else np.asarray(x_edges, dtype=float)
+    ye = np.arange(Ly + 1, dtype=float) if y_edges is None else np.asarray(y_edges, dtype=float)
+
+    # Caras superiores
+    i, j = np.nonzero(h > 0)
+    z = h[i, j] * z_unit
+    x0, x1, y0, y1 = xe[i], xe[i + 1], ye[j], ye[j + 1]
+    tops = np.stack([np.stack([x0, y0, z], -1), np.stack([x1, y0, z], -1),
+                     np.stack([x1, y1, z], -1), np.stack([x0, y1, z], -1)], axis=1)
+    verts, kinds = [tops], [np.zeros(len(i), dtype=np.int8)]
+
+    for axis in (0, 1):
+        plane, cross, lo, hi = _side_pairs(h, axis)
+        if not merge:
+            # Una cara por unidad de altura entre lo y hi
+            reps = hi - lo
+            start = np.repeat(lo, reps)
+            offs = np.arange(len(start)) - np.repeat(np.cumsum(reps) - reps, reps)
+            plane, cross = np.repeat(plane, reps), np.repeat(cross, reps)
+            lo, hi = start + offs, start + offs + 1
+        z0, z1 = lo * z_unit, hi * z_unit
+        if axis == 0:
+            p, c0, c1 = xe[plane], ye[cross], ye[cross + 1]
+            quad = [np.stack([p, c0, z0], -1), np.stack([p, c1, z0], -1),
+                    np.stack([p, c1, z1], -1), np.stack([p, c0, z1], -1)]
+        else:
+            p, c0, c1 = ye[plane], xe[cross], xe[cross + 1]
+            quad = [np.stack([c0, p, z0], -1), np.stack([c1, p, z0], -1),
+                    np.stack([c1, p, z1], -1), np.stack([c0, p, z1], -1)]
+        verts.append(np.stack(quad, axis=1))
+        kinds.append(np.full(len(plane), axis + 1, dtype=np.int8))
+    return np.concatenate(verts).reshape(-1, 4, 3), np.concatenate(kinds)
+
+
+def fit_face_budget(heights: np.ndarray, max_faces: int, spatial_step: int = 1,
+                    height_step: int = 1, merge: bool = True) -> int:
+    """Menor spatial_step (duplicando desde el dado) cuyo número de caras cabe en max_faces."""
+    s = max(1, int(spatial_step))
+    limit = max(np.shape(heights))
+    while s < limit:
+        h, _, _ = downsample_heights(heights, s, height_step)
+        if count_exposed_faces(h, merge) <= max_faces:
+            break
+        s *= 2
+    return min(s, limit)
+
+# =============================
+# Dibujo con matplotlib
+# =============================
+def render_voxels(ax, heights: np.ndarray, color=(0.2, 0.3, 0.8, 0.9),
+                  spatial_step: int = 1, height_step: int = 1,
+                  max_faces: Optional[int] = 200_000, merge: bool = True,
+                  edgecolor="black", linewidth: float = 0.2, z_max: Optional[float] = None):
+    """
+    Dibuja las caras expuestas de la superficie en un eje 3D como una sola
+    Poly3DCollection. Si el número de caras supera max_faces, spatial_step
+    se duplica hasta cumplirlo. Devuelve (colección, spatial_step usado).
+    """
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+    heights = np.asarray(heights)
+    if max_faces is not None:
+        spatial_step = fit_face_budget(heights, max_faces, spatial_step, height_step, merge)
+    h, xe, ye = downsample_heights(heights, spatial_step, height_step)
+    verts, kinds = exposed_faces(h, xe, ye, z_unit=max(1, int(height_step)), merge=merge)
+
+    rgba = np.asarray(color, dtype=float)
+    colors = np.tile(rgba, (len(kinds), 1))
+    colors[:, :3] *= FACE_SHADE[kinds][:, None]
+    coll = Poly3DCollection(verts, facecolors=colors, edgecolors=edgecolor, linewidths=linewidth)
+    ax.add_collection3d(coll)
+
+    Lx, Ly = heights.shape
+    top = float(z_max) if z_max is not None else float(max(int(h.max()) * max(1, int(height_step)), 1))
+    ax.set_xlim(0, Lx)
+    ax.set_ylim(0, Ly)
+    ax.set_zlim(0, top)
+    ax.set_box_aspect((Lx, Ly, top))
+    return coll, spatial_step
+
+
+def render_frames(snapshots, out_dir: str = "frames", indices: Optional[Sequence[int]] = None,
+                  elev: int = 45, azim: int = 45, dpi: int = 100, prefix: str = "frame",
+                  **render_kwargs) -> List[str]:
+    """
+    Renderiza una pila de snapshots (lista de run() o SnapshotStore) como PNG
+    numerados para animaciones, con la misma vía rápida que render_voxels.
+    Todos los cuadros comparten ejes (altura máxima de la pila) y figura.
+    Un out_dir relativo se interpreta dentro de results/.
+    """
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    out_dir = out_dir if os.path.isabs(out_dir) else os.path.join(RESULTS_DIR, out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    if indices is None:
+        indices = range(len(snapshots))
+    indices = list(indices)
+    z_max = max((int(np.max(snapshots[k][1])) for k in indices), default=1)
+
+    with matplotlib.rc_context({"figure.max_open_warning": 0}):
+        fig = plt.figure(figsize=(7, 6))
+        ax = fig.add_subplot(111, projection="3d")
+        paths = []
+        for n, k in enumerate(indices):
+            t, heights, conv = snapshots[k]
+            ax.cla()
+            ax.view_init(elev=elev, azim=azim)
+            render_voxels(ax, np.asarray(heights), z_max=max(z_max, 1), **render_kwargs)
+            ax.set_xlabel("x")
+            ax.set_ylabel("y")
+            ax.set_zlabel("height")
+            ax.set_title(f"Crystal at t={t:.2f}, conv={conv:.1f}%")
+            path = os.path.join(out_dir, f"{prefix}_{n:05d}.png")
+            fig.savefig(path, dpi=dpi)
+            paths.append(path)
+        plt.close(fig)
+    return paths
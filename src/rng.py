@@ -0,0 +1,68 @@
+import numpy as np
+from typing import Optional
+
+# =============================
+# Uniformes por bloques para el bucle de eventos
+# =============================
+class UniformBuffer:
+    """
+    Sirve uniformes en [0, 1) desde bloques de `block` números generados de
+    una vez con rng.random(block), en lugar de una llamada a NumPy por
+    número (la sobrecarga de cada llamada domina step() en redes pequeñas).
+
+    - random(): siguiente uniforme del bloque (se rellena al agotarse).
+    - integers(n): entero en [0, n) como floor(u * n), el mismo mapeo que el
+      núcleo compilado de jit.py.
+    - block=0 desactiva el búfer y delega en rng.random()/rng.integers(), lo
+      que reproduce el flujo de números de versiones anteriores.
+
+    La secuencia depende solo de la semilla y de `block`. get_state() guarda
+    el estado del generador previo al último relleno y la posición en el
+    bloque, así que set_state() regenera exactamente el mismo bloque sin
+    guardar sus números (ver KMC_BKL.save_checkpoint).
+    """
+    def __init__(self, rng: np.random.Generator, block: int = 4096):
+        self.rng = rng
+        self.block = max(0, int(block))
+        self._buf = []
+        self._pos = 0
+        self._fill_state: Optional[dict] = None
+
+    def _refill(self):
+        self._fill_state = self.rng.bit_generator.state
+        self._buf = self.rng.random(self.block).tolist()
+        self._pos = 0
+
+    def random(self) -> float:
+        if not self.block:
+            return self.rng.random()
+        if self._pos >= len(self._buf):
+            self._refill()
+        u = self._buf[self._pos]
+        self._pos += 1
+        return u
+
+    def integers(self, n: int) -> int:
+        if not self.block:
+            return int(self.rng.integers(0, n))
+        k = int(self.random() * n)
+        return k if k < n else n - 1
+
+    @property
+    def remaining(self) -> int:
+        return len(self._buf) - self._pos
+
+    # ---- Checkpoints ----
+    def get_state(self) -> dict:
+        return {"block": self.block, "pos": self._pos, "fill_state": self._fill_state}
+
+    def set_state(self, state: dict):
+        """Restaura el bloque en curso; el estado actual del generador no cambia."""
+        self.block = int(state["block"])
+        self._buf, self._pos, self._fill_state = [], 0, None
+        if state["fill_state"] is not None:
+            current = self.rng.bit_generator.state
+            self.rng.bit_generator.state = state["fill_state"]
+            self._refill()
+            self.rng.bit_generator.state = current
+            self._pos = int(state["pos"])
@@ -0,0 +1,174 @@
+import os
+import json
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+# Carpeta de resultados del repositorio (MalariaProject/results)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
+
+# =============================
+# Almacén de snapshots en disco (memmap)
+# =============================
+class SnapshotStore:
+    """
+    Pila de snapshots (t, heights, conversión) guardada en disco como arreglos
+    .npy mapeados en memoria dentro de un directorio:
+        heights.npy (n, Lx, Ly) int32, times.npy (n,), conversion.npy (n,), meta.json
+    Las alturas nunca se acumulan en RAM: run() escribe cada snapshot
+    directamente en el archivo y la lectura es perezosa (np.memmap).
+
+    Se comporta como la lista que devuelve run(): len(store), store[k] devuelve
+    (t, heights, conv) y se puede pasar a plot_crystal_3d(snapshots=store).
+    Un directorio relativo se interpreta dentro de results/.
+    """
+    def __init__(self, path: str, overwrite: bool = False):
+        self.path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        self.n = 0
+        self._heights = None
+        self._times = None
+        self._conv = None
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._file("meta.json")) and not overwrite:
+            self._open_existing()
+
+    @classmethod
+    def open(cls, path: str) -> "SnapshotStore":
+        """Abre un almacén existente en modo solo lectura."""
+        store = cls.__new__(cls)
+        store.path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        if not os.path.exists(store._file("meta.json")):
+            raise FileNotFoundError(f"No hay snapshots en {store.path}")
+        store._open_existing(mmap_mode="r")
+        return store
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open_existing(self, mmap_mode: str = "r+"):
+        with open(self._file("meta.json")) as f:
+            meta = json.load(f)
+        self.n = int(meta["n"])
+        self._heights = np.load(self._file("heights.npy"), mmap_mode=mmap_mode)
+        self._times = np.load(self._file("times.npy"), mmap_mode=mmap_mode)
+        self._conv = np.load(self._file("conversion.npy"), mmap_mode=mmap_mode)
+
+    # ---- Escritura ----
+    def reserve(self, n: int, shape: Tuple[int, int]):
+        """Crea o amplía los archivos para al menos n snapshots de forma shape."""
+        shape = tuple(int(x) for x in shape)
+        n = max(1, int(n))
+        if self._heights is not None:
+            if self._heights.shape[1:] != shape:
+                raise ValueError(f"Forma {shape} incompatible con el almacén {self._heights.shape[1:]}")
+            if self._heights.shape[0] >= n:
+                return
+        old = (self._heights, self._times, self._conv)
+        self._heights = self._times = self._conv = None
+        self._heights = self._resize("heights.npy", old[0], np.int32, (n,) + shape)
+        self._times = self._resize("times.npy", old[1], np.float64, (n,))
+        self._conv = self._resize("conversion.npy", old[2], np.float64, (n,))
+        del old
+        self.flush()
+
+    def _resize(self, name: str, old: Optional[np.ndarray], dtype, shape) -> np.ndarray:
+        # Se escribe un archivo nuevo y se copia por bloques: los snapshots ya
+        # guardados nunca se cargan completos en RAM.
+        final = self._file(name)
+        tmp = final + ".tmp"
+        new = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+        if old is not None:
+            for start in range(0, self.n, 64):
+                stop = min(self.n, start + 64)
+                new[start:stop] = old[start:stop]
+        new.flush()
+        del new
+        os.replace(tmp, final)
+        return np.load(final, mmap_mode="r+")
+
+    def append(self, t: float, heights: np.ndarray, conversion: float):
+        if self._heights is None:
+            self.reserve(16, heights.shape)
+        elif self.n >= self._heights.shape[0]:
+            self.reserve(2 * self._heights.shape[0], heights.shape)
+        self._heights[self.n] = heights
+        self._times[self.n] = t
+        self._conv[self.n] = conversion
+        self.n += 1
+
+    def flush(self):
+        for a in (self._heights, self._times, self._conv):
+            if isinstance(a, np.memmap) and a.mode != "r":
+                a.flush()
+        shape = list(self._heights.shape[1:]) if self._heights is not None else None
+        with open(self._file("meta.json"), "w") as f:
+            json.dump({"n": self.n, "shape": shape}, f)
+
+    # ---- Lectura ----
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times[:self.n]
+
+    @property
+    def conversion(self) -> np.ndarray:
+        return self._conv[:self.n]
+
+    @property
+    def heights(self) -> np.ndarray:
+        """Pila (n, Lx, Ly) como memmap; solo se lee de disco lo que se indexa."""
+        return self._heights[:self.n]
+
+    def __getitem__(self, k: int) -> Tuple[float, np.ndarray, float]:
+        if k < 0:
+            k += self.n
+        if not 0 <= k < self.n:
+            raise IndexError("SnapshotStore index out of range")
+        return float(self._times[k]), self._heights[k], float(self._conv[k])
+
+    def __iter__(self):
+        for k in range(self.n):
+            yield self[k]
+
+    def nearest(self, t: float) -> int:
+        """Índice del snapshot con tiempo más cercano a t (búsqueda binaria)."""
+        return _nearest_sorted(self.times, t)
+
+
+def _nearest_sorted(times: Sequence[float], t: float) -> int:
+    # Búsqueda binaria sobre tiempos crecientes; en empate gana el anterior
+    lo, hi = 0, len(times)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if times[mid] < t:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == 0:
+        return 0
+    if lo == len(times) or abs(t - times[lo - 1]) <= abs(times[lo] - t):
+        return lo - 1
+    return lo
+
+
+class _SnapshotTimes:
+    # Vista de solo tiempos sobre la lista [(t, heights, conv), ...] de run()
+    def __init__(self, snaps):
+        self.snaps = snaps
+
+    def __len__(self):
+        return len(self.snaps)
+
+    def __getitem__(self, k):
+        return self.snaps[k][0]
+
+
+def nearest_snapshot(snapshots, t: float) -> int:
+    """
+    Índice del snapshot más cercano a t, tanto para un SnapshotStore como para
+    la lista ordenada por tiempo que devuelve run(). O(log n) en ambos casos.
+    """
+    if hasattr(snapshots, "nearest"):
+        return snapshots.nearest(t)
+    return _nearest_sorted(_SnapshotTimes(snapshots), t)
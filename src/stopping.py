@@ -0,0 +1,202 @@
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+def _next_sample(t: float, t0: float, dt: float) -> float:
+    # Siguiente punto de la malla t0 + k·dt estrictamente posterior a t
+    return t0 + dt * (np.floor((t - t0) / dt) + 1)
+
+# =============================
+# Criterios de parada para run()
+# =============================
+class StoppingCriterion:
+    """
+    Interfaz de los criterios de parada de run(stop_criteria=[...]):
+    - reset(kmc): al empezar cada run();
+    - check(kmc) -> bool: True si la simulación debe terminar. run() la llama
+      cada stop_check_every eventos, así que debe ser barata (O(1) amortizado);
+    - report(): magnitudes para run_report["stopping"].
+    `name` es el valor de run_report["stop_reason"] cuando el criterio dispara.
+    """
+    name = "criterion"
+
+    def reset(self, kmc):
+        pass
+
+    def check(self, kmc) -> bool:
+        raise NotImplementedError
+
+    def report(self) -> Dict[str, object]:
+        return {}
+
+
+class TargetConversion(StoppingCriterion):
+    """Para al alcanzar `percent` de conversión."""
+    name = "target_conversion"
+
+    def __init__(self, percent: float):
+        self.percent = float(percent)
+
+    def check(self, kmc) -> bool:
+        return kmc.conversion_percent >= self.percent
+
+    def report(self):
+        return {"percent": self.percent}
+
+
+class BulkExhausted(StoppingCriterion):
+    """Para cuando quedan `min_N_bulk` partículas o menos en solución."""
+    name = "bulk_exhausted"
+
+    def __init__(self, min_N_bulk: int = 0):
+        self.min_N_bulk = int(min_N_bulk)
+
+    def check(self, kmc) -> bool:
+        return kmc.N_bulk <= self.min_N_bulk
+
+    def report(self):
+        return {"min_N_bulk": self.min_N_bulk}
+
+
+class WallClock(StoppingCriterion):
+    """Presupuesto de tiempo de reloj (segundos) para cada run()."""
+    name = "wall_clock"
+
+    def __init__(self, seconds: float):
+        self.seconds = float(seconds)
+        self._t0 = time.perf_counter()
+
+    def reset(self, kmc):
+        self._t0 = time.perf_counter()
+
+    def check(self, kmc) -> bool:
+        return time.perf_counter() - self._t0 >= self.seconds
+
+    def report(self):
+        return {"seconds": self.seconds, "elapsed": time.perf_counter() - self._t0}
+
+
+class ConversionPlateau(StoppingCriterion):
+    """
+    Meseta de conversión: cada `sample_dt` de tiempo simulado se guarda la
+    conversión (%) y se mantiene la recta de mínimos cuadrados de las
+    muestras de la última ventana `window` con sumas móviles (O(1) por
+    muestra). Dispara cuando la ventana está completa, la conversión supera
+    `min_conversion` y |pendiente| <= slope_tol (% por unidad de tiempo).
+    """
+    name = "conversion_plateau"
+
+    def __init__(self, window: float, slope_tol: float, sample_dt: Optional[float] = None,
+                 min_conversion: float = 0.0):
+        if window <= 0 or slope_tol < 0:
+            raise ValueError("window debe ser positiva y slope_tol no negativa")
+        self.window = float(window)
+        self.slope_tol = float(slope_tol)
+        self.sample_dt = float(sample_dt) if sample_dt is not None else self.window / 20
+        self.min_conversion = float(min_conversion)
+        self.slope = float("nan")
+
+    def reset(self, kmc):
+        self._samples = deque()
+        self._t_ref = kmc.t              # origen de tiempos y de la malla de muestreo
+        self._S = np.zeros(4)            # sumas de t, c, t², t·c
+        self._next = kmc.t
+        self.slope = float("nan")
+
+    def _add(self, t: float, c: float, sign: float):
+        x = t - self._t_ref
+        self._S += sign * np.array([x, c, x * x, x * c])
+
+    def check(self, kmc) -> bool:
+        if kmc.t < self._next:
+            return False
+        self._next = _next_sample(kmc.t, self._t_ref, self.sample_dt)
+        c = kmc.conversion_percent
+        q = self._samples
+        q.append((kmc.t, c))
+        self._add(kmc.t, c, 1.0)
+        while kmc.t - q[0][0] > self.window:
+            self._add(*q.popleft(), -1.0)
+        n = len(q)
+        St, Sc, Stt, Stc = self._S
+        den = n * Stt - St * St
+        if n < 3 or den <= 0:
+            return False
+        self.slope = float((n * Stc - St * Sc) / den)
+        full = kmc.t - q[0][0] >= self.window - self.sample_dt
+        return full and c >= self.min_conversion and abs(self.slope) <= self.slope_tol
+
+    def report(self):
+        return {"window": self.window, "slope_tol": self.slope_tol,
+                "sample_dt": self.sample_dt, "slope": self.slope}
+
+
+class SurfaceSteadyState(StoppingCriterion):
+    """
+    Estado estacionario estadístico de un observable de superficie
+    (SurfaceObservables: "roughness", "mean_height", "coverage" o
+    "step_density"). Cada `sample_dt` guarda una muestra y compara las dos
+    mitades de las últimas 2·n_samples: dispara si la diferencia de medias
+    no supera z veces su error estándar más rel_tol·|media| (deriva ya
+    despreciable). Activa los observables incrementales de KMC_BKL.
+    """
+    name = "surface_steady_state"
+    OBSERVABLES = ("roughness", "mean_height", "coverage", "step_density")
+
+    def __init__(self, sample_dt: float, observable: str = "roughness", n_samples: int = 20,
+                 z: float = 2.0, rel_tol: float = 0.0):
+        if observable not in self.OBSERVABLES:
+            raise ValueError(f"observable debe ser uno de {self.OBSERVABLES}")
+        self.sample_dt = float(sample_dt)
+        self.observable = observable
+        self.n_samples = max(2, int(n_samples))
+        self.z = float(z)
+        self.rel_tol = float(rel_tol)
+        self.difference = float("nan")
+
+    def reset(self, kmc):
+        kmc.enable_observables()
+        self._samples = deque(maxlen=2 * self.n_samples)
+        self._t_ref = self._next = kmc.t
+        self.difference = float("nan")
+
+    def check(self, kmc) -> bool:
+        if kmc.t < self._next:
+            return False
+        self._next = _next_sample(kmc.t, self._t_ref, self.sample_dt)
+        self._samples.append(getattr(kmc.obs, self.observable))
+        if len(self._samples) < self._samples.maxlen:
+            return False
+        x = np.array(self._samples)
+        a, b = x[:self.n_samples], x[self.n_samples:]
+        self.difference = float(abs(b.mean() - a.mean()))
+        se = np.sqrt((a.var(ddof=1) + b.var(ddof=1)) / self.n_samples)
+        return self.difference <= self.z * se + self.rel_tol * abs(x.mean())
+
+    def report(self):
+        return {"observable": self.observable, "sample_dt": self.sample_dt,
+                "n_samples": self.n_samples, "difference": self.difference}
+
+
+class StoppingRules:
+    """Conjunto de criterios: el primero que dispara da el motivo de parada."""
+    def __init__(self, criteria: Sequence[StoppingCriterion]):
+        self.criteria: List[StoppingCriterion] = list(criteria)
+        self.fired: Optional[StoppingCriterion] = None
+
+    def reset(self, kmc):
+        self.fired = None
+        for c in self.criteria:
+            c.reset(kmc)
+
+    def check(self, kmc) -> Optional[str]:
+        for c in self.criteria:
+            if c.check(kmc):
+                self.fired = c
+                return c.name
+        return None
+
+    def report(self) -> Dict[str, object]:
+        return {"fired": self.fired.name if self.fired is not None else None,
+                "criteria": {c.name: c.report() for c in self.criteria}}
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+
+# =============================
+# Registros del flujo de KMC_BKL.iter_run()
+# =============================
+RECORD_KINDS = ("snapshot", "grid", "progress", "stop")
+
+@dataclass
+class RunRecord:
+    """
+    Registro ligero emitido por iter_run():
+    - "snapshot": estado tras el primer evento con t >= t (como run()).
+    - "grid": estado vigente en t, el anterior al primer evento con t
+      posterior (como conversion_on_grid); sin counts ni heights.
+    - "progress": cada progress_every eventos, con t = tiempo actual.
+    - "stop": último registro; stop_reason como run_report["stop_reason"].
+
+    heights es una vista de lat.heights (no una copia) y solo es válida hasta
+    que el generador avance: quien quiera conservarla debe copiarla.
+    """
+    kind: str
+    t: float
+    conversion: float
+    N_bulk: int
+    n_events: int
+    counts: Optional[Dict[str, int]] = None
+    heights: Optional[np.ndarray] = None
+    stop_reason: Optional[str] = None
+
+
+def print_progress(rec: RunRecord):
+    """Callback de progreso equivalente al antiguo print de run() en modo debug."""
+    print(f"⏱️ t={rec.t:.4e} | Events={rec.n_events} | Conv={rec.conversion:.1f}%")
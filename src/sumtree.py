@@ -0,0 +1,67 @@
+import numpy as np
+
+# =============================
+# Árbol binario de sumas para selección de eventos en O(log N)
+# =============================
+class SumTree:
+    """
+    Árbol de sumas sobre n hojas no negativas (propensiones).
+    - tree[1] es la suma total; las hojas viven en tree[size:size+n].
+    - update(i, w) y find(u) cuestan O(log n).
+    Los nodos internos se recalculan como suma de sus hijos (no se acumulan
+    diferencias), así no hay deriva numérica aunque las propensiones difieran
+    en muchos órdenes de magnitud.
+    """
+    def __init__(self, n_leaves: int):
+        self.n = int(n_leaves)
+        size = 1
+        while size < self.n:
+            size *= 2
+        self.size = size
+        self.tree = np.zeros(2 * size, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    @property
+    def leaves(self) -> np.ndarray:
+        return self.tree[self.size:self.size + self.n]
+
+    def update(self, i: int, value: float):
+        tree = self.tree
+        j = i + self.size
+        tree[j] = value
+        j //= 2
+        while j >= 1:
+            tree[j] = tree[2 * j] + tree[2 * j + 1]
+            j //= 2
+
+    def set_all(self, values: np.ndarray):
+        """Carga todas las hojas y reconstruye el árbol en O(n)."""
+        tree = self.tree
+        tree[self.size:] = 0.0
+        tree[self.size:self.size + self.n] = values
+        level = self.size
+        while level > 1:
+            half = level // 2
+            tree[half:level] = tree[level:2 * level:2] + tree[level + 1:2 * level:2]
+            level = half
+
+    def find(self, u: float) -> int:
+        """Hoja i tal que sum(leaves[:i]) <= u < sum(leaves[:i+1]), para u en [0, total)."""
+        tree = self.tree
+        j = 1
+        while j < self.size:
+            left = tree[2 * j]
+            if u < left:
+                j = 2 * j
+            else:
+                u -= left
+                j = 2 * j + 1
+        i = j - self.size
+        # protección ante redondeo: nunca devolver una hoja vacía o de relleno
+        if i >= self.n or tree[j] <= 0.0:
+            nz = np.flatnonzero(self.leaves > 0.0)
+            i = int(nz[-1]) if len(nz) else 0
+        return i
@@ -0,0 +1,123 @@
+import os
+import json
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+from history import EventLog, EVENT_CODES
+from snapshots import RESULTS_DIR
+
+_ADS, _DES = EVENT_CODES["adsorption"], EVENT_CODES["desorption"]
+_MIG, _INC = EVENT_CODES["migration"], EVENT_CODES["incorporation"]
+
+# =============================
+# Trayectoria: keyframes dispersos + flujo de eventos
+# =============================
+class Trajectory:
+    """
+    Formato compacto de una corrida: alturas completas (keyframes) cada
+    `keyframe_every` eventos más la historia de eventos (t, tipo, sitio,
+    destino). state_at(t) reconstruye heights, N_bulk y N_inc en cualquier
+    instante sin volver a simular:
+
+    1. busca el último keyframe con tiempo <= t (búsqueda binaria);
+    2. aplica en bloque los eventos posteriores con tiempo <= t: los cambios
+       de altura son sumas (np.add.at), así que no importa el orden; N_bulk
+       se reconstruye con la suma acumulada y el mismo tope en 0 que step()
+       (un camino reflejado en 0 solo depende del mínimo de la suma).
+
+    El coste es O(N sitios + keyframe_every) por consulta. El estado en t es
+    el posterior a todos los eventos con tiempo <= t. Necesita la historia
+    completa (history_mode="full"); con KMC_BKL se activa mediante
+    enable_trajectory() y se guarda o carga con save()/load().
+    """
+    def __init__(self, shape: Tuple[int, int], keyframe_every: int = 10_000,
+                 history: Optional[EventLog] = None):
+        self.shape = tuple(int(x) for x in shape)
+        self.keyframe_every = max(1, int(keyframe_every))
+        self.history = history
+        self.kf_t: List[float] = []
+        self.kf_event: List[int] = []     # eventos de la historia anteriores al keyframe
+        self.kf_heights: List[np.ndarray] = []
+        self.kf_N_bulk: List[int] = []
+        self.kf_N_inc: List[int] = []
+        self._events = None                # columnas (t, code, site, target) tras load()
+
+    # ---- Grabación ----
+    def add_keyframe(self, t: float, n_event: int, heights: np.ndarray, N_bulk: int, N_inc: int):
+        self.kf_t.append(float(t))
+        self.kf_event.append(int(n_event))
+        self.kf_heights.append(np.array(heights, dtype=np.int32).reshape(self.shape))
+        self.kf_N_bulk.append(int(N_bulk))
+        self.kf_N_inc.append(int(N_inc))
+
+    def maybe_keyframe(self, kmc):
+        n = len(kmc.history)
+        if n - self.kf_event[-1] >= self.keyframe_every:
+            self.add_keyframe(kmc.t, n, kmc.lat.heights, kmc.N_bulk, kmc.N_inc)
+
+    def _columns(self):
+        if self._events is not None:
+            return self._events
+        h = self.history
+        return h.times, h.codes, h.sites, h.targets
+
+    # ---- Reconstrucción ----
+    def state_at(self, t: float) -> Tuple[np.ndarray, int, int]:
+        """(heights, N_bulk, N_inc) tras todos los eventos con tiempo <= t."""
+        if not self.kf_t:
+            raise ValueError("La trayectoria no tiene keyframes")
+        k = int(np.searchsorted(self.kf_t, t, side="right")) - 1
+        if k < 0:
+            raise ValueError(f"t={t} es anterior al primer keyframe (t={self.kf_t[0]})")
+        times, codes, sites, targets = self._columns()
+        e0 = self.kf_event[k]
+        e1 = max(e0, int(np.searchsorted(times, t, side="right")))
+        codes, sites, targets = codes[e0:e1], sites[e0:e1], targets[e0:e1]
+
+        h = self.kf_heights[k].astype(np.int64).ravel()
+        np.add.at(h, sites[codes == _ADS], 1)
+        np.add.at(h, sites[codes == _DES], -1)
+        mig = (codes == _MIG) & (targets >= 0)
+        np.add.at(h, sites[mig], -1)
+        np.add.at(h, targets[mig], 1)
+
+        # N_bulk: +1 por desorción, -1 por adsorción, nunca por debajo de 0
+        d = (codes == _DES).astype(np.int64) - (codes == _ADS)
+        N_bulk = self.kf_N_bulk[k]
+        if len(d):
+            S = N_bulk + np.cumsum(d)
+            N_bulk = int(S[-1] + max(0, -min(0, int(S.min()))))
+        N_inc = self.kf_N_inc[k] + int(np.count_nonzero(codes == _INC))
+        return h.reshape(self.shape).astype(np.int32), N_bulk, N_inc
+
+    def states_at(self, times: Iterable[float]) -> List[Tuple[float, np.ndarray, int, int]]:
+        """state_at para varios instantes: lista de (t, heights, N_bulk, N_inc)."""
+        return [(float(t),) + self.state_at(t) for t in times]
+
+    # ---- Disco ----
+    def save(self, path: str) -> str:
+        """Guarda keyframes y eventos en un .npz (relativo = dentro de results/)."""
+        path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        times, codes, sites, targets = self._columns()
+        meta = {"shape": list(self.shape), "keyframe_every": self.keyframe_every}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)),
+                            kf_t=np.array(self.kf_t), kf_event=np.array(self.kf_event, dtype=np.int64),
+                            kf_heights=np.stack(self.kf_heights),
+                            kf_N_bulk=np.array(self.kf_N_bulk, dtype=np.int64),
+                            kf_N_inc=np.array(self.kf_N_inc, dtype=np.int64),
+                            ev_t=times, ev_code=codes, ev_site=sites, ev_target=targets)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Trajectory":
+        path = path if os.path.isabs(path) else os.path.join(RESULTS_DIR, path)
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            traj = cls(meta["shape"], meta["keyframe_every"])
+            traj.kf_t = data["kf_t"].tolist()
+            traj.kf_event = data["kf_event"].tolist()
+            traj.kf_heights = list(data["kf_heights"])
+            traj.kf_N_bulk = data["kf_N_bulk"].tolist()
+            traj.kf_N_inc = data["kf_N_inc"].tolist()
+            traj._events = (data["ev_t"], data["ev_code"], data["ev_site"], data["ev_target"])
+        return traj
@@ -0,0 +1,22 @@
+"""
+Utilidades comunes de los tests: los parámetros del notebook de
+beta-hematina y un constructor de KMC_BKL sobre una red ya inicializada.
+"""
+from src.params import KMCParams
+from src.lattice import LatticeSOS
+from src.bkl import KMC_BKL
+
+def notebook_params(**overrides) -> KMCParams:
+    """Parámetros de notebooks/VisualizationkMC.ipynb; overrides cambia campos sueltos."""
+    kw = dict(T=302.15, K0_plus=0.25, K_inc_plus=0.25,
+              E_pb_over_kT=1.5, phi_over_kT=3.5, delta=0.63,
+              V=0.708, C_eq=50)
+    kw.update(overrides)
+    return KMCParams(**kw)
+
+def make_kmc(params: KMCParams, size, N_bulk0: int, rng_seed: int, lat_seed: int = 1,
+             init_mode: str = "random_surface", max_roughness: int = 2, **engine_kwargs) -> KMC_BKL:
+    """LatticeSOS(size, lat_seed) inicializada con init_mode y un KMC_BKL sobre ella."""
+    lat = LatticeSOS(size=size, seed=lat_seed)
+    lat.initialize(init_mode, max_roughness=max_roughness)
+    return KMC_BKL(lat, params, N_bulk0=N_bulk0, rng_seed=rng_seed, **engine_kwargs)
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from src.params import KMCParams
+from src.bkl import KMC_BKL
+from src.rates import RateTable, rate_migration
+from tests.helpers import notebook_params, make_kmc
+
+class TestMigrationScaling(unittest.TestCase):
+    """
+    El escalado de la migración solo actúa con ciclos de migración frecuentes
+    y separación de tasas suficiente, conserva la masa, reduce el número de
+    eventos por unidad de tiempo, no sesga conversión ni rugosidad con el
+    criterio por defecto y se reanuda bit a bit desde un checkpoint.
+    """
+    def setUp(self):
+        # Migración muy rápida frente a la incorporación
+        self.params = KMCParams(
+            T=302.15, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=9.0, delta=0.3,
+            V=1.0, C_eq=30
+        )
+
+    def _kmc(self, size=12, rng_seed=3, **kw):
+        return make_kmc(self.params, size, N_bulk0=3000, rng_seed=rng_seed, incremental=True, **kw)
+
+    def _enable_fast(self, kmc):
+        # Solo la incorporación como evento lento: el escalado se activa aquí
+        with self.assertWarns(RuntimeWarning):
+            kmc.enable_migration_scaling(check_every=200, slow_events=("incorporation",))
+
+    def test_rate_table_scale(self):
+        rt = RateTable()
+        rt.refresh(self.params, 1000, 1000)
+        rt.set_migration_scale(0.25)
+        rt.refresh(self.params, 1000, 1000)
+        self.assertAlmostEqual(rt.mig[1], 0.25 * rate_migration(self.params, 1))
+
+    def test_scaling_saves_events(self):
+        total = 3000 + int(self._kmc().lat.heights.sum())
+        plain = self._kmc(history_mode="off")
+        plain.run(0.05)
+        fast = self._kmc(history_mode="off")
+        self._enable_fast(fast)
+        fast.run(0.05)
+
+        rep = fast.run_report["acceleration"]
+        self.assertGreater(rep["n_scale_down"], 0)
+        self.assertLess(rep["min_scale"], 1.0)
+        self.assertGreaterEqual(rep["min_separation"], rep["config"]["min_separation"])
+        self.assertGreater(rep["events_saved"], 0)
+        self.assertLess(fast.n_events, plain.n_events)
+        self.assertEqual(fast.N_bulk + int(fast.lat.heights.sum()), total)
+
+    def test_separation_guard(self):
+        # Por defecto adsorción y desorción son eventos lentos: no hay separación
+        kmc = self._kmc(history_mode="off")
+        kmc.enable_migration_scaling(check_every=200)
+        kmc.run(0.02)
+        self.assertEqual(kmc.run_report["acceleration"]["n_scale_down"], 0)
+        self.assertEqual(kmc.rates.mig_scale, 1.0)
+        with self.assertRaises(ValueError):
+            kmc.disable_migration_scaling()
+            kmc.enable_migration_scaling(slow_events=("migration",))
+
+    def test_default_guard_matches_exact_statistics(self):
+        # Conversión y rugosidad medias sobre semillas: escalado por defecto
+        # frente a la corrida exacta, dentro de 3 errores estándar
+        self.params = KMCParams(
+            T=302.15, K0_plus=1.0, K_inc_plus=0.5,
+            E_pb_over_kT=1.0, phi_over_kT=9.0, delta=0.3,
+            V=1.0, C_eq=30
+        )
+        stats = {}
+        for scaled in (False, True):
+            vals = []
+            for seed in range(4):
+                kmc = self._kmc(size=10, rng_seed=seed, history_mode="off")
+                if scaled:
+                    kmc.enable_migration_scaling(check_every=200)
+                kmc.run(0.2)
+                vals.append((kmc.conversion_percent, kmc.lat.heights.std()))
+            vals = np.array(vals)
+            stats[scaled] = (vals.mean(axis=0), vals.std(axis=0, ddof=1) / np.sqrt(len(vals)))
+        (m0, se0), (m1, se1) = stats[False], stats[True]
+        tol = 3 * np.sqrt(se0 ** 2 + se1 ** 2) + 1e-3
+        self.assertLessEqual(abs(m1[0] - m0[0]), tol[0])   # conversión
+        self.assertLessEqual(abs(m1[1] - m0[1]), tol[1])   # rugosidad RMS
+
+    def test_notebook_parameters_stay_exact(self):
+        # Con los parámetros del notebook la migración de un ciclo no es
+        # min_separation veces más rápida que su salida: la escala no baja y
+        # la trayectoria coincide con la exacta
+        params = notebook_params()
+        runs = []
+        for scaled in (False, True):
+            kmc = make_kmc(params, [15, 15], N_bulk0=1000, rng_seed=3, lat_seed=42,
+                           init_mode="flat", incremental=True, history_mode="off")
+            if scaled:
+                kmc.enable_migration_scaling(check_every=200)
+            kmc.run(0.5)
+            runs.append(kmc)
+        plain, scaled = runs
+        rep = scaled.run_report["acceleration"]
+        self.assertGreater(rep["cyclic_migrations"], 0)
+        self.assertLess(rep["min_separation"], rep["config"]["min_separation"])
+        self.assertEqual(rep["n_scale_down"], 0)
+        self.assertEqual(scaled.n_events, plain.n_events)
+        np.testing.assert_array_equal(scaled.lat.heights, plain.lat.heights)
+
+    def test_checkpoint_resume(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ref = self._kmc()
+        self._enable_fast(ref)
+        ref.run(0.03)
+
+        path = os.path.join(tmp.name, "accel.npz")
+        first = self._kmc()
+        self._enable_fast(first)
+        first.run(0.03, max_events=800, checkpoint_path=path)
+        self.assertEqual(first.n_events, 800)
+        with self.assertWarns(RuntimeWarning):
+            resumed = KMC_BKL.load_checkpoint(path)
+        self.assertEqual(resumed.rates.mig_scale, first.rates.mig_scale)
+        resumed.run(0.03)
+
+        np.testing.assert_array_equal(resumed.lat.heights, ref.lat.heights)
+        self.assertEqual((resumed.t, resumed.n_events), (ref.t, ref.n_events))
+        self.assertEqual(resumed.accel.stats, ref.accel.stats)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+
+from src.bins import IndexedSiteSet, ClassBins
+
+class TestIndexedSiteSet(unittest.TestCase):
+    """
+    Inserción, borrado por intercambio y muestreo de conjuntos de índices planos.
+    """
+    def setUp(self):
+        self.pos = np.full(100, -1, dtype=np.int32)
+        self.s = IndexedSiteSet(self.pos, capacity=2)
+
+    def test_add_remove_keeps_positions_consistent(self):
+        for idx in [5, 17, 3, 99, 42]:
+            self.s.add(idx)
+        self.s.remove(17)
+        self.s.remove(42)
+        self.assertEqual(sorted(self.s), [3, 5, 99])
+        for k, idx in enumerate(self.s.to_array()):
+            self.assertEqual(self.pos[idx], k)
+        self.assertNotIn(17, self.s)
+        self.assertEqual(self.pos[17], -1)
+
+    def test_draw_is_uniform_over_members(self):
+        for idx in [1, 2, 3, 4]:
+            self.s.add(idx)
+        rng = np.random.default_rng(0)
+        draws = [self.s.draw(rng) for _ in range(4000)]
+        counts = np.bincount(draws, minlength=5)[1:]
+        self.assertTrue(np.all(np.abs(counts - 1000) < 150))
+
+class TestClassBins(unittest.TestCase):
+    def test_assign_moves_between_classes(self):
+        b = ClassBins(n_classes=3, n_sites=10)
+        b.rebuild(np.array([0, 1, 2, -1, 0, 0, 1, -1, 2, 2], dtype=np.int8))
+        self.assertEqual(b.counts.tolist(), [3, 2, 3])
+        b.assign(4, 2)
+        b.assign(3, 1)
+        b.assign(8, -1)
+        self.assertEqual(b.counts.tolist(), [2, 3, 3])
+        self.assertEqual(sorted(b.sets[2]), [2, 4, 9])
+        self.assertEqual(sorted(b.sets[1]), [1, 3, 6])
+        self.assertEqual(b.cls[8], -1)
+
+if __name__ == '__main__':
+    unittest.main()
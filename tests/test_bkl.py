@@ -2,6 +2,9 @@ import unittest
 import numpy as np
 import sys
 import os
+import tempfile
+import io
+import contextlib
 
 # Ajuste de path para encontrar src
 #sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
@@ -9,6 +12,8 @@ import os
 from src.params import KMCParams
 from src.lattice import LatticeSOS
 from src.bkl import KMC_BKL
+from src.rates import EVENT_TYPES
+from tests.helpers import notebook_params, make_kmc
 
 class TestKMCLogic(unittest.TestCase):
     """
@@ -96,5 +101,229 @@ class TestKMCLogic(unittest.TestCase):
         # Si usas N_inc directamente:
         self.assertEqual(self.kmc.conversion_percent, (self.kmc.N0 - self.kmc.N_bulk)/self.kmc.N0 * 100)
 
+class TestIncrementalBins(unittest.TestCase):
+    """
+    El modo incremental debe mantener exactamente los mismos bins que la
+    clasificación completa de la red tras cada evento.
+    """
+    def setUp(self):
+        self.params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=1.0, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+        self.lat = LatticeSOS(size=[6, 6], seed=7)
+        self.lat.initialize("random_surface", max_roughness=2)
+        self.kmc = KMC_BKL(self.lat, self.params, N_bulk0=500, rng_seed=11,
+                           incremental=True)
+
+    def _assert_bins_match(self):
+        reference = {
+            "adsorption": self.kmc._classify_adsorption_sites(),
+            "desorption": self.kmc._classify_desorption_sites(),
+            "migration": self.kmc._classify_migration_sites(),
+            "incorporation": self.kmc._classify_incorporation_sites(),
+        }
+        for etype, ref_bins in reference.items():
+            for i, ref_sites in ref_bins.items():
+                Ly = self.lat.heights.shape[1]
+                got = {divmod(idx, Ly) for idx in self.kmc._bins[etype].sets[i]}
+                want = {tuple(int(c) for c in s) for s in ref_sites}
+                self.assertEqual(got, want, f"Bin {etype}[{i}] desincronizado")
+                self.assertEqual(self.kmc._bins[etype].counts[i], len(ref_sites))
+
+    def test_bins_match_full_classification(self):
+        for _ in range(300):
+            self.assertTrue(self.kmc.step())
+            self._assert_bins_match()
+
+    def test_refresh_after_external_edit(self):
+        self.kmc.step()
+        self.lat.heights[:] = 1
+        self.kmc.refresh_bins()
+        self.kmc.step()
+        self._assert_bins_match()
+
+class TestIncrementalBinsStrip(TestIncrementalBins):
+    """Bins incrementales sobre una tira rectangular."""
+    def setUp(self):
+        super().setUp()
+        self.lat = LatticeSOS(size=[4, 9], seed=7)
+        self.lat.initialize("random_surface", max_roughness=2)
+        self.kmc = KMC_BKL(self.lat, self.params, N_bulk0=500, rng_seed=11,
+                           incremental=True)
+
+class TestIncrementalBinsTreeSolver(TestIncrementalBins):
+    """Mismas garantías de bins con el selector de árbol de sumas."""
+    def setUp(self):
+        super().setUp()
+        self.kmc = KMC_BKL(self.lat, self.params, N_bulk0=500, rng_seed=11,
+                           incremental=True, solver="tree")
+
+class TestTreeSolverStatistics(unittest.TestCase):
+    """
+    El selector de árbol debe elegir (tipo, clase) con probabilidad
+    conteo * tasa / W, igual que el n-fold way.
+    """
+    def test_selection_frequencies(self):
+        params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.5,
+            E_pb_over_kT=0.5, phi_over_kT=0.5, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+        lat = LatticeSOS(size=[6, 6], seed=4)
+        lat.initialize("random_surface", max_roughness=2)
+        kmc = KMC_BKL(lat, params, N_bulk0=200, rng_seed=8, solver="tree")
+        kmc.rates.refresh(kmc.p, kmc.N_bulk, kmc.N0)
+        kmc._rebuild_bins()
+        kmc._sync_tree()
+
+        expected = kmc._leaf_vals / kmc._leaf_vals.sum()
+        n = 20000
+        hits = np.zeros(len(expected))
+        for _ in range(n):
+            hits[kmc._leaf_types.index(kmc._choose_from_tree())] += 1
+        sigma = np.sqrt(n * expected * (1 - expected)) + 1.0
+        self.assertTrue(np.all(np.abs(hits - n * expected) < 5 * sigma))
+
+    def test_nfold_class_scan(self):
+        lat = LatticeSOS(size=[4, 4], seed=4)
+        kmc = KMC_BKL(lat, KMCParams(T=300, K0_plus=1.0, K_inc_plus=0.5, E_pb_over_kT=0.5,
+                                     phi_over_kT=0.5, delta=0.3, V=1.0, C_eq=50), N_bulk0=200)
+        counts = np.array([3, 0, 5, 2], dtype=np.int64)
+        row = np.array([1.0, 100.0, 0.5, 2.0])
+        n = 20000
+        hits = np.bincount([kmc._choose_class(counts, row) for _ in range(n)], minlength=4)
+        expected = counts * row / np.dot(counts, row)
+        self.assertEqual(hits[1], 0)
+        sigma = np.sqrt(n * expected * (1 - expected)) + 1.0
+        self.assertTrue(np.all(np.abs(hits - n * expected) < 5 * sigma))
+        self.assertEqual(kmc._choose_class(np.zeros(4, dtype=np.int64), row), -1)
+
+    def test_incremental_sync_matches_full(self):
+        # Solo se actualizan las hojas tocadas; el árbol debe coincidir con
+        # el recalculado desde cero tras cada evento
+        params = notebook_params()
+        kmc = make_kmc(params, [8, 8], N_bulk0=300, rng_seed=8, lat_seed=4,
+                       incremental=True, solver="tree")
+        kmc.step()
+        self.assertFalse(kmc._tree_full)
+        for _ in range(300):
+            kmc.step()
+            kmc._sync_tree()
+            expected = np.concatenate([kmc._bins[e].counts * kmc._rate_rows[e] for e in EVENT_TYPES])
+            np.testing.assert_array_equal(kmc._tree.leaves, expected)
+            self.assertAlmostEqual(kmc._tree.total, expected.sum(), delta=1e-9 * expected.sum())
+
+class TestCheckpoint(unittest.TestCase):
+    """
+    Una corrida reanudada desde un checkpoint debe ser idéntica bit a bit a la
+    corrida sin interrumpir (estado final, historia y snapshots posteriores).
+    """
+    engine_kwargs = {"incremental": True}
+
+    def setUp(self):
+        self.params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=1.0, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.t_end = 2.0
+        self.times = np.linspace(0.1, self.t_end, 12)
+
+    def _kmc(self):
+        return make_kmc(self.params, [6, 7], N_bulk0=400, rng_seed=21, lat_seed=3, n_seeds=3,
+                        **self.engine_kwargs)
+
+    def test_resume_is_bit_identical(self):
+        ref = self._kmc()
+        ref_snaps = ref.run(self.t_end, snapshot_times=self.times)
+
+        path = os.path.join(self.tmp.name, "run.npz")
+        first = self._kmc()
+        # max_events simula el corte por tiempo de reloj
+        first.run(self.t_end, snapshot_times=self.times, max_events=400,
+                  checkpoint_path=path, checkpoint_every=50)
+        self.assertEqual(first.n_events, 400)
+        self.assertLess(first.t, self.t_end)
+
+        resumed = KMC_BKL.load_checkpoint(path)
+        snaps = resumed.run(self.t_end, snapshot_times=self.times)
+
+        np.testing.assert_array_equal(resumed.lat.heights, ref.lat.heights)
+        self.assertEqual((resumed.t, resumed.N_bulk, resumed.N_inc, resumed.n_events),
+                         (ref.t, ref.N_bulk, ref.N_inc, ref.n_events))
+        self.assertEqual(resumed.counts, ref.counts)
+        np.testing.assert_array_equal(resumed.history.times, ref.history.times)
+        np.testing.assert_array_equal(resumed.history.sites, ref.history.sites)
+        self.assertEqual(resumed.rng.bit_generator.state, ref.rng.bit_generator.state)
+
+        tail = [s for s in ref_snaps if s[0] > first.t]
+        self.assertEqual(len(snaps), len(tail))
+        for (ta, ha, ca), (tb, hb, cb) in zip(snaps, tail):
+            self.assertEqual((ta, ca), (tb, cb))
+            np.testing.assert_array_equal(ha, hb)
+
+class TestCheckpointTreeRing(TestCheckpoint):
+    """Checkpoint con selector de árbol e historia en anillo."""
+    engine_kwargs = {"incremental": True, "solver": "tree",
+                     "history_mode": "ring", "history_capacity": 64}
+
+class TestCheckpointFullRebuild(TestCheckpoint):
+    """Checkpoint con reconstrucción completa de bins en cada paso."""
+    engine_kwargs = {"incremental": False}
+
+class TestAmortizedValidation(unittest.TestCase):
+    """
+    Modos de validación en debug: no alteran la trayectoria, respetan su
+    frecuencia y el modo local detecta bins corruptos en la vecindad tocada.
+    """
+    def setUp(self):
+        self.params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=1.0, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+
+    def _kmc(self, debug=True, incremental=True, **kw):
+        return make_kmc(self.params, [6, 5], N_bulk0=500, rng_seed=8, lat_seed=2, debug=debug,
+                        incremental=incremental, **kw)
+
+    def _run(self, kmc, n=200):
+        with contextlib.redirect_stdout(io.StringIO()):
+            kmc.run(t_end=np.inf, max_events=n)
+        return kmc
+
+    def test_modes_keep_trajectory(self):
+        for incremental in (True, False):
+            ref = self._run(self._kmc(debug=False, incremental=incremental))
+            for mode in KMC_BKL.VALIDATION_MODES:
+                kmc = self._run(self._kmc(incremental=incremental, validate=mode,
+                                          validate_prob=0.05))
+                np.testing.assert_array_equal(kmc.lat.heights, ref.lat.heights)
+                self.assertEqual(kmc.t, ref.t, mode)
+
+    def test_frequencies(self):
+        self.assertEqual(self._run(self._kmc(validate="interval", validate_every=50)).n_validations, 4)
+        self.assertEqual(self._run(self._kmc(validate="every")).n_validations, 200)
+        # Local: una auditoría completa inicial + una comprobación por evento
+        self.assertEqual(self._run(self._kmc(validate="local")).n_validations, 201)
+
+    def test_local_detects_corruption(self):
+        kmc = self._run(self._kmc(validate="local"), n=20)
+        idx = 7
+        d = kmc._bins["desorption"]
+        d.assign(idx, (int(d.cls[idx]) + 1) % 5)
+        with self.assertRaises(AssertionError):
+            kmc._validate_local((idx,))
+
+    def test_seed_still_required(self):
+        with self.assertRaises(ValueError):
+            KMC_BKL(LatticeSOS(size=4), self.params, N_bulk0=10, debug=True, validate="local")
+        with self.assertRaises(ValueError):
+            self._kmc(validate="sometimes")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
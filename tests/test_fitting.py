@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from dataclasses import replace
+
+from src.fitting import ConversionFitter, load_conversion_data, _evaluate_task
+from tests.helpers import notebook_params
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "notebooks", "beta-hematina.txt")
+
+class TestConversionFitter(unittest.TestCase):
+    """
+    Ajuste contra curvas de conversión: lectura de datos, rechazo temprano,
+    memoización (también en disco) y búsqueda aleatoria.
+    """
+    def setUp(self):
+        self.params = notebook_params(S_floor=-5, S_ceil=8)
+        self.kw = dict(size=[6, 6], N_bulk0=300, init_mode="random_surface",
+                       n_seeds=5, n_workers=1, sim_time_per_hour=0.02)
+
+    def test_load_data(self):
+        t, conv, err = load_conversion_data(DATA)
+        self.assertEqual(t.shape, conv.shape)
+        self.assertEqual(t.shape, err.shape)
+        self.assertEqual(t[0], 0.0)
+
+    def test_early_rejection_and_memo(self):
+        t = np.array([0.0, 1.0, 2.0, 3.0])
+        # Curva imposible: salta al 100 % en la primera hora
+        data = (t, np.array([0.0, 100.0, 100.0, 100.0]), np.ones(4))
+        fitter = ConversionFitter(data, self.params, **self.kw)
+        ev = fitter.score(self.params)
+        self.assertTrue(ev.rejected)
+        self.assertEqual(ev.chi2, np.inf)
+        self.assertLess(ev.n_points, len(t))
+        # Segunda llamada: mismo objeto, sin simular de nuevo
+        self.assertIs(fitter.score(self.params), ev)
+
+    def test_band_applies_to_replica_mean(self):
+        t = np.array([0.0, 1.0, 2.0, 3.0])
+        fitter = ConversionFitter((t, np.zeros(4), np.ones(4)), self.params, n_replicas=2, **self.kw)
+        task = dict(fitter._task(self.params), tol=np.full(4, np.inf))
+        first = np.array(_evaluate_task(dict(task, n_replicas=1))["curve"])
+        mean = np.array(_evaluate_task(task)["curve"])
+        self.assertFalse(np.array_equal(first, mean))
+        # Datos = primera réplica; la segunda sola sale de la banda, la media no
+        task.update(conv_exp=first, tol=1.01 * np.abs(mean - first) + 1e-9)
+        out = _evaluate_task(task)
+        self.assertFalse(out["rejected"])
+        self.assertEqual(out["n_points"], 4)
+        self.assertTrue(np.isfinite(out["chi2"]))
+
+    def test_max_events_is_not_rejection(self):
+        t = np.array([0.0, 1.0, 2.0, 3.0])
+        kw = dict(self.kw, max_events=5)
+        ev = ConversionFitter((t, np.zeros(4), np.full(4, 1e3)), self.params, **kw).score(self.params)
+        self.assertTrue(ev.exhausted)
+        self.assertFalse(ev.rejected)
+        self.assertEqual(ev.chi2, np.inf)
+        self.assertLess(ev.n_points, len(t))
+
+    def test_self_consistent_fit_and_disk_cache(self):
+        t = np.array([0.0, 1.0, 2.0])
+        probe = ConversionFitter((t, np.zeros(3), np.ones(3)), self.params,
+                                 band=1e9, **self.kw)
+        curve = np.array(probe.score(self.params).curve)
+        data = (t, curve, np.ones(3))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            fitter = ConversionFitter(data, self.params, cache_path=path, **self.kw)
+            ev = fitter.score(self.params)
+            self.assertFalse(ev.rejected)
+            self.assertEqual(ev.chi2, 0.0)
+            # Un candidato claramente peor queda con chi2 mayor
+            worse = fitter.score(replace(self.params, K0_plus=1e-4))
+            self.assertGreater(worse.chi2, ev.chi2)
+            # La caché en disco reproduce las evaluaciones
+            again = ConversionFitter(data, self.params, cache_path=path, **self.kw)
+            self.assertEqual(len(again.cache), 2)
+            self.assertEqual(again.score(worse.params).chi2, worse.chi2)
+
+            best, history = fitter.fit({"delta": (0.5, 0.7)}, n_samples=3, n_rounds=2)
+            self.assertEqual(len(history), 6)
+            self.assertEqual(best.chi2, min(h.chi2 for h in history))
+
+    def test_parallel_matches_serial(self):
+        t = np.array([0.0, 1.0, 2.0])
+        data = (t, np.array([1.0, 5.0, 10.0]), np.full(3, 50.0))
+        cands = [replace(self.params, delta=d) for d in (0.5, 0.6, 0.7)]
+        serial = ConversionFitter(data, self.params, **self.kw).evaluate(cands)
+        kw = dict(self.kw, n_workers=2)
+        parallel = ConversionFitter(data, self.params, **kw).evaluate(cands)
+        self.assertEqual([e.chi2 for e in serial], [e.chi2 for e in parallel])
+        self.assertEqual([e.key for e in serial], [e.key for e in parallel])
+
+if __name__ == '__main__':
+    unittest.main()
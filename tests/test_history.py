@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+from src.history import EventLog
+
+class TestEventLog(unittest.TestCase):
+    """
+    Registro columnar: modos full/ring/decimate/off y compatibilidad con el
+    formato de tuplas (t, evento, sitio).
+    """
+    def _fill(self, log, n):
+        for k in range(n):
+            log.append(float(k), k % 4, k % 12)
+
+    def test_full_grows_and_returns_tuples(self):
+        log = EventLog((3, 4), mode="full", capacity=2)
+        self._fill(log, 10)
+        self.assertEqual(len(log), 10)
+        self.assertEqual(log[0], (0.0, "adsorption", (0, 0)))
+        self.assertEqual(log[-1], (9.0, "desorption", (2, 1)))
+        self.assertEqual(log.codes.dtype, np.uint8)
+        self.assertEqual(log.sites.dtype, np.int32)
+        np.testing.assert_array_equal(log.times, np.arange(10.0))
+
+    def test_ring_keeps_last_events_in_order(self):
+        log = EventLog((3, 4), mode="ring", capacity=4)
+        self._fill(log, 10)
+        self.assertEqual(len(log), 4)
+        self.assertEqual(log.n_total, 10)
+        np.testing.assert_array_equal(log.times, [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual([t for t, _, _ in log], [6.0, 7.0, 8.0, 9.0])
+
+    def test_decimate_and_off(self):
+        log = EventLog((3, 4), mode="decimate", every=3)
+        self._fill(log, 10)
+        np.testing.assert_array_equal(log.times, [0.0, 3.0, 6.0, 9.0])
+        off = EventLog((3, 4), mode="off")
+        self._fill(off, 10)
+        self.assertEqual(len(off), 0)
+        self.assertFalse(off)
+        self.assertEqual(off.n_total, 10)
+
+    def test_extend_matches_append(self):
+        t = np.arange(23.0)
+        codes = (np.arange(23) % 4).astype(np.uint8)
+        sites = (np.arange(23) % 12).astype(np.int32)
+        targets = np.where(codes == 2, (sites + 1) % 12, -1).astype(np.int32)
+        for mode, kw in (("full", {"capacity": 2}), ("ring", {"capacity": 5}),
+                         ("decimate", {"every": 3}), ("off", {})):
+            a = EventLog((3, 4), mode=mode, **kw)
+            b = EventLog((3, 4), mode=mode, **kw)
+            for k in range(23):
+                a.append(t[k], codes[k], sites[k], targets[k])
+            # Bloques de distinto tamaño, incluido uno mayor que la capacidad del anillo
+            for lo, hi in ((0, 4), (4, 5), (5, 17), (17, 23)):
+                b.extend(t[lo:hi], codes[lo:hi], sites[lo:hi], targets[lo:hi])
+            self.assertEqual(a.n_total, b.n_total)
+            self.assertEqual(a.to_list(), b.to_list(), mode)
+            np.testing.assert_array_equal(a.targets, b.targets)
+
+if __name__ == '__main__':
+    unittest.main()
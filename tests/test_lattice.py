@@ -91,5 +91,63 @@ class TestLatticeSOSGeometry(unittest.TestCase):
         for n in neigh_low_eq:
             self.assertIn(n, targets, "Debería poder migrar a sitios de menor o igual altura")
 
+class TestLatticeSOSRectangular(unittest.TestCase):
+    """
+    Redes no cuadradas (tiras para geometrías de step-flow): cada eje debe
+    envolver con su propio periodo.
+    """
+    def setUp(self):
+        self.lat = LatticeSOS(size=[4, 9], seed=0)
+
+    def test_wrap_per_axis(self):
+        self.assertEqual(self.lat.wrap(4, axis=0), 0)
+        self.assertEqual(self.lat.wrap(-1, axis=1), 8)
+        self.assertEqual(self.lat.wrap(4, axis=1), 4)
+
+    def test_neighbors_on_strip(self):
+        self.assertEqual(set(self.lat.neighbors4((0, 8))), {(3, 8), (1, 8), (0, 7), (0, 0)})
+        self.assertEqual(set(self.lat.neighbors4((3, 0))), {(2, 0), (0, 0), (3, 8), (3, 1)})
+
+    def test_neighbor_table_matches_neighbors4(self):
+        self.assertEqual(self.lat.nbr.shape, (36, 4))
+        self.assertEqual(self.lat.nbr.dtype, np.int32)
+        for s in self.lat.get_sites():
+            expected = [self.lat.index(n) for n in self.lat.neighbors4(s)]
+            self.assertEqual(self.lat.nbr[self.lat.index(s)].tolist(), expected)
+            self.assertEqual(self.lat.site(self.lat.index(s)), s)
+
+    def test_square_size_as_int(self):
+        lat = LatticeSOS(size=6)
+        self.assertEqual(lat.shape, (6, 6))
+        self.assertEqual(len(lat.get_sites()), 36)
+
+class TestLatticeSOSVectorized(unittest.TestCase):
+    """
+    Las versiones vectorizadas deben coincidir sitio a sitio con los métodos escalares.
+    """
+    def setUp(self):
+        self.lat = LatticeSOS(size=[7, 5], seed=3)
+        self.lat.initialize("random_surface", max_roughness=3)
+
+    def test_bonds_match_scalar(self):
+        ads = self.lat.adsorption_bonds_all()
+        des = self.lat.desorption_bonds_all()
+        self.assertEqual(ads.dtype, np.int8)
+        self.assertEqual(ads.shape, self.lat.heights.shape)
+        for s in self.lat.get_sites():
+            self.assertEqual(ads[s], self.lat.adsorption_bonds(s))
+            self.assertEqual(des[s], self.lat.desorption_bonds(s))
+
+    def test_migration_mask_matches_scalar(self):
+        mask = self.lat.migration_target_mask_all()
+        count = self.lat.migration_target_count_all()
+        self.assertEqual(mask.dtype, np.int8)
+        self.assertEqual(mask.shape, (4,) + self.lat.heights.shape)
+        for s in self.lat.get_sites():
+            neigh = self.lat.neighbors4(s)
+            targets = self.lat.migration_targets(s)
+            self.assertEqual([n for k, n in enumerate(neigh) if mask[(k,) + tuple(s)]], targets)
+            self.assertEqual(count[s], len(targets))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
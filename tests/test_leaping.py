@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from src.leaping import TauLeaper
+from tests.helpers import notebook_params, make_kmc
+
+class TestTauLeaping(unittest.TestCase):
+    """
+    El modo aproximado debe conservar la masa, no dejar alturas negativas,
+    respetar los snapshots y aproximarse a la corrida exacta al reducir eps.
+    """
+    def setUp(self):
+        self.params = notebook_params()
+
+    def _kmc(self, size=32, seed=3, incremental=True):
+        return make_kmc(self.params, size, N_bulk0=20 * size * size, rng_seed=seed, init_mode="flat",
+                        incremental=incremental, history_mode="off")
+
+    def test_conservation_and_report(self):
+        kmc = self._kmc()
+        total = kmc.N_bulk + int(kmc.lat.heights.sum())
+        snaps = kmc.run(0.5, snapshot_times=[0.1, 0.25], leap_eps=0.05)
+        self.assertEqual(kmc.N_bulk + int(kmc.lat.heights.sum()), total)
+        self.assertGreaterEqual(int(kmc.lat.heights.min()), 0)
+        self.assertEqual(sum(kmc.counts.values()), kmc.n_events)
+
+        rep = kmc.run_report["leap"]
+        self.assertEqual(rep["eps"], 0.05)
+        self.assertGreater(rep["n_leaps"], 0)
+        self.assertLess(rep["rejected_fraction"], 0.1)
+        self.assertAlmostEqual(kmc.t, 0.5)
+        # Los saltos terminan en cada instante de snapshot
+        self.assertGreaterEqual(rep["limited_by"]["t_max"], 2)
+        self.assertEqual([s[0] for s in snaps], [0.1, 0.25])
+
+    def test_matches_exact_run(self):
+        # Conversión y rugosidad de una corrida exacta frente a τ-leaping
+        exact = self._kmc(size=24)
+        exact.run(0.6)
+        leap = self._kmc(size=24)
+        leap.run(0.6, leap_eps=0.02)
+        self.assertAlmostEqual(leap.conversion_percent, exact.conversion_percent, delta=2.0)
+        self.assertAlmostEqual(leap.lat.heights.std(), exact.lat.heights.std(), delta=0.3)
+
+    def test_small_leaps_fall_back_to_exact_steps(self):
+        kmc = self._kmc(size=4)
+        leaper = TauLeaper(kmc, eps=0.01, min_events=20)
+        for _ in range(50):
+            self.assertTrue(leaper.leap())
+        self.assertEqual(leaper.stats["n_exact_steps"], 50)
+        self.assertEqual(leaper.stats["n_leaps"], 0)
+
+    def test_wall_clock_checkpoints(self):
+        # Los saltos avanzan n_events de golpe: los checkpoints por reloj no
+        # deben depender de caer en un múltiplo exacto de 256 eventos
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        kmc = self._kmc()
+        saves = []
+        save = kmc.save_checkpoint
+        kmc.save_checkpoint = lambda path: saves.append(save(path))
+        kmc.run(0.3, checkpoint_path=os.path.join(tmp.name, "leap.npz"),
+                checkpoint_seconds=0.0, leap_eps=0.05)
+        rep = kmc.run_report["leap"]
+        self.assertGreater(rep["n_leaps"], 1)
+        # Aproximadamente uno cada 256 eventos (más el final)
+        self.assertGreaterEqual(len(saves) - 1, kmc.run_report["n_events"] // 512)
+
+    def test_invalid_eps(self):
+        with self.assertRaises(ValueError):
+            TauLeaper(self._kmc(size=4), eps=0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+
+from src.params import KMCParams
+from src.lattice import LatticeSOS
+from src.bkl import KMC_BKL
+from src.ensemble import conversion_on_grid
+from src.observables import SurfaceObservables
+from tests.helpers import make_kmc
+
+class TestSurfaceObservables(unittest.TestCase):
+    """
+    Las sumas incrementales deben coincidir con el cálculo desde cero tras cada
+    evento, y la traza sobre la malla debe usar el estado vigente en cada instante.
+    """
+    def setUp(self):
+        self.params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=1.0, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+
+    def _kmc(self, size, incremental=True):
+        return make_kmc(self.params, size, N_bulk0=800, rng_seed=4, lat_seed=9, max_roughness=3,
+                        incremental=incremental)
+
+    def _assert_matches_fresh(self, obs):
+        fresh = SurfaceObservables(obs.lat)
+        for name in ("sum_h", "sum_h2", "n_occupied", "n_up", "n_down"):
+            self.assertEqual(getattr(obs, name), getattr(fresh, name), name)
+
+    def test_incremental_matches_recompute(self):
+        # La tira de ancho 2 repite vecinos (i-1 == i+1) en la red periódica
+        for size, incremental in (([6, 6], True), ([2, 7], True), ([5, 4], False)):
+            kmc = self._kmc(size, incremental)
+            obs = kmc.enable_observables()
+            for _ in range(300):
+                self.assertTrue(kmc.step())
+                self._assert_matches_fresh(obs)
+
+    def test_trace_on_grid(self):
+        grid = np.linspace(0.0, 0.5, 40)
+        kmc = self._kmc([6, 6])
+        h0 = kmc.lat.heights.mean()
+        kmc.run(t_end=0.5, observable_times=grid)
+        tr = kmc.observable_trace
+        self.assertTrue(np.all(np.isfinite(tr["roughness"])))
+        self.assertEqual(tr["coordination"].shape, (40, 5))
+        np.testing.assert_array_equal(tr["coordination"].sum(axis=1), tr["coverage"] * 36)
+        # Misma semántica que conversion_on_grid (estado previo al evento que cruza)
+        ref = conversion_on_grid(self._kmc([6, 6]), grid)
+        np.testing.assert_array_equal(tr["conversion"], ref["conversion"])
+        self.assertEqual(tr["mean_height"][0], h0)
+
+    def test_final_grid_point_after_leap(self):
+        # El último salto (leap_min_events=1: sin pasos exactos al final)
+        # termina justo en t_end = último punto de la malla: la coordinación
+        # debe corresponder al mismo estado final que obs
+        lat = LatticeSOS(size=24, seed=9)
+        lat.initialize("random_surface", max_roughness=3)
+        kmc = KMC_BKL(lat, self.params, N_bulk0=20 * 24 * 24, rng_seed=4, incremental=True,
+                      history_mode="off")
+        grid = np.linspace(0.0, 0.05, 6)
+        kmc.run(t_end=grid[-1], observable_times=grid, leap_eps=0.05, leap_min_events=1)
+        self.assertGreater(kmc.run_report["leap"]["n_leaps"], 0)
+        tr = kmc.observable_trace
+        self.assertTrue(np.isfinite(tr["coverage"][-1]))
+        kmc._rebuild_bins()
+        np.testing.assert_array_equal(tr["coordination"][-1], kmc._bins["desorption"].counts)
+        np.testing.assert_array_equal(tr["coordination"].sum(axis=1), tr["coverage"] * 24 * 24)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import unittest
+import numpy as np
+
+from src.params import KMCParams
+from src.lattice import LatticeSOS
+from src.bkl import KMC_BKL
+from src.parallel import ParallelKMC
+from tests.helpers import notebook_params
+
+class TestActiveRegion(unittest.TestCase):
+    """
+    Base de la descomposición espacial: un KMC_BKL restringido a una región
+    solo cambia alturas en ella y en su borde, y step(t_max) no cruza t_max.
+    """
+    def setUp(self):
+        self.params = KMCParams(
+            T=300, K0_plus=1.0, K_inc_plus=0.05,
+            E_pb_over_kT=1.0, phi_over_kT=1.0, delta=0.3,
+            V=1.0, C_eq=50, S_floor=-5, S_ceil=8
+        )
+
+    def test_events_stay_in_region(self):
+        for incremental in (True, False):
+            lat = LatticeSOS(size=[12, 6], seed=2)
+            lat.initialize("random_surface", max_roughness=2)
+            kmc = KMC_BKL(lat, self.params, N_bulk0=500, rng_seed=8, incremental=incremental)
+            mask = np.zeros(lat.shape, dtype=bool)
+            mask[4:8, :] = True
+            kmc.set_active_region(mask)
+            h0 = lat.heights.copy()
+            for _ in range(300):
+                self.assertTrue(kmc.step())
+            changed = np.flatnonzero((lat.heights != h0).any(axis=1))
+            # Migraciones desde la región pueden alcanzar las filas 3 y 8
+            self.assertTrue(set(changed.tolist()) <= set(range(3, 9)))
+
+    def test_step_respects_t_max(self):
+        lat = LatticeSOS(size=6, seed=2)
+        kmc = KMC_BKL(lat, self.params, N_bulk0=500, rng_seed=8)
+        while kmc.t < 0.05:
+            self.assertTrue(kmc.step(t_max=0.05))
+            self.assertLessEqual(kmc.t, 0.05)
+        self.assertEqual(kmc.t, 0.05)
+
+
+class TestParallelKMC(unittest.TestCase):
+    """
+    El modo paralelo conserva la masa, registra los snapshots pedidos y
+    reproduce estadísticamente la corrida serie.
+    """
+    def setUp(self):
+        self.params = notebook_params()
+
+    def test_matches_serial(self):
+        L, N0 = 16, 20 * 16 * 16
+        lat = LatticeSOS(size=L, seed=1)
+        serial = KMC_BKL(lat, self.params, N_bulk0=N0, rng_seed=3, history_mode="off")
+        serial.run(0.5)
+
+        lat = LatticeSOS(size=L, seed=1)
+        with ParallelKMC(lat, self.params, N_bulk0=N0, n_workers=2, rng_seed=3) as pk:
+            snaps = pk.run(0.5, snapshot_times=[0.2])
+            self.assertEqual(pk.N_bulk + int(lat.heights.sum()), N0)
+            self.assertEqual(sum(pk.counts.values()), pk.n_events)
+            self.assertEqual([s[0] for s in snaps], [0.2])
+            self.assertAlmostEqual(pk.t, 0.5)
+            self.assertEqual(pk.run_report["stop_reason"], "t_end")
+            self.assertAlmostEqual(pk.conversion_percent, serial.conversion_percent, delta=3.0)
+            self.assertAlmostEqual(lat.heights.std(), serial.lat.heights.std(), delta=0.5)
+        self.assertGreaterEqual(int(lat.heights.min()), 0)
+
+    def test_ndarray_snapshot_times(self):
+        lat = LatticeSOS(size=8, seed=1)
+        with ParallelKMC(lat, self.params, N_bulk0=1000, n_workers=2, rng_seed=3) as pk:
+            snaps = pk.run(0.3, snapshot_times=np.linspace(0.1, 0.2, 2))
+        self.assertEqual([s[0] for s in snaps], [0.1, 0.2])
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "requiere /dev/shm")
+    def test_failed_startup_frees_shared_memory(self):
+        before = set(os.listdir("/dev/shm"))
+        with self.assertRaises(ValueError):
+            ParallelKMC(LatticeSOS(size=8), self.params, N_bulk0=100, n_workers=2, window="x")
+        self.assertEqual(set(os.listdir("/dev/shm")), before)
+
+    def test_requires_two_rows_per_sublattice(self):
+        with self.assertRaises(ValueError):
+            ParallelKMC(LatticeSOS(size=6), self.params, N_bulk0=100, n_workers=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+
+from src.profiling import StepProfiler
+from tests.helpers import notebook_params, make_kmc
+
+class TestStepProfiler(unittest.TestCase):
+    """
+    Perfilado por fases: no altera la trayectoria, acumula llamadas por fase y
+    por primitiva de la red, y se puede desactivar.
+    """
+    def setUp(self):
+        self.params = notebook_params(S_floor=-5, S_ceil=8)
+
+    def _kmc(self, profile):
+        return make_kmc(self.params, [6, 6], N_bulk0=2000, rng_seed=5, lat_seed=4, incremental=True,
+                        profile=profile)
+
+    def test_same_trajectory_and_report(self):
+        plain, prof = self._kmc(False), self._kmc(True)
+        plain.run(t_end=np.inf, max_events=500)
+        prof.run(t_end=np.inf, max_events=500)
+        np.testing.assert_array_equal(plain.lat.heights, prof.lat.heights)
+        self.assertEqual(plain.t, prof.t)
+
+        self.assertNotIn("profile", plain.run_report)
+        self.assertEqual(plain.run_report["stop_reason"], "max_events")
+        report = prof.run_report["profile"]
+        self.assertEqual(report["n_events"], 500)
+        for phase in ("rates", "totals", "time", "choose_type", "choose_class",
+                      "choose_site", "lattice_update", "history"):
+            self.assertEqual(report["phases"][phase]["calls"], 500, phase)
+        self.assertAlmostEqual(sum(v["fraction"] for v in report["phases"].values()), 1.0)
+        self.assertEqual(report["lattice"]["site"]["calls"], 500)
+        self.assertGreater(report["window_events_per_s"], 0.0)
+
+    def test_disable_restores_lattice(self):
+        kmc = self._kmc(True)
+        self.assertIn("inc_height", vars(kmc.lat))
+        kmc.disable_profiling()
+        self.assertIsNone(kmc.prof)
+        self.assertNotIn("inc_height", vars(kmc.lat))
+
+    def test_sliding_window(self):
+        prof = StepProfiler(window=3)
+        for _ in range(10):
+            prof.start()
+            prof.lap("a")
+            prof.tick()
+        self.assertEqual(len(prof._stamps), 3)
+        self.assertEqual(prof.report()["phases"]["a"]["calls"], 10)
+
+if __name__ == '__main__':
+    unittest.main()
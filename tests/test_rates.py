@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+from src.params import KMCParams
+from src.lattice import LatticeSOS
+from src.bkl import KMC_BKL
+from tests.helpers import notebook_params
+
+class TestRateTable(unittest.TestCase):
+    """
+    La tabla cacheada debe reproducir las funciones de tasa y refrescarse
+    cuando cambian los parámetros o la reserva.
+    """
+    def setUp(self):
+        self.params = notebook_params(T=300, S_floor=-5, S_ceil=8)
+        self.lat = LatticeSOS(size=[5, 5], seed=1)
+        self.kmc = KMC_BKL(self.lat, self.params, N_bulk0=1000, rng_seed=2)
+
+    def _assert_table_matches(self):
+        rt = self.kmc.rates.refresh(self.kmc.p, self.kmc.N_bulk, self.kmc.N0)
+        for i in range(5):
+            self.assertEqual(rt.ads[i], self.kmc.r_a(i))
+            self.assertEqual(rt.des[i], self.kmc.r_d(i))
+            self.assertEqual(rt.inc[i], self.kmc.r_inc(i))
+        for i in range(4):
+            self.assertEqual(rt.mig[i], self.kmc.r_m(i))
+
+    def test_table_matches_rate_functions(self):
+        self._assert_table_matches()
+        self.kmc.N_bulk = 321
+        self._assert_table_matches()
+
+    def test_params_mutation_invalidates(self):
+        self._assert_table_matches()
+        self.params.E_pb_over_kT = 50.0
+        self._assert_table_matches()
+        self.assertAlmostEqual(self.kmc.rates.des[4], self.kmc.r_d(4))
+
+    def test_new_params_object_invalidates(self):
+        # Un KMCParams nuevo puede ocupar la dirección del anterior y tener la
+        # misma revisión: la caché no debe depender de id()
+        self._assert_table_matches()
+        kw = {k: getattr(self.params, k) for k in ("T", "K0_plus", "K_inc_plus", "phi_over_kT",
+                                                   "delta", "V", "C_eq", "S_floor", "S_ceil")}
+        self.params = None
+        self.kmc.p = None
+        self.kmc.p = KMCParams(E_pb_over_kT=4.0, **kw)
+        self._assert_table_matches()
+        self.assertAlmostEqual(self.kmc.rates.des[1], self.kmc.r_d(1))
+        self.kmc.step()
+        self.assertEqual(self.kmc.rates.des[1], self.kmc.r_d(1))
+
+    def test_adsorption_row_only_refreshed_on_bulk_change(self):
+        rt = self.kmc.rates.refresh(self.params, self.kmc.N_bulk, self.kmc.N0)
+        rt.ads[:] = -1.0  # marca: no debe tocarse mientras N_bulk no cambie
+        rt.refresh(self.params, self.kmc.N_bulk, self.kmc.N0)
+        self.assertTrue(np.all(rt.ads == -1.0))
+        rt.refresh(self.params, self.kmc.N_bulk - 1, self.kmc.N0)
+        self.assertTrue(np.all(rt.ads >= 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
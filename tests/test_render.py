@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from src.render import (voxel_mask, downsample_heights, exposed_faces,
+                        count_exposed_faces, fit_face_budget, render_frames)
+
+def _exposed_voxel_faces(heights):
+    # Referencia con el cubo denso: caras entre vóxel lleno y vacío, sin el suelo
+    m = np.pad(voxel_mask(heights), 1)
+    n = sum(np.count_nonzero(np.diff(m.astype(np.int8), axis=a)) for a in range(3))
+    return n - np.count_nonzero(heights > 0)
+
+class TestVoxelGeometry(unittest.TestCase):
+    """
+    La máscara vectorizada coincide con el doble bucle original y las caras
+    generadas son exactamente las caras expuestas de ese cubo.
+    """
+    def setUp(self):
+        self.h = np.random.default_rng(0).integers(0, 6, size=(9, 7))
+
+    def test_mask_matches_loop(self):
+        Lx, Ly = self.h.shape
+        ref = np.zeros((Lx, Ly, self.h.max()), dtype=bool)
+        for i in range(Lx):
+            for j in range(Ly):
+                ref[i, j, :self.h[i, j]] = True
+        np.testing.assert_array_equal(voxel_mask(self.h), ref)
+
+    def test_faces_are_exposed_voxel_faces(self):
+        verts, kinds = exposed_faces(self.h, merge=False)
+        self.assertEqual(len(verts), _exposed_voxel_faces(self.h))
+        self.assertEqual(len(verts), count_exposed_faces(self.h, merge=False))
+        # Caras unitarias
+        sides = np.abs(verts[kinds > 0, 2, 2] - verts[kinds > 0, 0, 2])
+        np.testing.assert_array_equal(sides, 1.0)
+        # Las paredes fusionadas cubren la misma área
+        mverts, mkinds = exposed_faces(self.h)
+        self.assertEqual(len(mverts), count_exposed_faces(self.h))
+        area = np.abs(mverts[mkinds > 0, 2, 2] - mverts[mkinds > 0, 0, 2]).sum()
+        self.assertEqual(area, np.count_nonzero(kinds > 0))
+
+    def test_single_column(self):
+        h = np.zeros((3, 3), dtype=int)
+        h[1, 1] = 2
+        self.assertEqual(count_exposed_faces(h), 5)
+        self.assertEqual(count_exposed_faces(h, merge=False), 9)
+        self.assertEqual(count_exposed_faces(np.zeros((4, 4), dtype=int)), 0)
+
+    def test_downsampling_and_budget(self):
+        h, xe, ye = downsample_heights(self.h, spatial_step=4, height_step=2)
+        self.assertEqual(h.shape, (3, 2))
+        self.assertEqual(h[0, 0], -(-self.h[:4, :4].max() // 2))
+        np.testing.assert_array_equal(xe, [0, 4, 8, 9])
+        step = fit_face_budget(self.h, max_faces=20)
+        hs, _, _ = downsample_heights(self.h, step)
+        self.assertLessEqual(count_exposed_faces(hs), 20)
+        self.assertGreater(step, 1)
+
+    def test_render_frames(self):
+        snaps = [(0.1 * k, self.h + k, 10.0 * k) for k in range(3)]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = render_frames(snaps, out_dir=tmp, dpi=30, max_faces=500)
+            self.assertEqual(len(paths), 3)
+            self.assertTrue(all(os.path.getsize(p) > 0 for p in paths))
+
+if __name__ == "__main__":
+    unittest.main()
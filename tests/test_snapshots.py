@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+
+from src.snapshots import SnapshotStore, nearest_snapshot
+from tests.helpers import notebook_params, make_kmc
+
+class TestSnapshotStore(unittest.TestCase):
+    """
+    Snapshots en disco: mismo contenido que la lista en memoria, lectura
+    perezosa y búsqueda por tiempo.
+    """
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.params = notebook_params(S_floor=-5, S_ceil=8)
+        self.times = np.linspace(0, 0.05, 6)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _kmc(self):
+        return make_kmc(self.params, [6, 6], N_bulk0=300, rng_seed=5, max_roughness=1, n_seeds=10,
+                        incremental=True)
+
+    def test_store_matches_list(self):
+        snaps = self._kmc().run(t_end=0.05, snapshot_times=self.times)
+        store = SnapshotStore(os.path.join(self.tmp, "run"))
+        out = self._kmc().run(t_end=0.05, snapshot_times=self.times, snapshot_store=store)
+        self.assertIs(out, store)
+        self.assertEqual(len(store), len(snaps))
+        for (t1, h1, c1), (t2, h2, c2) in zip(snaps, store):
+            self.assertEqual(t1, t2)
+            self.assertEqual(c1, c2)
+            np.testing.assert_array_equal(h1, h2)
+
+        reopened = SnapshotStore.open(os.path.join(self.tmp, "run"))
+        self.assertIsInstance(reopened.heights, np.memmap)
+        np.testing.assert_array_equal(reopened.times, self.times)
+        self.assertEqual(reopened.nearest(0.021), 2)
+        self.assertEqual(nearest_snapshot(snaps, 0.021), 2)
+
+    def test_growth_keeps_previous_snapshots(self):
+        store = SnapshotStore(os.path.join(self.tmp, "grow"))
+        store.reserve(1, (3, 2))
+        for k in range(5):
+            store.append(float(k), np.full((3, 2), k, dtype=np.int32), 10.0 * k)
+        store.flush()
+        self.assertEqual(len(store), 5)
+        for k, (t, h, c) in enumerate(store):
+            self.assertEqual(t, float(k))
+            self.assertTrue(np.all(h == k))
+
+    def test_nearest_on_list(self):
+        snaps = [(t, None, 0.0) for t in [0.0, 1.0, 2.0, 4.0]]
+        self.assertEqual(nearest_snapshot(snaps, -3.0), 0)
+        self.assertEqual(nearest_snapshot(snaps, 0.5), 0)
+        self.assertEqual(nearest_snapshot(snaps, 2.9), 2)
+        self.assertEqual(nearest_snapshot(snaps, 3.1), 3)
+        self.assertEqual(nearest_snapshot(snaps, 99.0), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from types import SimpleNamespace
+
+from src.stopping import (ConversionPlateau, TargetConversion, BulkExhausted,
+                          WallClock, SurfaceSteadyState)
+from tests.helpers import notebook_params, make_kmc
+
+class TestStoppingCriteria(unittest.TestCase):
+    """
+    Parada anticipada de run(): cada criterio debe disparar, terminar antes
+    de t_end y quedar registrado en run_report.
+    """
+    def setUp(self):
+        self.params = notebook_params()
+
+    def _kmc(self):
+        return make_kmc(self.params, 8, N_bulk0=150, rng_seed=5, init_mode="flat", history_mode="off")
+
+    def test_target_conversion_and_snapshots(self):
+        kmc = self._kmc()
+        snaps = kmc.run(1000.0, snapshot_times=[0.5, 500.0],
+                        stop_criteria=[BulkExhausted(0), TargetConversion(90.0)])
+        rep = kmc.run_report
+        self.assertEqual(rep["stop_reason"], "target_conversion")
+        self.assertEqual(rep["stopping"]["fired"], "target_conversion")
+        self.assertGreaterEqual(kmc.conversion_percent, 90.0)
+        self.assertLess(kmc.t, 1000.0)
+        # Los snapshots no alcanzados guardan el estado final
+        self.assertEqual(len(snaps), 2)
+        np.testing.assert_array_equal(snaps[1][1], kmc.lat.heights)
+
+    def test_plateau_and_steady_state(self):
+        kmc = self._kmc()
+        kmc.run(1000.0, stop_criteria=[ConversionPlateau(window=0.5, slope_tol=2.0, min_conversion=50.0)])
+        rep = kmc.run_report
+        self.assertEqual(rep["stop_reason"], "conversion_plateau")
+        self.assertLessEqual(abs(rep["stopping"]["criteria"]["conversion_plateau"]["slope"]), 2.0)
+        self.assertGreaterEqual(kmc.conversion_percent, 50.0)
+
+        kmc = self._kmc()
+        kmc.run(1000.0, stop_criteria=[SurfaceSteadyState(sample_dt=0.02, n_samples=10)])
+        self.assertEqual(kmc.run_report["stop_reason"], "surface_steady_state")
+        self.assertLess(kmc.t, 1000.0)
+
+    def test_wall_clock_fires_at_first_check(self):
+        kmc = self._kmc()
+        kmc.run(1000.0, stop_criteria=[WallClock(0.0)], stop_check_every=50)
+        self.assertEqual(kmc.run_report["stop_reason"], "wall_clock")
+        self.assertEqual(kmc.run_report["n_events"], 50)
+
+    def test_online_slope_matches_polyfit(self):
+        crit = ConversionPlateau(window=2.05, slope_tol=0.0, sample_dt=0.1)
+        kmc = SimpleNamespace(t=0.0, conversion_percent=0.0)
+        crit.reset(kmc)
+        ts = np.arange(50) * 0.1
+        cs = 100 * (1 - np.exp(-ts)) + np.sin(7 * ts)
+        for t, c in zip(ts, cs):
+            kmc.t, kmc.conversion_percent = t, c
+            crit.check(kmc)
+        # La ventana contiene las últimas 21 muestras
+        sel = slice(-21, None)
+        self.assertAlmostEqual(crit.slope, np.polyfit(ts[sel], cs[sel], 1)[0], places=6)
+
+if __name__ == "__main__":
+    unittest.main()
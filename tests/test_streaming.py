@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+
+from src.ensemble import conversion_on_grid
+from src.stopping import TargetConversion
+from tests.helpers import notebook_params, make_kmc
+
+class TestIterRun(unittest.TestCase):
+    """
+    iter_run(): registros snapshot/grid/progress/stop con la misma semántica
+    que run() y conversion_on_grid, y callbacks de run().
+    """
+    def setUp(self):
+        self.params = notebook_params()
+        self.times = [0.1, 0.3, 0.6]
+
+    def _kmc(self):
+        return make_kmc(self.params, 8, N_bulk0=300, rng_seed=4, lat_seed=2, incremental=True,
+                        history_mode="off")
+
+    def test_records_match_run(self):
+        ref = self._kmc()
+        ref_snaps = ref.run(0.8, snapshot_times=self.times)
+
+        kmc = self._kmc()
+        kinds, snaps = [], []
+        for rec in kmc.iter_run(0.8, snapshot_times=self.times, progress_every=50):
+            kinds.append(rec.kind)
+            if rec.kind == "snapshot":
+                # La vista de alturas se copia para conservarla
+                snaps.append((rec.t, rec.heights.copy(), rec.conversion))
+                self.assertIs(rec.heights.base, kmc.lat.heights.base)
+            elif rec.kind == "progress":
+                self.assertEqual(rec.n_events % 50, 0)
+                self.assertEqual(sum(rec.counts.values()), rec.n_events)
+        self.assertEqual(kinds[-1], "stop")
+        self.assertEqual(kinds.count("progress"), kmc.run_report["n_events"] // 50)
+        self.assertEqual(len(snaps), len(ref_snaps))
+        for (ta, ha, ca), (tb, hb, cb) in zip(snaps, ref_snaps):
+            self.assertEqual((ta, ca), (tb, cb))
+            np.testing.assert_array_equal(ha, hb)
+        self.assertEqual(kmc.run_report["stop_reason"], "t_end")
+
+    def test_grid_records_match_conversion_on_grid(self):
+        grid = np.linspace(0.0, 0.5, 11)
+        ref = conversion_on_grid(self._kmc(), grid)
+        kmc = self._kmc()
+        recs = [r for r in kmc.iter_run(grid[-1], grid_times=grid, with_heights=False)
+                if r.kind == "grid"]
+        self.assertEqual([r.t for r in recs], grid.tolist())
+        np.testing.assert_array_equal([r.conversion for r in recs], ref["conversion"])
+        np.testing.assert_array_equal([r.N_bulk for r in recs], ref["N_bulk"])
+
+    def test_early_close_finishes_run(self):
+        kmc = self._kmc()
+        grid = np.linspace(0.0, 0.8, 17)
+        for rec in kmc.iter_run(0.8, observable_times=grid, progress_every=50):
+            if rec.kind == "progress":
+                break
+        self.assertIsNone(kmc._obs_trace)
+        self.assertEqual(kmc.run_report["stop_reason"], "closed")
+        self.assertEqual(kmc.run_report["n_events"], 50)
+        conv = kmc.observable_trace["conversion"].copy()
+        n_partial = int(np.count_nonzero(~np.isnan(conv)))
+        self.assertTrue(0 < n_partial < len(grid))
+        # Una corrida posterior sin malla no toca la traza anterior
+        kmc.run(kmc.t + 0.1)
+        self.assertEqual(kmc.run_report["stop_reason"], "t_end")
+        np.testing.assert_array_equal(kmc.observable_trace["conversion"], conv)
+
+    def test_run_callbacks(self):
+        kmc = self._kmc()
+        got = {"snapshot": [], "progress": [], "stop": []}
+        snaps = kmc.run(50.0, snapshot_times=[0.2, 40.0], progress_every=100,
+                        stop_criteria=[TargetConversion(80.0)],
+                        on_snapshot=got["snapshot"].append, on_progress=got["progress"].append,
+                        on_stop=got["stop"].append)
+        self.assertEqual([r.t for r in got["snapshot"]], [0.2, 40.0])
+        self.assertEqual(len(snaps), 2)
+        self.assertGreater(len(got["progress"]), 0)
+        (stop,) = got["stop"]
+        self.assertEqual(stop.stop_reason, "target_conversion")
+        self.assertEqual(stop.n_events, kmc.run_report["n_events"])
+        self.assertGreaterEqual(stop.conversion, 80.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+
+from src.sumtree import SumTree
+
+class TestSumTree(unittest.TestCase):
+    """
+    El árbol de sumas debe seleccionar la misma hoja que un barrido acumulado.
+    """
+    def setUp(self):
+        self.rng = np.random.default_rng(5)
+        self.w = self.rng.random(13) * 10.0 ** self.rng.integers(-6, 6, size=13)
+        self.w[[2, 7]] = 0.0
+        self.tree = SumTree(len(self.w))
+        self.tree.set_all(self.w)
+
+    def test_total_and_find_match_cumsum(self):
+        self.assertAlmostEqual(self.tree.total, self.w.sum(), delta=1e-9 * self.w.sum())
+        cum = np.cumsum(self.w)
+        for u in self.rng.random(500) * self.w.sum():
+            expected = int(np.searchsorted(cum, u, side="right"))
+            self.assertEqual(self.tree.find(u), expected)
+
+    def test_update_matches_rebuild(self):
+        for i, v in [(2, 3.5), (0, 0.0), (12, 1e-8), (7, 42.0)]:
+            self.w[i] = v
+            self.tree.update(i, v)
+        fresh = SumTree(len(self.w))
+        fresh.set_all(self.w)
+        np.testing.assert_allclose(self.tree.tree, fresh.tree)
+
+    def test_never_returns_empty_leaf(self):
+        self.assertNotIn(self.tree.find(self.tree.total), (2, 7))
+        self.assertNotEqual(self.tree.find(self.tree.total * (1 + 1e-12)), 13)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from src.trajectory import Trajectory
+from tests.helpers import notebook_params, make_kmc
+
+class TestTrajectory(unittest.TestCase):
+    """
+    Reconstrucción keyframe + eventos: state_at(t) debe coincidir con el
+    estado real de la simulación tras cada evento, también con τ-leaping y
+    tras guardar/cargar.
+    """
+    def setUp(self):
+        self.params = notebook_params()
+
+    def _kmc(self, size=8, N_bulk0=300, **kw):
+        return make_kmc(self.params, size, N_bulk0=N_bulk0, rng_seed=5, init_mode="flat", **kw)
+
+    def test_state_at_matches_every_step(self):
+        # Una sola partícula en solución: N_bulk pasa por 0 muchas veces
+        kmc = self._kmc(N_bulk0=1)
+        traj = kmc.enable_trajectory(keyframe_every=37)
+        ref = []
+        for _ in range(400):
+            self.assertTrue(kmc.step())
+            ref.append((kmc.t, kmc.lat.heights.copy(), kmc.N_bulk, kmc.N_inc))
+        self.assertGreater(len(traj.kf_t), 5)
+        for t, h, nb, ni in ref[::7] + ref[-1:]:
+            h2, nb2, ni2 = traj.state_at(t)
+            np.testing.assert_array_equal(h2, h)
+            self.assertEqual((nb2, ni2), (nb, ni))
+        # Entre eventos el estado es el del último evento anterior
+        t, h, nb, ni = ref[100]
+        h2, nb2, _ = traj.state_at(0.5 * (t + ref[101][0]))
+        np.testing.assert_array_equal(h2, h)
+        self.assertEqual(nb2, nb)
+
+    def test_leaping_run_and_save_load(self):
+        kmc = self._kmc(size=24, N_bulk0=20 * 24 * 24)
+        traj = kmc.enable_trajectory(keyframe_every=2000)
+        h0 = kmc.lat.heights.copy()
+        snaps = kmc.run(0.3, snapshot_times=[0.1, 0.2], leap_eps=0.05)
+        self.assertGreater(kmc.run_report["leap"]["n_leaps"], 0)
+        for t, h, conv in snaps:
+            np.testing.assert_array_equal(traj.state_at(t)[0], h)
+        h_end, nb, ni = traj.state_at(kmc.t)
+        np.testing.assert_array_equal(h_end, kmc.lat.heights)
+        self.assertEqual((nb, ni), (kmc.N_bulk, kmc.N_inc))
+
+        with tempfile.TemporaryDirectory() as d:
+            path = traj.save(os.path.join(d, "traj.npz"))
+            loaded = Trajectory.load(path)
+        np.testing.assert_array_equal(loaded.state_at(0.0)[0], h0)
+        for t in (0.05, 0.15, kmc.t):
+            a, b = traj.state_at(t), loaded.state_at(t)
+            np.testing.assert_array_equal(a[0], b[0])
+            self.assertEqual(a[1:], b[1:])
+
+    def test_requires_full_history(self):
+        kmc = self._kmc(history_mode="off")
+        with self.assertRaises(ValueError):
+            kmc.enable_trajectory()
+        with self.assertRaises(ValueError):
+            Trajectory((4, 4)).state_at(0.0)
+
+if __name__ == "__main__":
+    unittest.main()